@@ -7,11 +7,11 @@ Demo: Two-Stage Model in Action
 
 import sys
 import os
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src', 'models'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 import pandas as pd
 import numpy as np
-from two_stage_model import TwoStageModel
+from src.models.two_stage_model import TwoStageModel
 import joblib
 
 print("=" * 80)
@@ -22,27 +22,32 @@ def start_api_server():
     env['MODEL_PATH'] = 'src/models/model.pkl'
     env['CONFIG_PATH'] = 'data/processed/preprocess_config.json'
     
-    # Start uvicorn
-    process = subprocess.Popen(
-        [sys.executable, '-m', 'uvicorn', 'src.app.main:app', '--host', '0.0.0.0', '--port', '8000'],
-        env=env,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
-    )
-    
-    # Wait for server to start
-    time.sleep(5)
-    
-    # Check if server is running
-    try:
-        response = requests.get('http://localhost:8000/health', timeout=5)
-        if response.status_code == 200:
-            print("✓ FastAPI server started successfully!")
-            return process
-    except Exception as e:
-        print(f"✗ Failed to start server: {e}")
-        process.terminate()
-        sys.exit(1)
+    # The preloaded multi-process launcher needs os.fork; elsewhere (Windows)
+    # run a single uvicorn process. Server output goes straight to this console.
+    if hasattr(os, 'fork'):
+        command = [sys.executable, '-m', 'src.app.launcher', '--host', '0.0.0.0', '--port', '8000']
+    else:
+        command = [sys.executable, '-m', 'uvicorn', 'src.app.main:app', '--host', '0.0.0.0', '--port', '8000']
+    process = subprocess.Popen(command, env=env)
+    
+    # Wait for the server to accept connections (/live answers before the model is ready)
+    deadline = time.time() + 60
+    last_error = None
+    while time.time() < deadline:
+        if process.poll() is not None:
+            print(f"✗ Failed to start server: exited with code {process.returncode} (see output above)")
+            sys.exit(1)
+        try:
+            response = requests.get('http://localhost:8000/live', timeout=2)
+            if response.status_code == 200:
+                print("✓ FastAPI server started successfully!")
+                return process
+        except Exception as e:
+            last_error = e
+        time.sleep(0.5)
+    print(f"✗ Failed to start server: {last_error}")
+    process.terminate()
+    sys.exit(1)
 
 def create_public_tunnel():
     """Create public ngrok tunnel"""
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""
+Cold-start benchmark for the API: import time of src.app.main and the time
+from launching uvicorn to the first successful /live and /ready.
+
+Runs `python -X importtime -c "import src.app.main"` in fresh interpreters
+(the first run also writes .pyc files and is discarded), reports the median
+total and the slowest top-level imports, and fails if the median exceeds the
+budget or if a module that serving loads lazily (sklearn, pandas, scipy,
+joblib) shows up in the import graph. With --serve it then starts uvicorn on
+a free port and polls /live (server up) and /ready (model loaded and warmed
+up) until they answer.
+
+    python scripts/import_time.py --budget-ms 800
+    python scripts/import_time.py --serve --ready-budget-ms 5000
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+# Top-level packages the API must not import at module load
+LAZY_MODULES = ("sklearn", "pandas", "scipy", "joblib")
+
+
+def import_profile(module):
+    """
+    One fresh `-X importtime` import of module.
+    Returns:
+        (total seconds, {module name: (cumulative seconds, nesting level)})
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+        env={**os.environ, "PYTHONPATH": ROOT},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nesting is shown by two spaces of indentation per level
+        level = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (int(cumulative) / 1e6, level)
+    return modules[module][0], modules
+
+
+def startup_times(port, timeout):
+    """Seconds from launching uvicorn to the first 200 from /live and from /ready"""
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    times = {}
+    try:
+        for path in ("/live", "/ready"):
+            while path not in times:
+                if time.perf_counter() - started > timeout:
+                    raise RuntimeError(f"{path} did not answer within {timeout}s")
+                if server.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+                try:
+                    with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=1) as response:
+                        times[path] = (time.perf_counter() - started, json.loads(response.read()))
+                except OSError:
+                    # Connection refused, or 503 from /ready while warming up
+                    time.sleep(0.02)
+        return times
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def main(module, repeats, budget_ms, top, serve, ready_budget_ms):
+    import_profile(module)  # warm the .pyc cache
+    runs = [import_profile(module) for _ in range(repeats)]
+    totals = [total for total, _ in runs]
+    median = statistics.median(totals)
+    _, modules = runs[totals.index(min(totals, key=lambda t: abs(t - median)))]
+
+    print(f"import {module}: median {median * 1000:.0f} ms over {repeats} runs "
+          f"(min {min(totals) * 1000:.0f}, max {max(totals) * 1000:.0f})")
+    direct = sorted(((seconds, name) for name, (seconds, level) in modules.items() if level == 1), reverse=True)
+    for seconds, name in direct[:top]:
+        print(f"  {seconds * 1000:8.1f} ms  {name}")
+
+    failed = False
+    eager = sorted({name.split(".")[0] for name in modules} & set(LAZY_MODULES))
+    if eager:
+        print(f"✗ Imported eagerly: {', '.join(eager)} (load these inside the functions that use them)")
+        failed = True
+    if median * 1000 > budget_ms:
+        print(f"✗ Import time {median * 1000:.0f} ms exceeds the {budget_ms:.0f} ms budget")
+        failed = True
+    elif not eager:
+        print(f"✓ Import time within the {budget_ms:.0f} ms budget")
+
+    if serve:
+        times = startup_times(_free_port(), timeout=max(ready_budget_ms / 1000 * 4, 30))
+        live, _ = times["/live"]
+        ready, state = times["/ready"]
+        print(f"uvicorn start to first /live: {live * 1000:.0f} ms")
+        print(f"uvicorn start to first /ready: {ready * 1000:.0f} ms "
+              f"(load {state.get('model_load_seconds')} s, warm-up {state.get('model_warmup_seconds')} s)")
+        if ready * 1000 > ready_budget_ms:
+            print(f"✗ First /ready took longer than the {ready_budget_ms:.0f} ms budget")
+            failed = True
+        else:
+            print(f"✓ First /ready within the {ready_budget_ms:.0f} ms budget")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="src.app.main")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=800)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--serve", action="store_true", help="also time uvicorn start to first /live and /ready")
+    parser.add_argument("--ready-budget-ms", type=float, default=5000)
+    args = parser.parse_args()
+
+    main(args.module, args.repeats, args.budget_ms, args.top, args.serve, args.ready_budget_ms)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+Measure per-worker memory for a model artifact, the way serving workers load it.
+
+Starts N independent worker processes that each load MODEL via
+TwoStageModel.from_artifact, score one batch and then report RSS, PSS and USS
+(Linux /proc/self/smaps_rollup). PSS divides shared pages between the
+processes that map them, so it shows what memory-mapped tree arrays save.
+
+    python scripts/measure_worker_rss.py --model src/models/model.pkl --workers 4
+    python scripts/measure_worker_rss.py --model src/models/model_compiled --workers 4
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+def _memory_kb():
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[-1] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    uss = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return fields.get("Rss", 0), fields.get("Pss", 0), uss
+
+
+def _worker(model_path, engine, n_features, ready, done):
+    import numpy as np
+    from src.models.two_stage_model import TwoStageModel
+
+    baseline = _memory_kb()
+    model = TwoStageModel.from_artifact(model_path, engine=engine)
+    model.predict_probabilities_and_labels(np.zeros((256, n_features)))
+    # Report only once every worker holds the model, so PSS splits shared pages fairly
+    ready.wait()
+    loaded = _memory_kb()
+    done.put((os.getpid(), baseline, loaded))
+
+
+def main(model_path, workers, engine, n_features):
+    ctx = mp.get_context("spawn")
+    ready = ctx.Barrier(workers)
+    done = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(model_path, engine, n_features, ready, done))
+             for _ in range(workers)]
+    for p in procs:
+        p.start()
+    results = [done.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    print(f"model={model_path} engine={engine} workers={workers}")
+    print(f"{'pid':>8} {'RSS MB':>8} {'PSS MB':>8} {'USS MB':>8} {'model USS MB':>13}")
+    for pid, (_, _, base_uss), (rss, pss, uss) in sorted(results):
+        print(f"{pid:>8} {rss / 1024:8.1f} {pss / 1024:8.1f} {uss / 1024:8.1f} {(uss - base_uss) / 1024:13.1f}")
+    total_pss = sum(r[2][1] for r in results) / 1024
+    print(f"Total PSS across workers: {total_pss:.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--engine", default="sklearn")
+    parser.add_argument("--n-features", type=int, default=13)
+    args = parser.parse_args()
+
+    main(args.model, args.workers, args.engine, args.n_features)
@@ -0,0 +1,188 @@
+# src/app/batching.py
+"""
+Adaptive micro-batching for concurrent single-row predictions.
+
+Concurrent `/predict` calls submit their feature row to a shared queue. A
+dispatcher thread collects rows for up to `max_delay_ms` (or until
+`max_batch_size` rows are queued), scores them with one vectorized call, and
+hands each caller back its own row of the result. The call can return a
+Future (e.g. work submitted to the inference executor's pool), in which case
+the dispatcher goes straight back to collecting the next batch.
+
+The window is adaptive: when the previous batch held a single row (no
+concurrency) the dispatcher only drains rows that are already queued and does
+not wait, so an idle server adds no latency. Once batches start coalescing it
+waits up to the full window to fill them.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+_STOP = object()
+
+
+class _Pending:
+    __slots__ = ("row", "future", "enqueued_at")
+
+    def __init__(self, row):
+        self.row = row
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class MicroBatcher:
+    """Coalesces single-row predict calls into vectorized batches"""
+
+    def __init__(self, predict_fn, max_batch_size=64, max_delay_ms=2.0):
+        """
+        Args:
+            predict_fn: callable X (n, n_features) -> (probabilities (n, n_classes), labels (n,)),
+                        or a concurrent.futures.Future resolving to that tuple
+            max_batch_size: upper bound on rows scored together
+            max_delay_ms: longest time the first row of a batch waits for company
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.predict_fn = predict_fn
+        self.max_batch_size = int(max_batch_size)
+        self.max_delay = max(float(max_delay_ms), 0.0) / 1000.0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._stopped = False
+        self._last_batch_size = 1
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.n_batches = 0
+        self.n_rows = 0
+        self.max_batch_seen = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        # batch_size_counts[k] = number of batches with size in (2**(k-1), 2**k]
+        self.batch_size_counts = {}
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        # Rows queued before the stop marker are still scored
+        self._stopped = True
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+        self._thread = None
+
+    def submit(self, row):
+        """
+        Queue one feature row for scoring.
+        Args:
+            row: (n_features,) feature vector
+        Returns:
+            concurrent.futures.Future resolving to (probabilities (n_classes,), label)
+        """
+        if self._stopped:
+            raise RuntimeError("Micro-batcher is stopped")
+        pending = _Pending(row)
+        self._queue.put(pending)
+        return pending.future
+
+    def predict(self, row, timeout=None):
+        """Blocking convenience wrapper around submit()"""
+        return self.submit(row).result(timeout)
+
+    def _collect(self, first):
+        batch = [first]
+        # Adaptive window: only wait for company when callers are actually concurrent
+        window = self.max_delay if self._last_batch_size > 1 else 0.0
+        deadline = time.perf_counter() + window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Finish this batch, then let the run loop see the stop marker
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = self._collect(first)
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        started = time.perf_counter()
+        try:
+            result = self.predict_fn(np.vstack([p.row for p in batch]))
+        except Exception as e:
+            self._resolve(batch, error=e)
+        else:
+            if isinstance(result, Future):
+                result.add_done_callback(lambda done: self._resolve_future(batch, done))
+            else:
+                self._resolve(batch, result)
+        self._record(batch, started)
+
+    def _resolve_future(self, batch, done):
+        try:
+            result = done.result()
+        except BaseException as e:
+            self._resolve(batch, error=e)
+        else:
+            self._resolve(batch, result)
+
+    @staticmethod
+    def _resolve(batch, result=None, error=None):
+        if error is not None:
+            for p in batch:
+                p.future.set_exception(error)
+            return
+        probs, labels = result
+        for i, p in enumerate(batch):
+            p.future.set_result((probs[i], labels[i]))
+
+    def _record(self, batch, started):
+        size = len(batch)
+        self._last_batch_size = size
+        self.n_batches += 1
+        self.n_rows += size
+        self.max_batch_seen = max(self.max_batch_seen, size)
+        bucket = (size - 1).bit_length()
+        self.batch_size_counts[bucket] = self.batch_size_counts.get(bucket, 0) + 1
+        for p in batch:
+            wait = started - p.enqueued_at
+            self.queue_wait_total += wait
+            if wait > self.queue_wait_max:
+                self.queue_wait_max = wait
+
+    def stats(self):
+        """Batch-size and queue-wait metrics since startup"""
+        n_batches = self.n_batches
+        n_rows = self.n_rows
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_delay_ms": self.max_delay * 1000.0,
+            "batches": n_batches,
+            "rows": n_rows,
+            "queue_depth": self._queue.qsize(),
+            "mean_batch_size": n_rows / n_batches if n_batches else 0.0,
+            "max_batch_size_seen": self.max_batch_seen,
+            "batch_size_histogram": {
+                f"<={2 ** k}": count for k, count in sorted(self.batch_size_counts.items())
+            },
+            "mean_queue_wait_ms": 1000.0 * self.queue_wait_total / n_rows if n_rows else 0.0,
+            "max_queue_wait_ms": 1000.0 * self.queue_wait_max,
+        }
@@ -0,0 +1,116 @@
+# src/app/cache.py
+"""
+Bounded in-process prediction cache (LRU eviction + TTL).
+
+Entries are keyed on a hash of the ordered, scaled feature vector plus the
+model version, so a reloaded model never serves stale predictions. Batch
+callers look up every row at once, score only the misses, and merge the
+results back in request order.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class PredictionCache:
+    """LRU + TTL cache of Stage 1 outputs per feature vector"""
+
+    def __init__(self, max_entries=10000, ttl_seconds=300.0, model_version=""):
+        """
+        Args:
+            max_entries: capacity; least recently used entries are evicted first
+            ttl_seconds: entry lifetime; 0 or less disables expiry
+            model_version: folded into every key so entries never outlive their model
+        """
+        self.max_entries = int(max_entries)
+        self.ttl = float(ttl_seconds)
+        self.model_version = model_version
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def keys_for(self, X, model_version=None):
+        """
+        Args:
+            X: (n_samples, n_features) scaled feature matrix in model column order
+            model_version: version of the model that will score misses
+                           (defaults to the cache's current version)
+        Returns:
+            list of n_samples hashable keys
+        """
+        # Adding 0.0 folds -0.0 into 0.0 so equal vectors hash equally
+        X = np.ascontiguousarray(X, dtype=np.float64) + 0.0
+        version = (model_version if model_version is not None else self.model_version).encode()
+        return [hashlib.blake2b(row.tobytes() + version, digest_size=16).digest() for row in X]
+
+    def get_many(self, keys):
+        """
+        Args:
+            keys: keys from keys_for()
+        Returns:
+            list with the cached (probabilities, label) per key, or None for a miss
+        """
+        now = time.monotonic()
+        results = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and self.ttl > 0 and now - entry[2] > self.ttl:
+                    del self._entries[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    self.misses += 1
+                    results.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    results.append((entry[0], entry[1]))
+        return results
+
+    def put_many(self, keys, probs, labels):
+        """Store Stage 1 outputs (rows of probs, labels) under their keys"""
+        if self.max_entries <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            for key, row_probs, label in zip(keys, probs, labels):
+                self._entries[key] = (np.array(row_probs, copy=True), label, now)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, model_version=None):
+        """Drop every entry, e.g. when a new model is loaded"""
+        with self._lock:
+            self._entries.clear()
+            if model_version is not None:
+                self.model_version = model_version
+            self.invalidations += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "model_version": self.model_version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
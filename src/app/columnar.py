@@ -0,0 +1,106 @@
+# src/app/columnar.py
+"""
+Columnar binary request/response bodies for bulk inference.
+
+Instead of a JSON list of `PredictionInput` objects, a client may post the
+whole feature matrix as one buffer:
+- NPY_MEDIA_TYPE: a 2-D float `.npy` array (float32 or float64), columns in
+  `numeric_cols` order
+- ARROW_MEDIA_TYPE: an Arrow IPC stream with one float column per feature,
+  matched by name (requires the optional `pyarrow` package)
+
+The buffer is decoded straight into an ndarray without per-row Python objects,
+and the results are returned in the same format: a structured `.npy` array or
+an Arrow IPC stream with `prediction` and `probability` columns.
+"""
+
+import io
+
+import numpy as np
+
+NPY_MEDIA_TYPE = "application/x-npy"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+MEDIA_TYPES = (NPY_MEDIA_TYPE, ARROW_MEDIA_TYPE)
+
+RESULT_DTYPE = np.dtype([("prediction", np.int64), ("probability", np.float64)])
+
+
+class UnsupportedFormat(ValueError):
+    """Raised when a columnar format cannot be used (e.g. pyarrow is missing)"""
+
+
+def negotiate(content_type):
+    """
+    Args:
+        content_type: request Content-Type header (may be None)
+    Returns:
+        one of MEDIA_TYPES, or None for a JSON body
+    """
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return media_type if media_type in MEDIA_TYPES else None
+
+
+def decode_features(body, media_type, numeric_cols):
+    """
+    Args:
+        body: request body bytes
+        media_type: NPY_MEDIA_TYPE or ARROW_MEDIA_TYPE
+        numeric_cols: feature names in model order
+    Returns:
+        Unscaled float64 feature matrix (n_samples, n_features)
+    """
+    if media_type == NPY_MEDIA_TYPE:
+        X = np.load(io.BytesIO(body), allow_pickle=False)
+        if X.ndim != 2 or X.shape[1] != len(numeric_cols):
+            raise ValueError(f"Expected a 2-D array with {len(numeric_cols)} columns, got shape {X.shape}")
+        if X.dtype.kind != "f":
+            raise ValueError(f"Expected a float32 or float64 array, got {X.dtype}")
+        return X.astype(np.float64)
+
+    pa = _pyarrow()
+    table = pa.ipc.open_stream(body).read_all()
+    missing = [col for col in numeric_cols if col not in table.column_names]
+    if missing:
+        raise ValueError(f"Arrow stream is missing columns: {missing}")
+    X = np.empty((table.num_rows, len(numeric_cols)), dtype=np.float64)
+    for j, col in enumerate(numeric_cols):
+        X[:, j] = table.column(col).to_numpy()
+    return X
+
+
+def encode_predictions(probs, labels, media_type):
+    """
+    Args:
+        probs: (n_samples, n_classes) Stage 1 probabilities
+        labels: (n_samples,) Stage 1 labels
+        media_type: NPY_MEDIA_TYPE or ARROW_MEDIA_TYPE
+    Returns:
+        response body bytes with `prediction` and `probability` per row
+    """
+    positive = probs[:, 1] if probs.shape[1] > 1 else probs[:, 0]
+    if media_type == NPY_MEDIA_TYPE:
+        result = np.empty(len(labels), dtype=RESULT_DTYPE)
+        result["prediction"] = labels
+        result["probability"] = positive
+        buffer = io.BytesIO()
+        np.save(buffer, result, allow_pickle=False)
+        return buffer.getvalue()
+
+    pa = _pyarrow()
+    batch = pa.record_batch(
+        [pa.array(np.asarray(labels, dtype=np.int64)), pa.array(np.asarray(positive, dtype=np.float64))],
+        names=["prediction", "probability"],
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401  (registers pyarrow.ipc)
+    except ImportError:
+        raise UnsupportedFormat(f"{ARROW_MEDIA_TYPE} requires the 'pyarrow' package")
+    return pyarrow
@@ -0,0 +1,197 @@
+# src/app/executor.py
+"""
+Dedicated inference executor for the async API handlers.
+
+CPU-bound model work (Random Forest scoring, Hungarian assignment) is sent to
+a sized pool of its own instead of Starlette's shared default threadpool, so
+static files, `/` and `/health` stay responsive under heavy batch traffic.
+
+Two kinds of pool are supported:
+- "thread": workers share the in-process model (cheap, but GIL-bound work
+  from concurrent requests is serialized)
+- "process": each worker loads its own copy of the model at startup and
+  scores in parallel across cores
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from src.models.two_stage_model import TwoStageModel
+
+# How long a warm-up call waits for the pool's other worker processes
+WARMUP_TIMEOUT_SECONDS = 300
+
+# Model held by each worker process (process pool only)
+_worker_model = None
+# Barrier shared by the pool's processes, one party per worker
+_warm_up_barrier = None
+
+
+def _init_worker(model_path, engine, folded_scaler=None, warm_up_barrier=None):
+    global _worker_model, _warm_up_barrier
+    # Compiled artifacts are memory-mapped, so all workers share the tree arrays
+    _worker_model = TwoStageModel.from_artifact(model_path, engine=engine)
+    if folded_scaler is not None:
+        _worker_model.fold_scaler(*folded_scaler)
+    _warm_up_barrier = warm_up_barrier
+
+
+def _worker_warm_up(batch_sizes, n_features):
+    seconds = _worker_model.warm_up(batch_sizes, n_features=n_features)
+    # Hold this process until every worker has warmed up, so no process can
+    # take a second warm-up call while another one stays cold
+    _warm_up_barrier.wait(WARMUP_TIMEOUT_SECONDS)
+    return os.getpid(), seconds
+
+
+def _worker_predict(X):
+    return _worker_model.predict_probabilities_and_labels(X)
+
+
+def _worker_assign(probs, labels, n_tasks, maximize, solver, capacities, time_budget_ms):
+    return _worker_model.assign(probs, labels, n_tasks=n_tasks, maximize=maximize, solver=solver,
+                                capacities=capacities, time_budget_ms=time_budget_ms)
+
+
+def _assign_many(model, problems):
+    """
+    Stage 2 for several independent problems, each a dict of assign()
+    arguments. A problem that fails, for any reason (bad input, a solver
+    error, a failing cost function), yields {"error": message} instead of
+    failing the others.
+    """
+    results = []
+    for problem in problems:
+        try:
+            results.append(model.assign(**problem))
+        except Exception as e:
+            results.append({"error": str(e)})
+    return results
+
+
+def _worker_assign_many(problems):
+    return _assign_many(_worker_model, problems)
+
+
+def balance(costs, n_chunks):
+    """
+    Split item indices into at most n_chunks lists of similar total cost:
+    largest first, each to the currently lightest chunk.
+    """
+    chunks = [[] for _ in range(max(1, min(n_chunks, len(costs))))]
+    loads = [0.0] * len(chunks)
+    for i in sorted(range(len(costs)), key=lambda i: -costs[i]):
+        lightest = loads.index(min(loads))
+        chunks[lightest].append(i)
+        loads[lightest] += costs[i]
+    return [chunk for chunk in chunks if chunk]
+
+
+class InferenceExecutor:
+    """Runs model calls on a dedicated, bounded thread or process pool"""
+
+    def __init__(self, kind="thread", max_workers=None, model_path=None, engine="sklearn",
+                 folded_scaler=None):
+        """
+        Args:
+            kind: "thread" or "process"
+            max_workers: pool size; defaults to the number of CPUs
+            model_path: model artifact each worker process loads (process pool only)
+            engine: Stage 1 inference engine for worker processes
+            folded_scaler: (mean, scale) each worker process folds into its model
+        """
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind '{kind}' (expected 'thread' or 'process')")
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.model_path = model_path
+        self.engine = engine
+        self.folded_scaler = folded_scaler
+        self._pool = self._create_pool()
+
+    def _create_pool(self):
+        if self.kind == "process":
+            if self.model_path is None:
+                raise ValueError("A process pool needs model_path to load the model in each worker")
+            context = multiprocessing.get_context()
+            return ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self.model_path, self.engine, self.folded_scaler, context.Barrier(self.max_workers)),
+            )
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+
+    def warm_up(self, model, batch_sizes, n_features=None):
+        """
+        Warm the pool before it takes traffic (blocking). Each worker process
+        loads and warms its own model; thread workers share `model`, which is
+        warmed once on a pool thread.
+        Returns:
+            Seconds the slowest worker spent warming up
+        """
+        if self.kind == "process":
+            # One call per worker. Each call waits on a barrier until all of
+            # them are running, so they land on max_workers distinct processes
+            # and the pool cannot hand two calls to one warm process
+            calls = [self._pool.submit(_worker_warm_up, batch_sizes, n_features)
+                     for _ in range(self.max_workers)]
+            results = [call.result() for call in calls]
+            warmed = {pid for pid, _ in results}
+            if len(warmed) != self.max_workers:
+                raise RuntimeError(f"Warm-up reached {len(warmed)} of {self.max_workers} worker processes")
+            return max(seconds for _, seconds in results)
+        return self._pool.submit(model.warm_up, batch_sizes, n_features).result()
+
+    async def run(self, fn, *args):
+        """Run fn(*args) on the pool without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, fn, *args)
+
+    async def predict(self, model, X):
+        """Stage 1: (probabilities, labels) for X"""
+        return await asyncio.wrap_future(self.submit_predict(model, X))
+
+    def submit_predict(self, model, X):
+        """
+        Stage 1 on the pool from any thread (the micro-batcher's dispatcher
+        included); returns a concurrent.futures.Future of (probabilities, labels)
+        """
+        if self.kind == "process":
+            return self._pool.submit(_worker_predict, X)
+        return self._pool.submit(model.predict_probabilities_and_labels, X)
+
+    async def assign(self, model, probs, labels, n_tasks, maximize, solver="auto", capacities=None,
+                     time_budget_ms=None):
+        """Stage 2 only, from precomputed Stage 1 outputs"""
+        if self.kind == "process":
+            return await self.run(_worker_assign, probs, labels, n_tasks, maximize, solver, capacities,
+                                  time_budget_ms)
+        return await self.run(
+            lambda: model.assign(probs, labels, n_tasks=n_tasks, maximize=maximize, solver=solver,
+                                 capacities=capacities, time_budget_ms=time_budget_ms)
+        )
+
+    async def assign_many(self, model, problems):
+        """
+        Stage 2 for many independent problems (dicts of assign() arguments)
+        in parallel: one balanced chunk per pool worker, so hundreds of small
+        problems cost a handful of pool round trips. Results keep input order.
+        """
+        # Hungarian work grows roughly with workers * tasks per problem
+        costs = [len(p["probs"]) * (p.get("n_tasks") or len(p["probs"])) for p in problems]
+        chunks = balance(costs, self.max_workers)
+        if self.kind == "process":
+            calls = [self.run(_worker_assign_many, [problems[i] for i in chunk]) for chunk in chunks]
+        else:
+            calls = [self.run(_assign_many, model, [problems[i] for i in chunk]) for chunk in chunks]
+        results = [None] * len(problems)
+        for chunk, chunk_results in zip(chunks, await asyncio.gather(*calls)):
+            for i, result in zip(chunk, chunk_results):
+                results[i] = result
+        return results
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,84 @@
+# src/app/featurizer.py
+"""
+DataFrame-free request featurization.
+
+Turns validated `PredictionInput` objects straight into a float ndarray in
+model column order. Column order is resolved once (at startup) and scaling is
+applied in place on the same buffer, so a request allocates one matrix instead
+of several intermediate DataFrames.
+"""
+
+from operator import attrgetter
+
+import numpy as np
+
+
+class Featurizer:
+    """Writes request samples into a preallocated (n_samples, n_features) matrix"""
+
+    def __init__(self, numeric_cols, scaler_mean=None, scaler_scale=None):
+        """
+        Args:
+            numeric_cols: feature names in the order the model expects
+            scaler_mean: StandardScaler mean_ per column, or None for no scaling
+            scaler_scale: StandardScaler scale_ per column, or None for no scaling
+        """
+        self.numeric_cols = list(numeric_cols)
+        self.n_features = len(self.numeric_cols)
+        # attrgetter with several names returns a tuple in column order
+        if self.n_features == 1:
+            getter = attrgetter(self.numeric_cols[0])
+            self._row = lambda sample: (getter(sample),)
+        else:
+            self._row = attrgetter(*self.numeric_cols)
+
+        self.mean = None
+        self.scale = None
+        if scaler_mean is not None and len(scaler_mean) > 0:
+            mean = np.asarray(scaler_mean, dtype=np.float64)
+            scale = np.asarray(scaler_scale, dtype=np.float64)
+            if mean.shape != (self.n_features,) or scale.shape != (self.n_features,):
+                raise ValueError(
+                    f"Scaler has {mean.shape[0]} means / {scale.shape[0]} scales "
+                    f"but there are {self.n_features} numeric columns"
+                )
+            self.mean = mean
+            self.scale = scale
+
+    def transform(self, samples, out=None):
+        """
+        Args:
+            samples: sequence of PredictionInput (or any objects with the feature attributes)
+            out: optional preallocated float64 array of shape (n_samples, n_features)
+        Returns:
+            Scaled feature matrix (n_samples, n_features)
+        """
+        n_samples = len(samples)
+        if out is None:
+            out = np.empty((n_samples, self.n_features), dtype=np.float64)
+        elif out.shape != (n_samples, self.n_features):
+            raise ValueError(f"out has shape {out.shape}, expected {(n_samples, self.n_features)}")
+
+        row = self._row
+        for i, sample in enumerate(samples):
+            out[i] = row(sample)
+        return self.scale_in_place(out)
+
+    def scale_in_place(self, X):
+        """
+        Args:
+            X: float64 (n_samples, n_features) matrix of raw features in column order
+        Returns:
+            X, scaled in place
+        """
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} feature columns, got shape {X.shape}")
+        # Same operation order as StandardScaler.transform
+        if self.mean is not None:
+            X -= self.mean
+            X /= self.scale
+        return X
+
+    def transform_one(self, sample):
+        """Featurize a single sample into a (1, n_features) matrix"""
+        return self.transform((sample,))
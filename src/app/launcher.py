@@ -0,0 +1,313 @@
+# src/app/launcher.py
+"""
+Multi-process serving launcher: one preloaded model, N forked uvicorn workers.
+
+The master process loads, validates and warms up the model once, freezes the
+garbage collector's view of it, binds the listening socket and forks the
+workers. Each worker inherits the model copy-on-write (the tree arrays are
+never written, so their pages stay shared), pins itself to its own CPUs, and
+serves the inherited socket with uvicorn; the kernel spreads connections
+across the workers.
+
+BLAS/OpenMP thread pools are capped before numpy is imported, so N workers
+use N * threads_per_worker threads instead of N * n_cpus.
+
+Signals to the master:
+- SIGHUP: reload the model in the master, then replace the workers one at a
+  time, each new worker serving before its predecessor is drained. A worker's
+  POST /admin/reload sends SIGHUP to the master, and with
+  MODEL_WATCH_INTERVAL_SECONDS set the master watches the model files itself,
+  so every worker always serves the same model version
+- SIGTERM / SIGINT: drain every worker (uvicorn finishes in-flight requests),
+  escalating to SIGKILL after the graceful timeout
+Workers that die unexpectedly are restarted on the same CPUs.
+
+If the model fails to load, the master still binds the socket and starts the
+workers without a model, so /live answers and /ready reports 503 with the
+error. It retries the load with exponential backoff, and restarts the workers
+once the load succeeds.
+
+    python -m src.app.launcher --host 0.0.0.0 --port 8000 --workers 4
+"""
+
+import argparse
+import os
+import select
+import signal
+import socket
+import sys
+import time
+
+# Read before numpy (or anything importing it) is loaded below
+THREADS_PER_WORKER = int(os.environ.get("SERVE_THREADS_PER_WORKER", "1"))
+for _variable in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+                  "BLIS_NUM_THREADS", "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS"):
+    os.environ.setdefault(_variable, str(THREADS_PER_WORKER))
+# Each worker is a single pinned process: a process pool inside it would fork
+# again, and a thread pool wider than its CPUs only adds contention
+os.environ.setdefault("INFERENCE_EXECUTOR", "thread")
+os.environ.setdefault("INFERENCE_WORKERS", str(THREADS_PER_WORKER))
+
+import gc  # noqa: E402
+import threading  # noqa: E402
+
+import uvicorn  # noqa: E402
+
+from src.app import main  # noqa: E402
+from src.app.serving import file_signature  # noqa: E402
+
+SERVE_WORKERS = int(os.environ.get("SERVE_WORKERS", "0")) or None
+SERVE_PIN_CPUS = os.environ.get("SERVE_PIN_CPUS", "1").lower() in ("1", "true", "yes")
+SERVE_GRACEFUL_TIMEOUT_SECONDS = float(os.environ.get("SERVE_GRACEFUL_TIMEOUT_SECONDS", "30"))
+# A worker that exits sooner than this after starting is restarted after a pause
+CRASH_BACKOFF_SECONDS = 1.0
+# Failed model loads in the master are retried after 1, 2, 4, ... seconds, up to this
+LOAD_RETRY_MAX_SECONDS = 60.0
+
+
+def available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def cpu_sets(n_workers, threads_per_worker, cpus):
+    """CPUs for each worker: consecutive blocks of threads_per_worker, wrapping around"""
+    width = max(1, min(threads_per_worker, len(cpus)))
+    return [{cpus[(i * width + k) % len(cpus)] for k in range(width)} for i in range(n_workers)]
+
+
+def preload():
+    """Load, validate and warm up the model in the master, without workers attached"""
+    state = main.load_serving_state(main.MODEL_PATH, main.CONFIG_PATH, main.INFERENCE_ENGINE,
+                                    main.PredictionInput.model_fields, fold_scaler=main.FOLD_SCALER)
+    if main.WARMUP_BATCH_SIZES:
+        state.warmup_seconds = state.model.warm_up(main.WARMUP_BATCH_SIZES, state.featurizer.n_features)
+    # Objects alive now are never scanned by the collector again, so a
+    # worker's collections do not touch (and copy) the model's pages
+    gc.collect()
+    gc.freeze()
+    return state
+
+
+class Launcher:
+    """Forks, watches and restarts the uvicorn workers"""
+
+    def __init__(self, host, port, n_workers, threads_per_worker, pin_cpus, graceful_timeout):
+        self.host = host
+        self.port = port
+        self.n_workers = n_workers
+        self.cpu_sets = cpu_sets(n_workers, threads_per_worker, available_cpus()) if pin_cpus else None
+        self.graceful_timeout = graceful_timeout
+        self.workers = {}  # pid -> (slot, started_at)
+        self.state = None
+        self.load_error = None
+        self.socket = None
+        self._reload_requested = False
+        self._stop_requested = False
+        self._retry_delay = 1.0
+        self._next_retry = None
+        self._next_watch = 0.0
+        self._watched = None
+        self._failed_signatures = None
+
+    def run(self):
+        self._load()
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind((self.host, self.port))
+        self.socket.listen(2048)
+        self.socket.set_inheritable(True)
+
+        signal.signal(signal.SIGHUP, lambda *_: setattr(self, "_reload_requested", True))
+        signal.signal(signal.SIGTERM, lambda *_: setattr(self, "_stop_requested", True))
+        signal.signal(signal.SIGINT, lambda *_: setattr(self, "_stop_requested", True))
+
+        for slot in range(self.n_workers):
+            self._spawn(slot)
+        version = self.state.model_version if self.state is not None else "none, /ready reports 503"
+        print(f"✓ Serving on http://{self.host}:{self.port} with {self.n_workers} workers "
+              f"(model version {version})")
+
+        while not self._stop_requested:
+            if self._reload_requested:
+                self._reload_requested = False
+                self._rolling_restart()
+            elif self.state is None and time.monotonic() >= self._next_retry:
+                self._rolling_restart()
+            elif self._files_changed():
+                print("↻ Model files changed")
+                if not self._rolling_restart():
+                    # Retry once the files change again, like ModelWatcher
+                    self._failed_signatures = self._watched
+            self._reap(restart=True)
+            time.sleep(0.2)
+        self._shutdown()
+
+    def _load(self):
+        """Preload a model; on failure keep the previous state and schedule a retry"""
+        gc.unfreeze()
+        try:
+            self.state = preload()
+        except Exception as e:
+            gc.freeze()
+            self.load_error = str(e)
+            if self.state is None:
+                self._next_retry = time.monotonic() + self._retry_delay
+                print(f"✗ Model load failed, retrying in {self._retry_delay:.0f}s: {e}")
+                self._retry_delay = min(self._retry_delay * 2, LOAD_RETRY_MAX_SECONDS)
+            return False
+        self.load_error = None
+        self._retry_delay = 1.0
+        return True
+
+    def _files_changed(self):
+        """
+        ModelWatcher's rule, polled from the master loop: the files differ from
+        the serving model's and have not changed for one interval
+        """
+        interval = main.MODEL_WATCH_INTERVAL_SECONDS
+        if interval <= 0 or self.state is None or time.monotonic() < self._next_watch:
+            return False
+        self._next_watch = time.monotonic() + interval
+        current = (file_signature(main.MODEL_PATH), file_signature(main.CONFIG_PATH))
+        previous, self._watched = self._watched, current
+        return (current != self.state.signatures and current == previous
+                and current != self._failed_signatures and current[0] is not None)
+
+    def _spawn(self, slot):
+        """Fork a worker for slot; returns its pid once it is serving (or has exited)"""
+        ready_read, ready_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_read)
+            code = 1
+            try:
+                self._serve(slot, ready_write)
+                code = 0
+            finally:
+                os._exit(code)
+        os.close(ready_write)
+        self.workers[pid] = (slot, time.monotonic())
+        # The worker writes one byte once uvicorn is accepting connections
+        select.select([ready_read], [], [], self.graceful_timeout)
+        os.close(ready_read)
+        return pid
+
+    def _serve(self, slot, ready_write):
+        """Worker process body"""
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, signal.SIG_DFL)
+        if self.cpu_sets is not None and hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, self.cpu_sets[slot])
+
+        main.model_managed_externally = True
+        if self.state is not None:
+            # Executor threads and the micro-batcher cannot cross a fork, so each
+            # worker attaches its own to the inherited state
+            main.attach_workers(self.state)
+            main.serving = self.state
+        else:
+            main.startup_error = self.load_error
+
+        server = uvicorn.Server(uvicorn.Config(main.app, log_level="warning"))
+
+        def notify_ready():
+            while not server.started and not server.should_exit:
+                time.sleep(0.01)
+            os.write(ready_write, b"1")
+            os.close(ready_write)
+
+        threading.Thread(target=notify_ready, daemon=True).start()
+        cpus = sorted(self.cpu_sets[slot]) if self.cpu_sets is not None else "any"
+        print(f"✓ Worker {slot} (pid {os.getpid()}) on CPUs {cpus}")
+        server.run(sockets=[self.socket])
+
+    def _reap(self, restart):
+        """Collect exited workers; restart them unless shutting down"""
+        while self.workers:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                return
+            if pid not in self.workers:
+                continue
+            slot, started_at = self.workers.pop(pid)
+            if not restart:
+                continue
+            print(f"⚠ Worker {slot} (pid {pid}) exited with status {status}; restarting")
+            if time.monotonic() - started_at < CRASH_BACKOFF_SECONDS:
+                time.sleep(CRASH_BACKOFF_SECONDS)
+            self._spawn(slot)
+
+    def _rolling_restart(self):
+        print("↻ Reloading model and restarting workers" if self.state is not None
+              else "↻ Retrying model load")
+        if not self._load():
+            if self.state is not None:
+                print(f"✗ Reload failed, workers keep the previous model: {self.load_error}")
+            return False
+        for pid, (slot, _) in list(self.workers.items()):
+            # Bring up the replacement before draining the old worker
+            self._spawn(slot)
+            self._stop(pid)
+        print(f"✓ Workers restarted on model version {self.state.model_version}")
+        return True
+
+    def _stop(self, pid):
+        """SIGTERM one worker and wait for it to drain; SIGKILL after the timeout"""
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        deadline = time.monotonic() + self.graceful_timeout
+        while time.monotonic() < deadline:
+            done, _ = os.waitpid(pid, os.WNOHANG)
+            if done:
+                break
+            time.sleep(0.05)
+        else:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.workers.pop(pid, None)
+
+    def _shutdown(self):
+        print(f"↻ Stopping {len(self.workers)} workers")
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.workers and time.monotonic() < deadline:
+            self._reap(restart=False)
+            time.sleep(0.05)
+        for pid in list(self.workers):
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.workers.clear()
+        self.socket.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Preloaded multi-process API server")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS,
+                        help="worker processes (default: one per available CPU)")
+    parser.add_argument("--no-pin", action="store_true", help="do not pin workers to CPUs")
+    parser.add_argument("--graceful-timeout", type=float, default=SERVE_GRACEFUL_TIMEOUT_SECONDS)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    if not hasattr(os, "fork"):
+        sys.exit("✗ The launcher needs os.fork; use uvicorn src.app.main:app on this platform")
+    args = parse_args()
+    Launcher(
+        host=args.host,
+        port=args.port,
+        n_workers=args.workers or len(available_cpus()),
+        threads_per_worker=THREADS_PER_WORKER,
+        pin_cpus=SERVE_PIN_CPUS and not args.no_pin,
+        graceful_timeout=args.graceful_timeout,
+    ).run()
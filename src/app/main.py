@@ -1,44 +1,31 @@
 # src/app/main.py
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from starlette.responses import FileResponse
-from pydantic import BaseModel
+from starlette.requests import ClientDisconnect
+from starlette.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, ValidationError
 from typing import List, Optional
-import joblib
-import pandas as pd
 import numpy as np
 import os
 import json
-import sys
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-
-# Import two-stage model
-# Add candidate paths so import works when app is placed at different locations
-candidate_model_paths = [
-    os.path.join(os.path.dirname(__file__), '..', 'models'),  # src/app/../models
-    os.path.join(os.path.dirname(__file__), 'models'),       # src/app/models
-    os.path.join(os.getcwd(), 'src', 'models'),              # project-root/src/models
-    os.path.join(os.getcwd(), 'models'),                     # project-root/models
-    os.path.join(os.sep, 'app', 'models'),                  # /app/models (container common)
-]
-
-for p in candidate_model_paths:
-    try:
-        if p and os.path.exists(p) and p not in sys.path:
-            sys.path.insert(0, p)
-    except Exception:
-        # ignore any invalid path errors
-        pass
-
-try:
-    from two_stage_model import TwoStageModel
-except Exception:
-    # Fallback to package import if available
-    try:
-        from src.models.two_stage_model import TwoStageModel
-    except Exception:
-        raise
+import signal
+import asyncio
+import threading
+import warnings
+
+from src.models.assignment_session import AssignmentSession
+from src.app.batching import MicroBatcher
+from src.app.executor import InferenceExecutor
+from src.app.cache import PredictionCache
+from src.app.serving import ModelWatcher, ReloadInProgress, load_serving_state
+from src.app.sessions import SessionStore
+from src.app import columnar, metrics
+
+# Requests are featurized into plain ndarrays whose column order is resolved
+# once at startup, so sklearn's per-call feature-name check has nothing to add.
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
 
 app = FastAPI(title="Two-Stage Health Model API")
 
@@ -65,13 +52,64 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Per-endpoint and per-stage latency histograms, served at /metrics
+app.add_middleware(metrics.MetricsMiddleware)
 
 MODEL_PATH = os.environ.get("MODEL_PATH", "src/models/model.pkl")
 CONFIG_PATH = os.environ.get("CONFIG_PATH", "data/processed/preprocess_config.json")
+# Stage 1 inference engine: "sklearn" (default) or "compiled" (array-backed forest)
+INFERENCE_ENGINE = os.environ.get("INFERENCE_ENGINE", "sklearn").lower()
+# Fold the preprocessing scaler into the tree thresholds at load (compiles the
+# forest), so requests are scored on raw features with no scaling step
+FOLD_SCALER = os.environ.get("FOLD_SCALER", "0").lower() in ("1", "true", "yes")
+# Coalesce concurrent single-row /predict calls into vectorized batches
+MICROBATCH_ENABLED = os.environ.get("MICROBATCH_ENABLED", "0").lower() in ("1", "true", "yes")
+MICROBATCH_MAX_BATCH_SIZE = int(os.environ.get("MICROBATCH_MAX_BATCH_SIZE", "64"))
+MICROBATCH_MAX_DELAY_MS = float(os.environ.get("MICROBATCH_MAX_DELAY_MS", "2"))
+# Dedicated pool for model work: "thread" or "process", sized by INFERENCE_WORKERS
+INFERENCE_EXECUTOR = os.environ.get("INFERENCE_EXECUTOR", "thread").lower()
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", "0")) or None
+# LRU + TTL cache of Stage 1 outputs; size 0 disables it
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL_SECONDS = float(os.environ.get("PREDICTION_CACHE_TTL_SECONDS", "300"))
+# Larger requests skip the cache: row hashing and merging run on the event loop,
+# and bulk rows rarely repeat
+PREDICTION_CACHE_MAX_ROWS = int(os.environ.get("PREDICTION_CACHE_MAX_ROWS", "64"))
+# Hot reload: poll MODEL_PATH/CONFIG_PATH every N seconds (0 disables); POST /admin/reload
+MODEL_WATCH_INTERVAL_SECONDS = float(os.environ.get("MODEL_WATCH_INTERVAL_SECONDS", "0"))
+# Old model resources are released this long after a swap, once in-flight requests are done
+RELOAD_GRACE_SECONDS = float(os.environ.get("RELOAD_GRACE_SECONDS", "30"))
+# Rows scored per chunk by /batch_predict/stream; bounds server memory per stream
+STREAM_CHUNK_SIZE = int(os.environ.get("STREAM_CHUNK_SIZE", "512"))
+STREAM_MAX_LINE_BYTES = int(os.environ.get("STREAM_MAX_LINE_BYTES", "65536"))
+# Incremental assignment sessions kept in memory
+ASSIGNMENT_SESSION_MAX = int(os.environ.get("ASSIGNMENT_SESSION_MAX", "100"))
+ASSIGNMENT_SESSION_TTL_SECONDS = float(os.environ.get("ASSIGNMENT_SESSION_TTL_SECONDS", "3600"))
+# Synthetic batch sizes run through both stages before a model takes traffic ("" disables)
+WARMUP_BATCH_SIZES = tuple(
+    int(size) for size in os.environ.get("WARMUP_BATCH_SIZES", "1,8,64,256").split(",") if size.strip()
+)
+# Load and warm the model after the server starts listening, so /live answers
+# while /ready reports 503; 0 loads it before the server accepts connections
+LOAD_MODEL_IN_BACKGROUND = os.environ.get("LOAD_MODEL_IN_BACKGROUND", "1").lower() in ("1", "true", "yes")
+# If set, /admin endpoints require a matching X-Admin-Token header
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
 
-model = None
-preprocess_config = None
-scaler = None
+# Active ServingState (model, config, featurizer, executor, batcher). Requests
+# read it once and use that snapshot throughout, so a reload swaps it atomically.
+serving = None
+# Thread pool shared across model versions (a process pool is per model version).
+# It also runs in-process model work, such as session repairs, in process mode
+shared_executor = None
+prediction_cache = None
+assignment_sessions = None
+model_watcher = None
+# Why the startup load failed, reported by /ready (None while loading or once serving)
+startup_error = None
+# Set by src/app/launcher.py in its workers: the master process owns model
+# loading, so the startup hook must not load a private copy
+model_managed_externally = False
+reload_lock = threading.Lock()
 
 # Input schema for prediction
 class PredictionInput(BaseModel):
@@ -94,111 +132,296 @@ class BatchPredictionInput(BaseModel):
     samples: List[PredictionInput]
     n_tasks: Optional[int] = None
     maximize_assignment: Optional[bool] = True
+    # Stage 2 backend: auto, sort, hungarian, auction, sparse or min_cost_flow
+    # (auto picks by structure and size)
+    solver: Optional[str] = None
+    # Workers each task can take (defaults n_tasks to its length); None means one each
+    capacities: Optional[List[int]] = None
+    # Stage 2 time budget; over it, the best assignment found in time is returned
+    time_budget_ms: Optional[float] = None
+
+class AssignmentGroup(BaseModel):
+    group_id: str
+    samples: List[PredictionInput]
+    n_tasks: Optional[int] = None
+    maximize_assignment: Optional[bool] = True
+    solver: Optional[str] = None
+    capacities: Optional[List[int]] = None
+    time_budget_ms: Optional[float] = None
+
+class GroupedPredictionInput(BaseModel):
+    groups: List[AssignmentGroup]
+
+class AssignmentSessionInput(BaseModel):
+    samples: List[PredictionInput] = []
+    # Tasks are fixed for the session's lifetime (default: number of samples)
+    n_tasks: Optional[int] = None
+    maximize_assignment: Optional[bool] = True
+
+class WorkerRescore(BaseModel):
+    worker_id: int
+    sample: PredictionInput
+
+class AssignmentSessionChanges(BaseModel):
+    add: List[PredictionInput] = []
+    remove: List[int] = []
+    update: List[WorkerRescore] = []
+
+def attach_workers(state):
+    """Give a freshly loaded state its executor and micro-batcher"""
+    global shared_executor
+    if INFERENCE_EXECUTOR not in ("thread", "process"):
+        raise ValueError(f"Unknown INFERENCE_EXECUTOR '{INFERENCE_EXECUTOR}' (expected 'thread' or 'process')")
+    if shared_executor is None:
+        shared_executor = InferenceExecutor(kind="thread", max_workers=INFERENCE_WORKERS)
+    if INFERENCE_EXECUTOR == "process":
+        # Worker processes load the model themselves, so each version gets its own pool
+        state.executor = InferenceExecutor(
+            kind="process",
+            max_workers=INFERENCE_WORKERS,
+            model_path=state.model_path,
+            engine=INFERENCE_ENGINE,
+            folded_scaler=state.folded_scaler,
+        )
+    else:
+        state.executor = shared_executor
+    print(f"✓ Inference executor: {state.executor.kind} pool with {state.executor.max_workers} workers")
+    
+    if MICROBATCH_ENABLED:
+        # Batches are scored on the inference executor, like every other model call
+        state.batcher = MicroBatcher(
+            lambda X: state.executor.submit_predict(state.model, X),
+            max_batch_size=MICROBATCH_MAX_BATCH_SIZE,
+            max_delay_ms=MICROBATCH_MAX_DELAY_MS,
+        ).start()
+        print(f"✓ Micro-batching enabled (max {MICROBATCH_MAX_BATCH_SIZE} rows / {MICROBATCH_MAX_DELAY_MS} ms)")
+
+def retire_workers(state, delay=0.0):
+    """Release an old state's batcher and process pool once its requests have drained"""
+    def release():
+        if state.batcher is not None:
+            state.batcher.stop()
+        if state.executor is not None and state.executor is not shared_executor:
+            state.executor.shutdown(wait=False)
+    if delay > 0:
+        timer = threading.Timer(delay, release)
+        timer.daemon = True
+        timer.start()
+    else:
+        release()
+
+def reload_model(reason="admin"):
+    """
+    Load, warm and validate a new model in the background, then swap it in.
+    Raises if the new model cannot be loaded; the old one keeps serving.
+    """
+    global serving
+    if not reload_lock.acquire(blocking=False):
+        raise ReloadInProgress("A model reload is already in progress")
+    try:
+        print(f"↻ Reloading model ({reason})")
+        state = load_serving_state(MODEL_PATH, CONFIG_PATH, INFERENCE_ENGINE, PredictionInput.model_fields,
+                                   fold_scaler=FOLD_SCALER)
+        attach_workers(state)
+        if WARMUP_BATCH_SIZES:
+            try:
+                # Through the executor, so process workers warm their own copies
+                state.warmup_seconds = state.executor.warm_up(
+                    state.model, WARMUP_BATCH_SIZES, state.featurizer.n_features
+                )
+            except Exception:
+                retire_workers(state)
+                raise
+            print(f"✓ Warmed up on batches of {', '.join(map(str, WARMUP_BATCH_SIZES))} rows "
+                  f"in {state.warmup_seconds:.2f}s")
+        
+        previous = serving
+        serving = state  # atomic swap: new requests pick up the new model from here on
+        if prediction_cache is not None:
+            # A (re)loaded model invalidates everything cached for the previous one
+            prediction_cache.invalidate(state.model_version)
+        if previous is not None:
+            retire_workers(previous, delay=RELOAD_GRACE_SECONDS)
+        print(f"✓ Serving model version {state.model_version}")
+        return state
+    finally:
+        reload_lock.release()
 
 @app.on_event("startup")
 def load_model_and_config():
-    global model, preprocess_config, scaler
+    global prediction_cache, assignment_sessions, model_watcher
+    if PREDICTION_CACHE_SIZE > 0 and prediction_cache is None:
+        prediction_cache = PredictionCache(
+            max_entries=PREDICTION_CACHE_SIZE,
+            ttl_seconds=PREDICTION_CACHE_TTL_SECONDS,
+        )
+    if assignment_sessions is None:
+        assignment_sessions = SessionStore(
+            max_sessions=ASSIGNMENT_SESSION_MAX,
+            ttl_seconds=ASSIGNMENT_SESSION_TTL_SECONDS,
+        )
+    if serving is not None:
+        # Preloaded by src/app/launcher.py before this worker was forked
+        print(f"✓ Serving preloaded model version {serving.model_version}")
+    elif model_managed_externally:
+        print("⚠ No model yet; the launcher will restart this worker once one loads")
+    elif LOAD_MODEL_IN_BACKGROUND:
+        threading.Thread(target=load_startup_model, name="model-startup", daemon=True).start()
+    else:
+        load_startup_model()
+    
+    # Under the launcher the master watches the files and restarts every
+    # worker on the new model; a watcher here would reload this worker alone
+    if MODEL_WATCH_INTERVAL_SECONDS > 0 and model_watcher is None and not model_managed_externally:
+        model_watcher = ModelWatcher(
+            MODEL_PATH, CONFIG_PATH, lambda: serving, reload_model, MODEL_WATCH_INTERVAL_SECONDS
+        ).start()
+        print(f"✓ Watching {MODEL_PATH} and {CONFIG_PATH} every {MODEL_WATCH_INTERVAL_SECONDS}s")
+
+def load_startup_model():
+    global startup_error
     try:
-        # Load two-stage model
-        model_data = joblib.load(MODEL_PATH)
-        model = TwoStageModel(rf_model=model_data['rf_model'])
-        print(f"✓ Two-Stage Model loaded from {MODEL_PATH}")
-        
-        # Load preprocessing config
-        if os.path.exists(CONFIG_PATH):
-            with open(CONFIG_PATH, 'r') as f:
-                preprocess_config = json.load(f)
-            print(f"✓ Preprocessing config loaded from {CONFIG_PATH}")
-            
-            # Recreate scaler from config
-            scaler = StandardScaler()
-            scaler.mean_ = np.array(preprocess_config.get('scaler_mean', []))
-            scaler.scale_ = np.array(preprocess_config.get('scaler_scale', []))
-        else:
-            print(f"⚠ Preprocessing config not found at {CONFIG_PATH}")
-            
+        reload_model("startup")
+        startup_error = None
     except Exception as e:
+        startup_error = str(e)
         print(f"✗ Error loading model or config: {e}")
-        model = None
-        preprocess_config = None
+
+async def score_stage_1(state, X, use_cache=True):
+    """
+    Stage 1 (probabilities, labels) for X from the given serving state. Rows
+    found in the prediction cache are not rescored; misses are scored in one
+    call and merged back in order. The cache work runs on the event loop, so
+    only requests of up to PREDICTION_CACHE_MAX_ROWS rows use it; bulk callers
+    pass use_cache=False to skip it regardless.
+    """
+    cache = prediction_cache if use_cache and len(X) <= PREDICTION_CACHE_MAX_ROWS else None
+    if cache is not None:
+        with metrics.stage("cache_lookup"):
+            keys = cache.keys_for(X, state.model_version)
+            cached = cache.get_many(keys)
+    else:
+        keys, cached = None, [None] * len(X)
+    misses = [i for i, entry in enumerate(cached) if entry is None]
+    
+    if misses:
+        X_miss = X if len(misses) == len(X) else X[misses]
+        with metrics.stage("stage_1_predict"):
+            if state.batcher is not None and len(X_miss) == 1:
+                # Coalesced with concurrent single-row callers
+                row_probs, label = await asyncio.wrap_future(state.batcher.submit(X_miss[0]))
+                miss_probs, miss_labels = row_probs[np.newaxis, :], np.asarray([label])
+            else:
+                miss_probs, miss_labels = await state.executor.predict(state.model, X_miss)
+        if keys is not None:
+            cache.put_many([keys[i] for i in misses], miss_probs, miss_labels)
+        if len(misses) == len(X):
+            return miss_probs, miss_labels
+        for j, i in enumerate(misses):
+            cached[i] = (miss_probs[j], miss_labels[j])
+    
+    probs = np.vstack([entry[0] for entry in cached])
+    labels = np.asarray([entry[1] for entry in cached])
+    return probs, labels
+
+@app.on_event("shutdown")
+def stop_inference_workers():
+    global serving, shared_executor, model_watcher
+    if model_watcher is not None:
+        model_watcher.stop()
+        model_watcher = None
+    if serving is not None:
+        retire_workers(serving)
+        serving = None
+    if shared_executor is not None:
+        shared_executor.shutdown()
+        shared_executor = None
+
+@app.get("/live")
+async def liveness():
+    """Liveness: the process is up and serving HTTP, model or not"""
+    return {"status": "alive"}
+
+@app.get("/ready")
+async def readiness():
+    """Readiness: a loaded, validated and warmed-up model is serving (503 until then)"""
+    state = serving
+    if state is None:
+        status = "failed" if startup_error is not None else "starting"
+        return JSONResponse(status_code=503, content={"status": status, "detail": startup_error})
+    return {"status": "ready", **state.describe()}
 
 @app.get("/health")
-def health_check():
+async def health_check():
     """Health check endpoint"""
+    state = serving
     return {
         "status": "healthy",
-        "model_loaded": model is not None,
+        "model_loaded": state is not None,
         "model_type": "Two-Stage (RF + Hungarian)",
-        "config_loaded": preprocess_config is not None
+        "config_loaded": state is not None and state.preprocess_config is not None,
+        **(state.describe() if state is not None else {}),
     }
 
 @app.post("/predict")
-def predict(data: PredictionInput):
+@metrics.timed("/predict")
+async def predict(data: PredictionInput):
     """Stage 1: Random Forest Prediction - predict risk/likelihood"""
-    if model is None:
+    state = serving
+    if state is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
     
     try:
-        # Convert input to DataFrame
-        feature_dict = data.dict()
-        df = pd.DataFrame([feature_dict])
-        
-        # Get numeric columns in correct order
-        numeric_cols = preprocess_config.get('numeric_cols', df.columns.tolist()) if preprocess_config else df.columns.tolist()
-        df = df[numeric_cols]
+        # Ordered, scaled feature matrix (1, n_features)
+        with metrics.stage("featurize"):
+            X = state.featurizer.transform_one(data)
         
-        # Apply scaling if config available
-        if scaler is not None and preprocess_config:
-            df_scaled = df.copy()
-            df_scaled[numeric_cols] = scaler.transform(df[numeric_cols])
-            df = df_scaled
-        
-        # Stage 1 prediction
-        probs = model.predict_probabilities(df)
-        prediction = int(model.predict_labels(df)[0])
-        probability = float(probs[0, 1]) if probs.shape[1] > 1 else float(probs[0, 0])
+        # Stage 1 prediction (cached, and coalesced with concurrent callers when batching is on)
+        probs, labels = await score_stage_1(state, X)
+        row_probs, label = probs[0], labels[0]
+        prediction = int(label)
+        probability = float(row_probs[1]) if len(row_probs) > 1 else float(row_probs[0])
         
         return {
             "stage": "Stage 1: Random Forest Prediction",
             "prediction": prediction,
             "probability": probability,
-            "confidence": float(max(probs[0])),
+            "confidence": float(max(row_probs)),
             "model_type": "RandomForestClassifier"
         }
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Prediction error: {str(e)}")
 
 @app.post("/predict_and_assign")
-def predict_and_assign(data: BatchPredictionInput):
+@metrics.timed("/predict_and_assign")
+async def predict_and_assign(data: BatchPredictionInput):
     """
     Two-Stage Pipeline:
     Stage 1: Random Forest - predict likelihood scores for each sample
     Stage 2: Hungarian Algorithm - optimal assignment of samples to tasks
     """
-    if model is None:
+    state = serving
+    if state is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
     
     try:
-        # Convert batch inputs to DataFrame
-        records = [s.dict() for s in data.samples]
-        df = pd.DataFrame(records)
-        
-        # Get numeric columns in correct order
-        numeric_cols = preprocess_config.get('numeric_cols', df.columns.tolist()) if preprocess_config else df.columns.tolist()
-        df = df[numeric_cols]
+        # Ordered, scaled feature matrix (n_samples, n_features)
+        with metrics.stage("featurize"):
+            X = state.featurizer.transform(data.samples)
         
-        # Apply scaling if config available
-        if scaler is not None and preprocess_config:
-            df_scaled = df.copy()
-            df_scaled[numeric_cols] = scaler.transform(df[numeric_cols])
-            df = df_scaled
-        
-        # Two-stage prediction and assignment
-        result = model.predict_and_assign(
-            df, 
-            n_tasks=data.n_tasks or len(df),
-            maximize=data.maximize_assignment if data.maximize_assignment is not None else True
+        # Stage 1 (cached), then Stage 2 assignment
+        probs, labels = await score_stage_1(state, X)
+        result = await state.executor.assign(
+            state.model,
+            probs,
+            labels,
+            n_tasks=data.n_tasks or (len(data.capacities) if data.capacities else len(X)),
+            maximize=data.maximize_assignment if data.maximize_assignment is not None else True,
+            solver=data.solver or "auto",
+            capacities=data.capacities,
+            time_budget_ms=data.time_budget_ms
         )
+        metrics.record_stages(result.get("timings"))
         
         return {
             "stage": "Two-Stage Pipeline",
@@ -207,31 +430,222 @@ def predict_and_assign(data: BatchPredictionInput):
             "n_samples_processed": result['n_samples'],
             "stage_2_optimal_assignments": result['optimal_assignments'],
             "stage_2_total_score": result['total_assignment_score'],
+            "stage_2_solver": result['assignment']['solver'],
+            "stage_2_optimality_gap": result['assignment']['optimality_gap'],
+            "stage_2_optimal": result['assignment']['optimal'],
             "assignment_explanation": "Each tuple (worker_idx, task_idx) represents optimal assignment"
         }
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Prediction and assignment error: {str(e)}")
 
-@app.post("/batch_predict")
-def batch_predict(data: BatchPredictionInput):
-    """Batch predictions using Random Forest only"""
-    if model is None:
+@app.post("/predict_and_assign/groups")
+@metrics.timed("/predict_and_assign/groups")
+async def predict_and_assign_groups(data: GroupedPredictionInput):
+    """
+    Two-stage pipeline for many independent groups (e.g. one per clinic or
+    shift) in one request: Stage 1 scores the union of all samples in one
+    vectorized call, then each group's Stage 2 problem is solved in parallel
+    across the inference pool. Results are keyed by group_id.
+    """
+    state = serving
+    if state is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
+    group_ids = [group.group_id for group in data.groups]
+    if len(set(group_ids)) != len(group_ids):
+        raise HTTPException(status_code=400, detail="group_id values must be unique")
     
     try:
-        records = [s.dict() for s in data.samples]
-        df = pd.DataFrame(records)
+        # One feature matrix and one Stage 1 call for every group
+        with metrics.stage("featurize"):
+            X = state.featurizer.transform([sample for group in data.groups for sample in group.samples])
+        probs, labels = await score_stage_1(state, X) if len(X) else (np.zeros((0, 2)), np.zeros(0))
         
-        numeric_cols = preprocess_config.get('numeric_cols', df.columns.tolist()) if preprocess_config else df.columns.tolist()
-        df = df[numeric_cols]
+        problems, solved_groups, results = [], [], {}
+        offset = 0
+        for group in data.groups:
+            rows = slice(offset, offset + len(group.samples))
+            offset = rows.stop
+            if not group.samples:
+                results[group.group_id] = {"error": "Group has no samples"}
+                continue
+            problems.append({
+                "probs": probs[rows],
+                "labels": labels[rows],
+                "n_tasks": group.n_tasks or (len(group.capacities) if group.capacities else len(group.samples)),
+                "maximize": group.maximize_assignment if group.maximize_assignment is not None else True,
+                "solver": group.solver or "auto",
+                "capacities": group.capacities,
+                "time_budget_ms": group.time_budget_ms,
+            })
+            solved_groups.append(group.group_id)
         
-        if scaler is not None and preprocess_config:
-            df_scaled = df.copy()
-            df_scaled[numeric_cols] = scaler.transform(df[numeric_cols])
-            df = df_scaled
+        with metrics.stage("group_assignment"):
+            solved = await state.executor.assign_many(state.model, problems)
+        for group_id, result in zip(solved_groups, solved):
+            if "error" in result:
+                results[group_id] = result
+                continue
+            results[group_id] = {
+                "stage_1_rf_predictions": result['predictions'],
+                "stage_1_probabilities": result['probabilities'],
+                "n_samples_processed": result['n_samples'],
+                "stage_2_optimal_assignments": result['optimal_assignments'],
+                "stage_2_total_score": result['total_assignment_score'],
+                "stage_2_solver": result['assignment']['solver'],
+                "stage_2_optimality_gap": result['assignment']['optimality_gap'],
+                "stage_2_optimal": result['assignment']['optimal'],
+            }
         
-        probs = model.predict_probabilities(df)
-        predictions = model.predict_labels(df)
+        return {
+            "stage": "Two-Stage Pipeline (grouped)",
+            "n_groups": len(group_ids),
+            "n_samples_processed": len(X),
+            "groups": {group_id: results[group_id] for group_id in group_ids},
+        }
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Grouped prediction and assignment error: {str(e)}")
+
+async def score_samples(state, samples):
+    """Stage 1 positive-class scores for a list of PredictionInput"""
+    if not samples:
+        return np.zeros(0)
+    with metrics.stage("featurize"):
+        X = state.featurizer.transform(samples)
+    probs, _ = await score_stage_1(state, X)
+    return probs[:, 1] if probs.shape[1] > 1 else probs[:, 0]
+
+async def apply_session_changes(session_id, stored, **changes):
+    """
+    Repair a session on the inference thread pool, serialized per session,
+    and return its response built under the same lock. Sessions live in this
+    process, so even with a process executor the repair runs on the shared
+    thread pool.
+    """
+    def repair():
+        with stored.lock:
+            before = stored.session.augmentations
+            added = stored.session.apply(**changes) if changes else []
+            return session_response(session_id, stored, added, stored.session.augmentations - before)
+
+    with metrics.stage("incremental_assignment"):
+        return await shared_executor.run(repair)
+
+def session_response(session_id, stored, added=(), augmentations=0):
+    """Response body for a session; call with stored.lock held"""
+    session = stored.session
+    result = session.result()
+    return {
+        "session_id": session_id,
+        "model_version": stored.model_version,
+        "n_tasks": session.n_tasks,
+        "worker_ids": session.worker_ids,
+        "stage_1_probabilities": session.scores,
+        "added_worker_ids": list(added),
+        "stage_2_optimal_assignments": result["worker_task_pairs"],
+        "stage_2_total_score": result["total_cost"],
+        "stage_2_solver": result["solver"],
+        "augmenting_paths": augmentations,
+    }
+
+def get_stored_session(session_id):
+    try:
+        return assignment_sessions.get(session_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired assignment session '{session_id}'")
+
+@app.post("/assignment_sessions")
+@metrics.timed("/assignment_sessions")
+async def create_assignment_session(data: AssignmentSessionInput):
+    """
+    Start an incremental Stage 2 session: score the initial samples and
+    solve their assignment. The session keeps the assignment and its dual
+    potentials so later changes are repaired instead of re-solved.
+    """
+    state = serving
+    if state is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
+    try:
+        scores = await score_samples(state, data.samples)
+        session = AssignmentSession(
+            n_tasks=data.n_tasks or len(scores),
+            maximize=data.maximize_assignment if data.maximize_assignment is not None else True,
+        )
+        session_id = assignment_sessions.add(session, model_version=state.model_version)
+        return await apply_session_changes(session_id, assignment_sessions.get(session_id), add=scores.tolist())
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Assignment session error: {str(e)}")
+
+@app.post("/assignment_sessions/{session_id}/changes")
+@metrics.timed("/assignment_sessions/{session_id}/changes")
+async def change_assignment_session(session_id: str, data: AssignmentSessionChanges):
+    """
+    Add, remove or rescore workers (patients) in a session and repair the
+    assignment with one augmenting path per changed cost row.
+    """
+    state = serving
+    if state is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    stored = get_stored_session(session_id)
+    
+    try:
+        # New and rescored samples are scored together
+        scores = await score_samples(state, data.add + [change.sample for change in data.update])
+        return await apply_session_changes(
+            session_id,
+            stored,
+            add=scores[:len(data.add)].tolist(),
+            remove=data.remove,
+            update=dict(zip([change.worker_id for change in data.update], scores[len(data.add):].tolist())),
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Assignment session error: {str(e)}")
+
+@app.get("/assignment_sessions/{session_id}")
+async def get_assignment_session(session_id: str):
+    """Current assignment of a session"""
+    return await apply_session_changes(session_id, get_stored_session(session_id))
+
+@app.delete("/assignment_sessions/{session_id}")
+async def delete_assignment_session(session_id: str):
+    """Drop a session"""
+    try:
+        assignment_sessions.delete(session_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired assignment session '{session_id}'")
+    return {"status": "deleted", "session_id": session_id}
+
+@app.post("/batch_predict", openapi_extra={"requestBody": {"required": True, "content": {
+    "application/json": {"schema": {"$ref": "#/components/schemas/BatchPredictionInput"}},
+    columnar.NPY_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+    columnar.ARROW_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+}}})
+@metrics.timed("/batch_predict", parse=False)
+async def batch_predict(request: Request):
+    """
+    Batch predictions using Random Forest only.
+    Body: BatchPredictionInput JSON, or a columnar binary matrix (see columnar.py)
+    in which case the response uses the same binary format.
+    """
+    state = serving
+    if state is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
+    media_type = columnar.negotiate(request.headers.get("content-type"))
+    if media_type is not None:
+        return await batch_predict_columnar(state, await request.body(), media_type)
+    
+    try:
+        with metrics.stage("parse"):
+            data = BatchPredictionInput.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    
+    try:
+        with metrics.stage("featurize"):
+            X = state.featurizer.transform(data.samples)
+        
+        probs, predictions = await score_stage_1(state, X)
         
         return {
             "stage": "Batch Predictions (Stage 1 only)",
@@ -242,15 +656,145 @@ def batch_predict(data: BatchPredictionInput):
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Batch prediction error: {str(e)}")
 
+async def batch_predict_columnar(state, body, media_type):
+    """Score a binary feature matrix and return results in the same format"""
+    try:
+        with metrics.stage("parse"):
+            X = columnar.decode_features(body, media_type, state.featurizer.numeric_cols)
+    except columnar.UnsupportedFormat as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Batch prediction error: {str(e)}")
+    
+    try:
+        with metrics.stage("featurize"):
+            X = state.featurizer.scale_in_place(X)
+        probs, predictions = await score_stage_1(state, X, use_cache=False)
+        with metrics.stage("encode_response"):
+            content = columnar.encode_predictions(probs, predictions, media_type)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Batch prediction error: {str(e)}")
+    return Response(content=content, media_type=media_type)
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that may read the request body while it streams.
+    Starlette's default watches receive() for a disconnect, which would compete
+    with the generator for body messages; here request.stream() itself raises
+    ClientDisconnect, so the response only needs to send.
+    """
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+async def iter_ndjson_lines(byte_stream):
+    """Split an async byte stream into non-empty NDJSON lines without buffering the whole body"""
+    buffer = b""
+    async for chunk in byte_stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        if len(buffer) > STREAM_MAX_LINE_BYTES:
+            raise ValueError(f"NDJSON line longer than {STREAM_MAX_LINE_BYTES} bytes")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+async def stream_predictions(state, byte_stream):
+    """
+    Score NDJSON rows in fixed-size chunks and yield NDJSON results as each
+    chunk finishes. At most STREAM_CHUNK_SIZE rows are held at a time.
+    """
+    index = 0
+    pending = []  # (index, PredictionInput or error message) for the current chunk
+    
+    async def flush(entries):
+        samples = [entry for _, entry in entries if isinstance(entry, PredictionInput)]
+        if samples:
+            with metrics.stage("featurize"):
+                X = state.featurizer.transform(samples)
+            # Bulk rows would mostly evict hot single-request entries
+            probs, labels = await score_stage_1(state, X, use_cache=False)
+            positive = probs[:, 1] if probs.shape[1] > 1 else probs[:, 0]
+        out = []
+        row = 0
+        for i, entry in entries:
+            if isinstance(entry, PredictionInput):
+                out.append(json.dumps({"index": i, "prediction": int(labels[row]), "probability": float(positive[row])}))
+                row += 1
+            else:
+                out.append(json.dumps({"index": i, "error": entry}))
+        return ("\n".join(out) + "\n").encode()
+    
+    try:
+        async for line in iter_ndjson_lines(byte_stream):
+            try:
+                pending.append((index, PredictionInput(**json.loads(line))))
+            except Exception as e:
+                pending.append((index, f"Invalid row: {str(e)}"))
+            index += 1
+            if len(pending) >= STREAM_CHUNK_SIZE:
+                yield await flush(pending)
+                pending = []
+        if pending:
+            yield await flush(pending)
+    except ClientDisconnect:
+        # The client is gone; there is nobody to report to
+        return
+    except Exception as e:
+        # Headers are already sent; report the failure in-band as the last line
+        yield (json.dumps({"index": index, "error": f"Stream aborted: {str(e)}"}) + "\n").encode()
+
+@app.post("/batch_predict/stream")
+@metrics.timed("/batch_predict/stream", parse=False)
+async def batch_predict_stream(request: Request):
+    """
+    Streaming bulk predictions (Stage 1 only).
+    Body: NDJSON, one PredictionInput object per line.
+    Response: NDJSON, one {"index", "prediction", "probability"} (or {"index", "error"}) per line,
+    streamed back chunk by chunk.
+    """
+    state = serving
+    if state is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
+    return DuplexStreamingResponse(stream_predictions(state, request.stream()), media_type="application/x-ndjson")
+
+@app.get("/batching/stats")
+async def batching_stats():
+    """Micro-batching metrics: batch sizes and queue wait"""
+    state = serving
+    if state is None or state.batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **state.batcher.stats()}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Prediction cache hit/miss counters"""
+    if prediction_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **prediction_cache.stats()}
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Latency histograms (with p50/p95/p99) per endpoint and stage, Prometheus text format"""
+    return Response(content=metrics.registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/info")
-def model_info():
+async def model_info():
     """Get model and preprocessing information"""
-    if model is None:
+    state = serving
+    if state is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
+    preprocess_config = state.preprocess_config
     
     return {
         "model_type": "Two-Stage ML Pipeline",
         "stage_1": "Random Forest Classifier (100 estimators)",
+        "inference_engine": "compiled" if state.model.compiled_forest is not None else "sklearn",
+        **state.describe(),
         "stage_2": "Hungarian Algorithm (scipy.optimize.linear_sum_assignment)",
         "model_path": MODEL_PATH,
         "config_path": CONFIG_PATH,
@@ -258,9 +802,43 @@ def model_info():
         "feature_count": len(preprocess_config.get('numeric_cols', [])) if preprocess_config else 0,
         "endpoints": {
             "/predict": "Single sample RF prediction (Stage 1 only)",
-            "/batch_predict": "Batch RF predictions (Stage 1 only)",
-            "/predict_and_assign": "Full two-stage pipeline with Hungarian assignment"
+            "/batch_predict": "Batch RF predictions (Stage 1 only; JSON, .npy or Arrow IPC body)",
+            "/batch_predict/stream": "Streaming NDJSON batch RF predictions (Stage 1 only)",
+            "/metrics": "Prometheus latency histograms per endpoint and stage",
+            "/live": "Liveness probe (process up)",
+            "/ready": "Readiness probe (503 until a warmed-up model is serving)",
+            "/predict_and_assign": "Full two-stage pipeline with Hungarian assignment",
+            "/predict_and_assign/groups": "Two-stage pipeline for many independent groups, keyed by group_id",
+            "/assignment_sessions": "Stateful Stage 2 sessions repaired incrementally as samples are added, removed or rescored",
+            "/admin/reload": "Load, validate and atomically swap in the model at MODEL_PATH"
         }
     }
 
+@app.post("/admin/reload")
+async def admin_reload(x_admin_token: Optional[str] = Header(None)):
+    """Hot-reload the model without dropping in-flight requests"""
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    if model_managed_externally:
+        # Reloading here would give this worker a private model copy while the
+        # others keep the old one; the launcher reloads once and restarts them all
+        os.kill(os.getppid(), signal.SIGHUP)
+        return JSONResponse(status_code=202, content={
+            "status": "reload requested",
+            "detail": "The launcher reloads the model and restarts every worker on it",
+        })
+    if reload_lock.locked():
+        raise HTTPException(status_code=409, detail="A model reload is already in progress")
+    
+    try:
+        # Load and warm up off the event loop; requests keep using the old model meanwhile
+        loop = asyncio.get_running_loop()
+        state = await loop.run_in_executor(None, reload_model, "admin")
+    except ReloadInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Model reload failed, previous model still serving: {str(e)}")
+    
+    return {"status": "reloaded", **state.describe()}
+
 
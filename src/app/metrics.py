@@ -0,0 +1,242 @@
+# src/app/metrics.py
+"""
+In-process latency histograms and request counters, exposed in Prometheus
+text format by `/metrics`.
+
+Every instrumented endpoint gets a request-duration histogram plus one
+histogram per stage (parse, featurize, cache_lookup, stage_1_predict,
+cost_matrix, linear_sum_assignment, serialize). Histograms use fixed
+log-spaced buckets, so an observation is a bisect and two increments under a
+lock; p50/p95/p99 are interpolated from the buckets when scraped.
+
+Request timing flows through a ContextVar set by `MetricsMiddleware`, so
+helpers deep in the call stack can record a stage with `with stage("name"):`
+without threading a timer through every signature. Outside an instrumented
+request those helpers do nothing.
+"""
+
+import bisect
+import functools
+import threading
+import time
+from contextvars import ContextVar
+
+# 10 us .. ~10 s, sqrt(2) apart: quantile estimates are within ~20% of the true value
+BUCKETS = tuple(1e-5 * 2 ** (k / 2) for k in range(41))
+QUANTILES = (0.5, 0.95, 0.99)
+
+_current = ContextVar("request_timing", default=None)
+# Endpoint labels registered with timed(); requests rejected before the
+# handler runs (e.g. 422) are still counted under their route
+_timed_endpoints = set()
+
+
+class Histogram:
+    """Cumulative-on-render latency histogram with fixed buckets"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimate the q-quantile by linear interpolation inside its bucket"""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+
+class MetricsRegistry:
+    """Per-endpoint request and per-stage latency histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = {}   # endpoint -> Histogram
+        self._stages = {}     # (endpoint, stage) -> Histogram
+        self._responses = {}  # (endpoint, status) -> count
+
+    def observe_stage(self, endpoint, stage_name, seconds):
+        with self._lock:
+            histogram = self._stages.get((endpoint, stage_name))
+            if histogram is None:
+                histogram = self._stages[(endpoint, stage_name)] = Histogram()
+            histogram.observe(seconds)
+
+    def observe_request(self, endpoint, status, seconds):
+        with self._lock:
+            histogram = self._requests.get(endpoint)
+            if histogram is None:
+                histogram = self._requests[endpoint] = Histogram()
+            histogram.observe(seconds)
+            self._responses[(endpoint, status)] = self._responses.get((endpoint, status), 0) + 1
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            requests = sorted(self._requests.items())
+            stages = sorted(self._stages.items())
+            responses = sorted(self._responses.items())
+            lines = []
+            _render_family(lines, "api_request_duration_seconds",
+                           "End-to-end request latency per endpoint",
+                           [({"endpoint": endpoint}, h) for endpoint, h in requests])
+            _render_family(lines, "api_stage_duration_seconds",
+                           "Latency of each request stage per endpoint",
+                           [({"endpoint": endpoint, "stage": name}, h) for (endpoint, name), h in stages])
+            lines.append("# HELP api_requests_total Responses per endpoint and status code")
+            lines.append("# TYPE api_requests_total counter")
+            for (endpoint, status), n in responses:
+                lines.append(f"api_requests_total{_labels({'endpoint': endpoint, 'status': str(status)})} {n}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+def _render_family(lines, name, help_text, series):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for labels, h in series:
+        cumulative = 0
+        for bound, n in zip(h.buckets, h.counts):
+            cumulative += n
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': f'{bound:.6g}'})} {cumulative}")
+        lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {h.count}")
+        lines.append(f"{name}_sum{_labels(labels)} {h.sum:.9f}")
+        lines.append(f"{name}_count{_labels(labels)} {h.count}")
+
+    quantile_name = name.replace("_seconds", "_quantile_seconds")
+    lines.append(f"# HELP {quantile_name} p50/p95/p99 of {name}, estimated from its buckets")
+    lines.append(f"# TYPE {quantile_name} gauge")
+    for labels, h in series:
+        for q in QUANTILES:
+            lines.append(f"{quantile_name}{_labels({**labels, 'quantile': str(q)})} {h.quantile(q):.9f}")
+
+
+registry = MetricsRegistry()
+
+
+class RequestTiming:
+    """Timestamps of one in-flight request"""
+
+    __slots__ = ("endpoint", "started", "handler_done")
+
+    def __init__(self, started):
+        self.endpoint = None
+        self.started = started
+        self.handler_done = None
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing requests to endpoints decorated with `timed()`.
+    Records end-to-end latency (until the last body byte is sent) and the
+    serialize stage (handler return until the response starts).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming(time.perf_counter())
+        token = _current.set(timing)
+        status = 500
+
+        async def send_timed(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if timing.endpoint is not None and timing.handler_done is not None:
+                    registry.observe_stage(timing.endpoint, "serialize", time.perf_counter() - timing.handler_done)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            _current.reset(token)
+            endpoint = timing.endpoint
+            if endpoint is None:
+                route_path = getattr(scope.get("route"), "path", None)
+                endpoint = route_path if route_path in _timed_endpoints else None
+            if endpoint is not None:
+                registry.observe_request(endpoint, status, time.perf_counter() - timing.started)
+
+
+def timed(endpoint, parse=True):
+    """
+    Decorator for async endpoint handlers.
+    Args:
+        endpoint: label for this endpoint's metrics
+        parse: record the time before the handler runs (body read and
+               pydantic validation) as the parse stage
+    """
+    _timed_endpoints.add(endpoint)
+
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            timing = _current.get()
+            if timing is not None:
+                timing.endpoint = endpoint
+                if parse:
+                    registry.observe_stage(endpoint, "parse", time.perf_counter() - timing.started)
+            try:
+                return await handler(*args, **kwargs)
+            finally:
+                if timing is not None:
+                    timing.handler_done = time.perf_counter()
+        return wrapper
+    return decorator
+
+
+class stage:
+    """
+    `with stage("featurize"):` times the block as one stage of the current
+    request (no-op outside a timed request). A plain class rather than
+    @contextmanager keeps the per-stage cost around a microsecond.
+    """
+
+    __slots__ = ("name", "endpoint", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        timing = _current.get()
+        self.endpoint = timing.endpoint if timing is not None else None
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.endpoint is not None:
+            registry.observe_stage(self.endpoint, self.name, time.perf_counter() - self.started)
+        return False
+
+
+def record_stages(timings):
+    """Record stage durations measured elsewhere, e.g. {"cost_matrix": 0.001} from a worker"""
+    timing = _current.get()
+    if timing is None or timing.endpoint is None or not timings:
+        return
+    for name, seconds in timings.items():
+        registry.observe_stage(timing.endpoint, name, seconds)
@@ -0,0 +1,218 @@
+# src/app/serving.py
+"""
+Model loading, validation and hot reload for the API.
+
+Everything a request needs from one model load (model, preprocessing config,
+featurizer, executor, micro-batcher) lives on a single `ServingState`.
+The API keeps one reference to the active state and replaces it in a single
+assignment, so a reload is an atomic swap: requests that already picked up the
+old state finish on the old model, new requests see the new one.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from src.models.two_stage_model import TwoStageModel
+from src.app.featurizer import Featurizer
+
+
+class ReloadInProgress(RuntimeError):
+    """Raised when a reload is requested while another one is still running"""
+
+
+def artifact_version(path):
+    """Short content hash identifying a model artifact (file or compiled directory)"""
+    digest = hashlib.sha256()
+    for file_path in _artifact_files(path):
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def file_signature(path):
+    """(mtime_ns, size) of a file, or of the newest file in an artifact directory; None if missing"""
+    try:
+        stats = [os.stat(p) for p in _artifact_files(path)]
+    except OSError:
+        return None
+    if not stats:
+        return None
+    return (max(st.st_mtime_ns for st in stats), sum(st.st_size for st in stats))
+
+
+def _artifact_files(path):
+    if os.path.isdir(path):
+        return [os.path.join(path, name) for name in sorted(os.listdir(path))]
+    return [path]
+
+
+class ServingState:
+    """One loaded model and everything derived from it"""
+
+    def __init__(self, model, preprocess_config, featurizer, model_version,
+                 model_path, config_path, load_seconds):
+        self.model = model
+        self.preprocess_config = preprocess_config
+        self.featurizer = featurizer
+        self.model_version = model_version
+        self.model_path = model_path
+        self.config_path = config_path
+        self.load_seconds = load_seconds
+        self.loaded_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.signatures = (file_signature(model_path), file_signature(config_path))
+        # Attached by the API once the state is built
+        self.executor = None
+        self.batcher = None
+        self.warmup_seconds = None
+        # (mean, scale) folded into the model's thresholds, if any
+        self.folded_scaler = None
+
+    def describe(self):
+        return {
+            "model_version": self.model_version,
+            "scaler_folded": self.folded_scaler is not None,
+            "model_loaded_at": self.loaded_at,
+            "model_load_seconds": round(self.load_seconds, 3),
+            "model_warmup_seconds": round(self.warmup_seconds, 3) if self.warmup_seconds is not None else None,
+        }
+
+
+def load_serving_state(model_path, config_path, engine, default_cols, fold_scaler=False):
+    """
+    Load, compile and validate a model plus its preprocessing config.
+    Args:
+        model_path: joblib artifact with an 'rf_model' entry, or a compiled-forest directory
+        config_path: preprocessing config JSON (optional on disk)
+        engine: Stage 1 inference engine ("sklearn" or "compiled")
+        default_cols: column order to use when the config has no numeric_cols
+        fold_scaler: fold the config's scaler into the tree thresholds, so
+                     requests are scored on raw features without scaling
+    Returns:
+        ServingState (raises if the model fails validation)
+    """
+    started = time.perf_counter()
+    model = TwoStageModel.from_artifact(model_path, engine=engine)
+    model_version = artifact_version(model_path)
+    print(f"✓ Two-Stage Model loaded from {model_path} (version {model_version})")
+
+    preprocess_config = None
+    scaler_mean = scaler_scale = None
+    if os.path.exists(config_path):
+        with open(config_path, 'r') as f:
+            preprocess_config = json.load(f)
+        print(f"✓ Preprocessing config loaded from {config_path}")
+        scaler_mean = np.array(preprocess_config.get('scaler_mean', []))
+        scaler_scale = np.array(preprocess_config.get('scaler_scale', []))
+    else:
+        print(f"⚠ Preprocessing config not found at {config_path}")
+
+    # Resolve column order and scaling once for all requests
+    numeric_cols = preprocess_config.get('numeric_cols') if preprocess_config else None
+    featurizer = Featurizer(
+        numeric_cols or list(default_cols),
+        scaler_mean=scaler_mean,
+        scaler_scale=scaler_scale,
+    )
+
+    folded_scaler = None
+    if fold_scaler and featurizer.mean is not None:
+        # The compiled forest absorbs the scaling; the featurizer only orders columns
+        folded_scaler = (featurizer.mean, featurizer.scale)
+        model.fold_scaler(*folded_scaler)
+        featurizer = Featurizer(featurizer.numeric_cols)
+
+    validate_model(model, featurizer, folded_scaler)
+    state = ServingState(
+        model=model,
+        preprocess_config=preprocess_config,
+        featurizer=featurizer,
+        model_version=model_version,
+        model_path=model_path,
+        config_path=config_path,
+        load_seconds=time.perf_counter() - started,
+    )
+    state.folded_scaler = folded_scaler
+    return state
+
+
+def validate_model(model, featurizer, folded_scaler=None, n_rows=8):
+    """
+    Run a few synthetic predictions through both stages before a model goes
+    live. Raises ValueError if the model is inconsistent with the featurizer
+    or produces invalid outputs.
+    """
+    n_features_in = model.n_features or featurizer.n_features
+    if n_features_in != featurizer.n_features:
+        raise ValueError(
+            f"Model expects {n_features_in} features but the config provides {featurizer.n_features}"
+        )
+
+    # Rows spread around the (scaled) feature means
+    X = np.linspace(-2.0, 2.0, n_rows)[:, np.newaxis] * np.ones((1, featurizer.n_features))
+    if folded_scaler is not None:
+        # A folded model takes raw features
+        mean, scale = folded_scaler
+        X = X * scale + mean
+    probs, labels = model.predict_probabilities_and_labels(X)
+    if probs.shape[0] != n_rows or len(labels) != n_rows:
+        raise ValueError("Model returned the wrong number of predictions during validation")
+    if not np.all(np.isfinite(probs)) or not np.allclose(probs.sum(axis=1), 1.0):
+        raise ValueError("Model returned invalid probabilities during validation")
+    model.assign(probs, labels, n_tasks=n_rows, maximize=True)
+
+
+class ModelWatcher:
+    """Polls MODEL_PATH / CONFIG_PATH and triggers a reload when they change"""
+
+    def __init__(self, model_path, config_path, get_state, reload_fn, interval_seconds):
+        """
+        Args:
+            model_path: model artifact to watch
+            config_path: preprocessing config to watch
+            get_state: callable returning the active ServingState (or None)
+            reload_fn: callable performing the reload
+            interval_seconds: poll period
+        """
+        self.model_path = model_path
+        self.config_path = config_path
+        self.get_state = get_state
+        self.reload_fn = reload_fn
+        self.interval = float(interval_seconds)
+        self._stop = threading.Event()
+        self._thread = None
+        self._failed = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.interval + 1.0)
+
+    def _run(self):
+        previous = None
+        while not self._stop.wait(self.interval):
+            state = self.get_state()
+            active = state.signatures if state is not None else None
+            current = (file_signature(self.model_path), file_signature(self.config_path))
+            # Reload only once the files have stopped changing for one interval,
+            # so a model that is still being copied in is not picked up half-written
+            if (current != active and current == previous
+                    and current != self._failed and current[0] is not None):
+                try:
+                    self.reload_fn("file change")
+                except Exception as e:
+                    # Keep serving the old model; retry once the files change again
+                    self._failed = current
+                    print(f"✗ Model reload after file change failed: {e}")
+            previous = current
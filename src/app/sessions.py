@@ -0,0 +1,95 @@
+# src/app/sessions.py
+"""
+In-process store of incremental assignment sessions (LRU eviction + TTL).
+
+Each session holds an AssignmentSession (the current assignment plus its dual
+potentials) and a lock that serializes changes to it, so two requests against
+the same session never repair it concurrently. Sessions live in the API
+process only: they are not shared between uvicorn workers and do not survive
+a restart.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class StoredSession:
+    """An AssignmentSession with its lock and bookkeeping"""
+
+    __slots__ = ("session", "lock", "model_version", "last_used")
+
+    def __init__(self, session, model_version):
+        self.session = session
+        self.lock = threading.Lock()
+        self.model_version = model_version
+        self.last_used = time.monotonic()
+
+
+class SessionStore:
+    """Bounded map of session id -> StoredSession"""
+
+    def __init__(self, max_sessions=100, ttl_seconds=3600.0):
+        """
+        Args:
+            max_sessions: capacity; least recently used sessions are evicted first
+            ttl_seconds: idle lifetime; 0 or less disables expiry
+        """
+        self.max_sessions = int(max_sessions)
+        self.ttl = float(ttl_seconds)
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def add(self, session, model_version=""):
+        """Store a new session; returns its id"""
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self._expire(time.monotonic())
+            self._sessions[session_id] = StoredSession(session, model_version)
+            self.created += 1
+            while len(self._sessions) > max(self.max_sessions, 1):
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+        return session_id
+
+    def get(self, session_id):
+        """StoredSession for session_id; raises KeyError if unknown or expired"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            stored = self._sessions[session_id]
+            stored.last_used = now
+            self._sessions.move_to_end(session_id)
+            return stored
+
+    def delete(self, session_id):
+        """Drop a session; raises KeyError if unknown"""
+        with self._lock:
+            del self._sessions[session_id]
+
+    def _expire(self, now):
+        if self.ttl <= 0:
+            return
+        while self._sessions:
+            session_id, stored = next(iter(self._sessions.items()))
+            if now - stored.last_used <= self.ttl:
+                break
+            del self._sessions[session_id]
+            self.expirations += 1
+
+    def stats(self):
+        return {
+            "size": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl,
+            "created": self.created,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
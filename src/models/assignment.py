@@ -0,0 +1,752 @@
+# src/models/assignment.py
+"""
+Stage 2 assignment backends beyond the dense Hungarian solver.
+
+Score-derived cost matrices are usually separable, so the optimum follows
+from sorting instead of an O(n^3) Hungarian solve:
+
+- rank-1: cost[i, j] = row[i] * col[j]. By the rearrangement inequality,
+  maximizing pairs rows and columns in the same sorted order and minimizing
+  pairs them in opposite order. For rectangular matrices the unused rows (or
+  columns) are the smallest (maximize) or largest (minimize) ones, which is
+  exact when each factor vector has a single sign.
+- row-constant with a diagonal override (square): cost[i, j] = row[i] * col[0]
+  off the diagonal and diagonal[i] on it. Every permutation pays the
+  off-diagonal cost of each row, plus a gain for each fixed point, so the
+  optimum fixes exactly the rows whose gain helps and deranges the rest.
+
+A SeparableCost never materializes the (n_workers, n_tasks) matrix, which is
+what lets Stage 2 handle 100k-row batches. Structures that none of these rules
+cover return None from solve_separable, and the caller falls back to Hungarian.
+
+Large general problems, where an O(n^2)-memory, O(n^3)-time dense solve is
+unusable, have two approximate backends that also report an optimality gap
+(an upper bound on how far the total is from the optimum):
+- auction_assignment: epsilon-scaling auction on the dense matrix
+- sparse_assignment: the same auction restricted to the k best candidate
+  tasks per worker, found block by block without a dense matrix
+Both gaps are dual bounds certified by the final auction prices against the
+full cost matrix, so a sparse solve that missed a good edge reports it.
+
+anytime_assignment works against a deadline instead of a tolerance. It
+builds a greedy assignment, improves it by pairwise swaps while time remains,
+and reports the gap to the best dual bound it found. The gap is valid but may
+be loose.
+
+Tasks with capacities (a task takes up to capacities[j] workers) are solved
+without replicating columns: rank-1 costs by sorting against the
+capacity-expanded column vector (capacitated_separable), anything else by
+successive shortest paths on the min-cost flow network whose nodes are the
+tasks (min_cost_flow_assignment).
+"""
+
+import time
+
+import numpy as np
+
+
+class SeparableCost:
+    """cost[i, j] = row[i] * col[j], with diagonal[i] replacing cost[i, i] if given"""
+
+    def __init__(self, row, col, diagonal=None):
+        self.row = np.asarray(row, dtype=np.float64)
+        self.col = np.asarray(col, dtype=np.float64)
+        self.diagonal = None if diagonal is None else np.asarray(diagonal, dtype=np.float64)
+
+    @property
+    def shape(self):
+        return (len(self.row), len(self.col))
+
+    def values(self, rows, cols):
+        """Cost of each (rows[k], cols[k]) cell, computed exactly as the dense matrix would hold it"""
+        values = self.row[rows] * self.col[cols]
+        if self.diagonal is not None:
+            on_diagonal = rows == cols
+            values[on_diagonal] = self.diagonal[rows[on_diagonal]]
+        return values
+
+    def to_matrix(self):
+        return self.block(0, len(self.row))
+
+    def block(self, start, stop):
+        """Dense rows start:stop of the cost matrix"""
+        cost_block = self.row[start:stop, np.newaxis] * self.col[np.newaxis, :]
+        if self.diagonal is not None:
+            on_diagonal = np.arange(start, min(stop, len(self.col)))
+            cost_block[on_diagonal - start, on_diagonal] = self.diagonal[on_diagonal]
+        return cost_block
+
+    def transpose(self):
+        return SeparableCost(self.col, self.row, diagonal=self.diagonal)
+
+
+def solve_separable(cost, maximize=False):
+    """
+    Args:
+        cost: SeparableCost
+        maximize: If True, maximize the total; if False, minimize
+    Returns:
+        (worker_indices, task_indices) sorted by worker, like
+        linear_sum_assignment, or None if the structure needs a general solver
+    """
+    n_workers, n_tasks = cost.shape
+    if n_workers == 0 or n_tasks == 0:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+
+    if cost.diagonal is None:
+        assignment = _solve_rank1(cost.row, cost.col, maximize)
+    elif n_workers == n_tasks and np.all(cost.col == cost.col[0]):
+        assignment = _solve_row_diagonal(cost.row * cost.col[0], cost.diagonal, maximize)
+    else:
+        return None
+    if assignment is None:
+        return None
+
+    rows, cols = assignment
+    order = np.argsort(rows, kind="stable")
+    return rows[order], cols[order]
+
+
+def capacitated_separable(cost, capacities, maximize=False):
+    """
+    Rank-1 costs where task j takes up to capacities[j] workers. Each unit of
+    capacity is a slot with the task's column factor, so the rearrangement
+    argument applies to the expanded (n_workers, sum(capacities)) problem,
+    which only ever exists as a vector.
+    Returns:
+        (worker_indices, task_indices) sorted by worker, or None
+    """
+    if cost.diagonal is not None:
+        return None
+    slot_task = np.repeat(np.arange(cost.shape[1]), capacities)
+    solved = solve_separable(SeparableCost(cost.row, cost.col[slot_task]), maximize=maximize)
+    if solved is None:
+        return None
+    rows, slots = solved
+    return rows, slot_task[slots]
+
+
+def min_cost_flow_assignment(cost_matrix, capacities, maximize=False):
+    """
+    Transportation problem: every worker goes to at most one task, task j
+    takes at most capacities[j] workers, and min(n_workers, sum(capacities))
+    pairs are made, like linear_sum_assignment on replicated columns.
+
+    Workers are placed one at a time along shortest augmenting paths, as in
+    the Hungarian algorithm, but the paths run over tasks only: moving one of
+    task a's workers to task b costs min over a's workers of
+    cost[w, b] - cost[w, a]. That task-to-task matrix is n_tasks x n_tasks
+    and is updated per worker moved: O(n_tasks) for a worker joining a task,
+    plus a rescan of the task's workers for each column a leaving worker was
+    the best mover for. With a Dijkstra search per worker the solve is about
+    O(n_workers * n_tasks^2), and the replicated matrix is never built. Task
+    potentials keep the edge costs non-negative for Dijkstra, and a worker
+    whose best reduced cost is a task with spare capacity is placed without a
+    search. When there are more workers than capacity, the surplus collects
+    on a zero-cost overflow task.
+    Args:
+        cost_matrix: dense (n_workers, n_tasks) array
+        capacities: (n_tasks,) non-negative integers
+        maximize: If True, maximize the total; if False, minimize
+    Returns:
+        (worker_indices, task_indices) sorted by worker
+    """
+    # scipy.sparse costs ~0.4 s to import; only this solver needs it
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import dijkstra
+
+    cost_matrix = np.asarray(cost_matrix, dtype=np.float64)
+    capacities = np.asarray(capacities, dtype=np.int64)
+    n, m = cost_matrix.shape
+    slots = int(capacities.sum())
+    if n == 0 or slots == 0:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+
+    cost = -cost_matrix if maximize else cost_matrix
+    if n > slots:
+        # A zero-cost overflow task takes the workers left unassigned
+        cost = np.hstack([cost, np.zeros((n, 1))])
+        capacities = np.append(capacities, n - slots)
+    k = cost.shape[1]
+    potential = np.zeros(k)
+    load = np.zeros(k, dtype=np.int64)
+    task_of = np.full(n, -1, dtype=np.intp)
+    # Task t's workers are members[start[t]:start[t] + load[t]]; position[w]
+    # locates w, and member_delta holds cost[w] - cost[w, t] in the same slot,
+    # column-major so rescanning one column of a task reads contiguous memory
+    # (no task can hold more than n workers, so larger capacities need no room)
+    room = np.minimum(capacities, n)
+    start = np.concatenate([[0], np.cumsum(room)[:-1]])
+    members = np.zeros(int(room.sum()), dtype=np.intp)
+    member_delta = np.zeros((len(members), k), order="F")
+    position = np.zeros(n, dtype=np.intp)
+    # move[a, b] = min over workers w in a of cost[w, b] - cost[w, a], kept
+    # up to date per worker added or removed rather than rescanned per task
+    move = np.full((k, k), np.inf)
+    mover = np.full((k, k), -1, dtype=np.intp)
+
+    def add(worker, task):
+        position[worker] = start[task] + load[task]
+        members[position[worker]] = worker
+        task_of[worker] = task
+        delta = cost[worker] - cost[worker, task]
+        delta[task] = np.inf
+        member_delta[position[worker]] = delta
+        better = delta < move[task]
+        move[task, better], mover[task, better] = delta[better], worker
+
+    def remove(worker, task):
+        last = start[task] + load[task] - 1
+        members[position[worker]] = members[last]
+        member_delta[position[worker]] = member_delta[last]
+        position[members[last]] = position[worker]
+        load[task] -= 1
+        # Only the columns this worker was the best mover for need a rescan
+        workers = members[start[task]:last]
+        for column in np.flatnonzero(mover[task] == worker):
+            if len(workers) == 0:
+                move[task, column], mover[task, column] = np.inf, -1
+                continue
+            deltas = member_delta[start[task]:last, column]
+            best = deltas.argmin()
+            move[task, column], mover[task, column] = deltas[best], workers[best]
+
+    graph = np.full((k + 1, k + 1), np.inf)
+    for worker in range(n):
+        reduced = cost[worker] - potential
+        nearest = int(reduced.argmin())
+        if load[nearest] < capacities[nearest]:
+            path = [nearest]
+        else:
+            # Node 0 is the new worker, node a + 1 is task a
+            graph[0, 1:] = reduced - reduced[nearest]
+            graph[1:, 1:] = np.maximum(move + potential[:, np.newaxis] - potential, 0.0)
+            # Explicit zeros in a sparse graph are edges; infinite entries are not
+            edges = np.isfinite(graph)
+            adjacency = csr_matrix((graph[edges], np.nonzero(edges)[1],
+                                    np.concatenate([[0], np.cumsum(edges.sum(axis=1))])), shape=graph.shape)
+            distance, predecessor = dijkstra(adjacency,
+                                             indices=0, return_predecessors=True)
+            distance = distance[1:]
+            target = int(np.flatnonzero(load < capacities)[distance[load < capacities].argmin()])
+            potential += np.minimum(distance, distance[target])
+            path = [target]
+            while predecessor[path[-1] + 1] > 0:
+                path.append(int(predecessor[path[-1] + 1]) - 1)
+            path.reverse()
+
+        # Shift one worker along every hop, from the free end back, then place
+        # the new worker; every task's load is unchanged except the last one's
+        for a, b in zip(path[-2::-1], path[:0:-1]):
+            moved = int(mover[a, b])
+            remove(moved, a)
+            add(moved, b)
+            load[b] += 1
+        add(worker, path[0])
+        load[path[0]] += 1
+
+    workers = np.flatnonzero(task_of < m)
+    return workers, task_of[workers]
+
+
+def _solve_rank1(row, col, maximize):
+    n_workers, n_tasks = len(row), len(col)
+    if n_workers != n_tasks:
+        # Selecting the unused rows/columns by size needs single-signed factors;
+        # flip them to non-negative, which flips the objective once per factor
+        row_sign = _single_sign(row)
+        col_sign = _single_sign(col)
+        if row_sign == 0 or col_sign == 0:
+            return None
+        row, col = row * row_sign, col * col_sign
+        if row_sign * col_sign < 0:
+            maximize = not maximize
+
+    row_order = np.argsort(row, kind="stable")
+    col_order = np.argsort(col, kind="stable")
+    k = min(n_workers, n_tasks)
+    if maximize:
+        # Largest k of each side, paired in the same order
+        return row_order[n_workers - k:], col_order[n_tasks - k:]
+    # Smallest k of each side, paired in opposite order
+    return row_order[:k], col_order[:k][::-1]
+
+
+def _single_sign(values):
+    """1 if all values are >= 0, -1 if all are <= 0, else 0"""
+    if np.all(values >= 0):
+        return 1
+    if np.all(values <= 0):
+        return -1
+    return 0
+
+
+def _solve_row_diagonal(off_diagonal, diagonal, maximize):
+    n = len(off_diagonal)
+    # Gain of keeping row i on its own column, in the direction being optimized
+    gain = diagonal - off_diagonal
+    if not maximize:
+        gain = -gain
+
+    perm = np.arange(n)
+    fixed = np.flatnonzero(gain > 0)
+    free = np.flatnonzero(gain <= 0)
+    if len(free) >= 2:
+        # Cyclic shift: a derangement of the rows that gain nothing from their diagonal
+        perm[free] = np.roll(free, 1)
+    elif len(free) == 1 and len(fixed) > 0:
+        # A single free row must either stay fixed or swap with the fixed row
+        # whose gain is smallest, whichever costs less
+        u = free[0]
+        f = fixed[np.argmin(gain[fixed])]
+        if gain[u] + gain[f] < 0:
+            perm[u], perm[f] = f, u
+    return np.arange(n), perm
+
+
+def detect_separable(cost_matrix):
+    """
+    Recognize a separable structure in a dense cost matrix.
+    Args:
+        cost_matrix: (n_workers, n_tasks) array
+    Returns:
+        SeparableCost describing it, or None
+    """
+    cost_matrix = np.asarray(cost_matrix, dtype=np.float64)
+    if cost_matrix.ndim != 2 or cost_matrix.size == 0:
+        return None
+    n_workers, n_tasks = cost_matrix.shape
+
+    # Row-constant off the diagonal (checked exactly)
+    if n_workers == n_tasks and n_workers > 1:
+        off_diagonal = np.where(np.arange(n_workers) == 0, cost_matrix[:, -1], cost_matrix[:, 0])
+        candidate = SeparableCost(off_diagonal, np.ones(n_tasks), diagonal=np.diag(cost_matrix).copy())
+        if _matches(candidate, cost_matrix, exact=True):
+            return candidate
+
+    # Rank-1, up to floating-point rounding of the factorization
+    pivot_row, pivot_col = np.unravel_index(np.argmax(np.abs(cost_matrix)), cost_matrix.shape)
+    pivot = cost_matrix[pivot_row, pivot_col]
+    if pivot == 0:
+        return SeparableCost(np.zeros(n_workers), np.zeros(n_tasks))
+    candidate = SeparableCost(cost_matrix[:, pivot_col].copy(), cost_matrix[pivot_row, :] / pivot)
+    if _matches(candidate, cost_matrix, exact=False):
+        return candidate
+    return None
+
+
+def _matches(cost, cost_matrix, exact, block_rows=1024):
+    """Compare a structure with a dense matrix block by block, stopping at the first mismatch"""
+    for start in range(0, cost_matrix.shape[0], block_rows):
+        stop = min(start + block_rows, cost_matrix.shape[0])
+        expected = cost.block(start, stop)
+        actual = cost_matrix[start:stop]
+        if exact:
+            if not np.array_equal(expected, actual):
+                return False
+        elif not np.allclose(expected, actual, rtol=1e-12, atol=0.0):
+            return False
+    return True
+
+
+def auction_assignment(cost_matrix, maximize=False, tolerance=1e-6, max_rounds=None):
+    """
+    Epsilon-scaling auction on a dense cost matrix.
+    Args:
+        cost_matrix: dense (n_workers, n_tasks) array
+        maximize: If True, maximize the total; if False, minimize
+        tolerance: target optimality gap relative to the largest |cost|
+        max_rounds: bidding round limit; leftover workers are then assigned greedily
+    Returns:
+        (worker_indices, task_indices, optimality_gap), sorted by worker
+    """
+    cost_matrix = np.asarray(cost_matrix, dtype=np.float64)
+    # Auction maximizes benefit; bidders are the smaller side
+    benefit = cost_matrix if maximize else -cost_matrix
+    transposed = benefit.shape[0] > benefit.shape[1]
+    if transposed:
+        benefit = benefit.T
+    n, m = benefit.shape
+    if n == 0:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp), 0.0
+
+    tasks, prices = _auction(benefit, None, m, tolerance, max_rounds, lambda i: benefit[i])
+    primal = benefit[np.arange(n), tasks].sum()
+    gap = _dual_bound(lambda start, stop: benefit[start:stop], n, prices) - primal
+    worker_indices, task_indices, _ = _oriented(tasks, transposed)
+    return worker_indices, task_indices, max(float(gap), 0.0)
+
+
+def sparse_assignment(cost, maximize=False, k=16, tolerance=1e-6, block_rows=2048):
+    """
+    Epsilon-scaling auction restricted to the k best candidate tasks per
+    worker (plus task i for worker i, so a complete assignment always
+    exists). Candidates are found block by block, so at most block_rows rows
+    of the cost matrix are dense at a time and the auction itself works on
+    (n_workers, k + 1) arrays.
+    Args:
+        cost: SeparableCost or dense (n_workers, n_tasks) array
+        maximize: If True, maximize the total; if False, minimize
+        k: candidate tasks per worker
+        tolerance: target optimality gap relative to the largest |cost|
+        block_rows: rows materialized at once
+    Returns:
+        (worker_indices, task_indices, values, optimality_gap), sorted by worker
+    """
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.transpose() if isinstance(cost, SeparableCost) else np.asarray(cost).T
+    if isinstance(cost, SeparableCost):
+        cost_rows = cost.block
+    else:
+        cost = np.asarray(cost, dtype=np.float64)
+        cost_rows = lambda start, stop: cost[start:stop]  # noqa: E731
+    sign = 1.0 if maximize else -1.0
+    benefit_rows = lambda start, stop: sign * cost_rows(start, stop)  # noqa: E731
+    n, m = cost.shape
+    if n == 0:
+        empty = np.zeros(0, dtype=np.intp)
+        return empty, empty, np.zeros(0), 0.0
+
+    # k best tasks plus task i for worker i: the identity matching then
+    # always exists among the candidates, so the auction cannot stall
+    width = min(max(int(k), 1) + 1, m)
+    candidates = np.empty((n, width), dtype=np.intp)
+    candidate_benefit = np.empty((n, width))
+    for start in range(0, n, block_rows):
+        benefit_block = benefit_rows(start, min(start + block_rows, n))
+        rows = np.arange(len(benefit_block))
+        if width < m:
+            top = np.argpartition(-benefit_block, width - 1, axis=1)[:, :width]
+            own = np.arange(start, start + len(benefit_block))
+            missing = ~(top == own[:, np.newaxis]).any(axis=1)
+            worst = np.argmin(np.take_along_axis(benefit_block, top, axis=1), axis=1)
+            top[rows[missing], worst[missing]] = own[missing]
+        else:
+            top = np.broadcast_to(np.arange(m), benefit_block.shape)
+        candidates[start:start + len(benefit_block)] = top
+        candidate_benefit[start:start + len(benefit_block)] = np.take_along_axis(benefit_block, top, axis=1)
+
+    tasks, prices = _auction(candidate_benefit, candidates, m, tolerance, None,
+                             lambda i: benefit_rows(i, i + 1)[0])
+    on_candidate = candidates == tasks[:, np.newaxis]
+    benefit = np.where(on_candidate, candidate_benefit, 0.0).sum(axis=1)
+    for i in np.flatnonzero(~on_candidate.any(axis=1)):
+        # Assigned outside its candidates by the round-limit fallback
+        benefit[i] = benefit_rows(i, i + 1)[0, tasks[i]]
+    gap = _dual_bound(benefit_rows, n, prices, block_rows) - benefit.sum()
+
+    worker_indices, task_indices, order = _oriented(tasks, transposed)
+    return worker_indices, task_indices, sign * benefit[order], max(float(gap), 0.0)
+
+
+def _auction(benefit, candidates, m, tolerance, max_rounds, benefit_row):
+    """
+    Forward auction with epsilon scaling (Jacobi bidding: every unassigned
+    bidder bids at once). Bidders are rows, n <= m.
+    Args:
+        benefit: (n, m) benefits, or (n, k) benefits of the candidate tasks
+        candidates: None for dense benefits, else (n, k) candidate task indices
+        m: number of tasks
+        tolerance: target gap relative to the largest |benefit|
+        max_rounds: bidding round limit (None: 10000 + 50 * n)
+        benefit_row: i -> full benefit row, for the round-limit fallback
+    Returns:
+        (task per bidder, final prices)
+    """
+    n, width = benefit.shape
+    if max_rounds is None:
+        max_rounds = 10000 + 50 * n
+    scale = float(np.abs(benefit).max()) or 1.0
+    final_eps = tolerance * scale / n
+    eps = max(scale / 2.0, final_eps)
+    prices = np.zeros(m)
+    owner = np.full(m, -1)
+    assigned = np.full(n, -1)
+    rounds = 0
+
+    def net_values(bidders):
+        if candidates is None:
+            return benefit[bidders] - prices
+        return benefit[bidders] - prices[candidates[bidders]]
+
+    def run_bidding(unassigned):
+        nonlocal rounds
+        while len(unassigned) and rounds < max_rounds:
+            rounds += 1
+            values = net_values(unassigned)
+            rows = np.arange(len(unassigned))
+            best = np.argmax(values, axis=1)
+            best_value = values[rows, best]
+            if width > 1:
+                values[rows, best] = -np.inf
+                second_value = values.max(axis=1)
+            else:
+                second_value = best_value
+            best_task = best if candidates is None else candidates[unassigned, best]
+            bids = prices[best_task] + (best_value - second_value) + eps
+
+            # Highest bid per task wins; its previous owner becomes unassigned
+            order = np.lexsort((-bids, best_task))
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = best_task[order[1:]] != best_task[order[:-1]]
+            winners = order[first]
+            won = best_task[winners]
+            displaced = owner[won]
+            assigned[displaced[displaced >= 0]] = -1
+            owner[won] = unassigned[winners]
+            assigned[unassigned[winners]] = won
+            prices[won] = bids[winners]
+            unassigned = np.flatnonzero(assigned < 0)
+        return unassigned
+
+    while True:
+        owner[:] = -1
+        assigned[:] = -1
+        unassigned = run_bidding(np.arange(n))
+        if rounds >= max_rounds:
+            break
+        if n < m:
+            # Every phase, so surplus prices never drift far above the rest
+            _reverse_cleanup(benefit, candidates, prices, owner, assigned, eps, benefit_row)
+        if eps <= final_eps:
+            break
+        eps = max(eps / 5.0, final_eps)
+
+    # Round limit reached: give the remaining bidders their best free task
+    for i in unassigned:
+        free = np.flatnonzero(owner < 0)
+        j = free[np.argmax(benefit_row(i)[free])]
+        owner[j] = i
+        assigned[i] = j
+
+    if n < m:
+        if rounds >= max_rounds:
+            _reverse_cleanup(benefit, candidates, prices, owner, assigned, eps, benefit_row)
+        # Surplus prices are now at most the lowest assigned price; shifting
+        # that level to zero keeps prices >= 0 and tightens the dual bound
+        prices = np.maximum(prices - prices[owner < 0].max(), 0.0)
+    return assigned, prices
+
+
+def _reverse_cleanup(benefit, candidates, prices, owner, assigned, eps, benefit_row):
+    """
+    Reverse auction iterations for n < m (Bertsekas & Castanon, 1992).
+    Surplus tasks keep prices from earlier bidding, which can exceed
+    the lowest assigned price and break the optimality conditions. Each such
+    task either bids for the bidder that profits most from it (freeing that
+    bidder's task) or drops its price to that lowest price. Updates prices,
+    owner and assigned in place.
+    """
+    n = len(assigned)
+    rows = np.arange(n)
+    if candidates is None:
+        def column(j):
+            return rows, benefit[:, j]
+    else:
+        flat = candidates.ravel()
+        by_task = np.argsort(flat, kind="stable")
+        bounds = np.searchsorted(flat[by_task], np.arange(len(prices) + 1))
+        flat_benefit = benefit.ravel()
+
+        def column(j):
+            edges = by_task[bounds[j]:bounds[j + 1]]
+            return edges // candidates.shape[1], flat_benefit[edges]
+
+    floor = prices[owner >= 0].min()
+    if candidates is None:
+        profit = benefit[rows, assigned] - prices[assigned]
+    else:
+        profit = np.where(candidates == assigned[:, np.newaxis], benefit, -np.inf).max(axis=1) - prices[assigned]
+        # Bidders placed by the round-limit fallback may hold a non-candidate task
+        for i in np.flatnonzero(np.isneginf(profit)):
+            profit[i] = benefit_row(i)[assigned[i]] - prices[assigned[i]]
+    pending = list(np.flatnonzero((owner < 0) & (prices > floor)))
+    while pending:
+        j = pending.pop()
+        bidders, values = column(j)
+        if not len(bidders):
+            prices[j] = floor
+            continue
+        values = values - profit[bidders]
+        best = int(np.argmax(values))
+        best_value = values[best]
+        if best_value - eps <= floor:
+            prices[j] = floor
+            continue
+        values[best] = -np.inf
+        second_value = values.max() if len(values) > 1 else -np.inf
+        i = bidders[best]
+        prices[j] = max(floor, second_value - eps)
+        previous = assigned[i]
+        owner[previous] = -1
+        owner[j] = i
+        assigned[i] = j
+        profit[i] = best_value + profit[i] - prices[j]
+        if prices[previous] > floor:
+            pending.append(previous)
+
+
+def anytime_assignment(cost_matrix, deadline, maximize=False, block_rows=256):
+    """
+    Best assignment found before a deadline: greedy, then local improvement.
+    Args:
+        cost_matrix: dense (n_workers, n_tasks) array
+        deadline: time.perf_counter() value to stop improving at. Past it, only
+                  one O(n*m) pass runs to complete the assignment
+        maximize: If True, maximize the total; if False, minimize
+        block_rows: workers whose swaps are scored per improvement step
+    Returns:
+        (worker_indices, task_indices, optimality_gap, optimal), sorted by worker;
+        optimality_gap is None when the deadline left no time for a bound
+    """
+    cost_matrix = np.asarray(cost_matrix, dtype=np.float64)
+    benefit = cost_matrix if maximize else -cost_matrix
+    transposed = benefit.shape[0] > benefit.shape[1]
+    if transposed:
+        benefit = benefit.T
+    n, m = benefit.shape
+    if n == 0:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp), 0.0, True
+
+    tasks = _greedy(benefit, deadline)
+    # Three quarters of the remaining time for swaps, the rest for the bound
+    now = time.perf_counter()
+    _improve(benefit, tasks, now + 0.75 * max(deadline - now, 0.0), block_rows)
+    worker_indices, task_indices, _ = _oriented(tasks, transposed)
+    if time.perf_counter() >= deadline:
+        return worker_indices, task_indices, None, False
+    primal = benefit[np.arange(n), tasks].sum()
+    upper = _subgradient_bound(benefit, primal, deadline)
+    gap = max(float(upper - primal), 0.0)
+    scale = max(np.abs(primal), 1.0)
+    return worker_indices, task_indices, gap, bool(gap <= 1e-9 * scale)
+
+
+def _greedy(benefit, deadline):
+    """
+    Rounds of mutual choice: every free bidder picks its best free task and
+    every picked task keeps its best bidder. Bidders still free when the
+    deadline passes are matched to the free tasks by rank of their mean
+    benefit, which is exact for rank-1 benefits and needs one more pass.
+    """
+    n, m = benefit.shape
+    tasks = np.full(n, -1, dtype=np.intp)
+    free_tasks = np.ones(m, dtype=bool)
+    free = np.arange(n)
+    while len(free) and time.perf_counter() < deadline:
+        columns = np.flatnonzero(free_tasks)
+        values = benefit[np.ix_(free, columns)]
+        choice = values.argmax(axis=1)
+        best = values[np.arange(len(free)), choice]
+        # Highest bid per chosen task wins
+        order = np.lexsort((-best, choice))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = choice[order[1:]] != choice[order[:-1]]
+        winners = order[first]
+        tasks[free[winners]] = columns[choice[winners]]
+        free_tasks[columns[choice[winners]]] = False
+        free = np.delete(free, winners)
+    if len(free):
+        columns = np.flatnonzero(free_tasks)
+        # Skip the copy when the deadline passed before the first round
+        values = benefit if len(free) == n else benefit[np.ix_(free, columns)]
+        bidders = free[np.argsort(-values.mean(axis=1), kind="stable")]
+        tasks[bidders] = columns[np.argsort(-values.mean(axis=0), kind="stable")][:len(free)]
+    return tasks
+
+
+def _improve(benefit, tasks, deadline, block_rows):
+    """
+    Pairwise swaps (two bidders exchange tasks) and moves to free tasks,
+    block by block, until a full pass finds nothing or the deadline passes.
+    """
+    n, m = benefit.shape
+    rows = np.arange(n)
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for start in range(0, n, block_rows):
+            if time.perf_counter() >= deadline:
+                return
+            block = rows[start:start + block_rows]
+            own = benefit[rows, tasks]
+            # gain[i, k]: bidder i takes k's task and k takes i's
+            gain = (benefit[np.ix_(block, tasks)] + benefit[np.ix_(rows, tasks[block])].T
+                    - own[block, np.newaxis] - own)
+            if m > n:
+                free = np.ones(m, dtype=bool)
+                free[tasks] = False
+                free = np.flatnonzero(free)
+                values = benefit[np.ix_(block, free)]
+                move = values.argmax(axis=1)
+                move_gain = values[np.arange(len(block)), move] - own[block]
+            partner = gain.argmax(axis=1)
+            for offset, i in enumerate(block):
+                k = partner[offset]
+                if m > n and move_gain[offset] > max(gain[offset, k], 0.0) + 1e-12:
+                    task = free[move[offset]]
+                    if not (tasks == task).any():
+                        tasks[i] = task
+                        improved = True
+                        continue
+                if gain[offset, k] <= 1e-12:
+                    continue
+                # Earlier swaps in this block may have changed either bidder
+                delta = (benefit[i, tasks[k]] + benefit[k, tasks[i]]
+                         - benefit[i, tasks[i]] - benefit[k, tasks[k]])
+                if delta > 1e-12:
+                    tasks[i], tasks[k] = tasks[k], tasks[i]
+                    improved = True
+
+
+def _subgradient_bound(benefit, primal, deadline, max_steps=100):
+    """
+    Smallest dual bound (see _dual_bound) over subgradient steps on the
+    prices, starting from p = 0 and stopping at the deadline. Steps are
+    Polyak's, aimed at the primal total, halved whenever the bound stalls.
+    """
+    n, m = benefit.shape
+    prices = np.zeros(m)
+    best = np.inf
+    scale = 1.0
+    for _ in range(max_steps):
+        reduced = benefit - prices
+        choice = reduced.argmax(axis=1)
+        bound = reduced[np.arange(n), choice].sum() + prices.sum()
+        if bound < best:
+            best = bound
+        else:
+            scale /= 2
+        if bound <= primal or time.perf_counter() >= deadline:
+            break
+        # d bound / d p_j = 1 - (bidders choosing j); prices stay >= 0
+        gradient = 1.0 - np.bincount(choice, minlength=m)
+        if not gradient.any():
+            # Every task chosen exactly once: the choices are a matching, the bound is tight
+            break
+        prices = np.maximum(prices - scale * (bound - primal) / (gradient @ gradient) * gradient, 0.0)
+    return best
+
+
+def _dual_bound(benefit_rows, n, prices, block_rows=2048):
+    """
+    Upper bound on the optimal total benefit certified by prices p >= 0:
+    sum_i max_j (benefit[i, j] - p_j) + sum_j p_j
+    """
+    total = prices.sum()
+    for start in range(0, n, block_rows):
+        total += (benefit_rows(start, min(start + block_rows, n)) - prices).max(axis=1).sum()
+    return total
+
+
+def _oriented(tasks, transposed):
+    """
+    Bidder -> task assignment as (worker_indices, task_indices, order) sorted
+    by worker; order maps the result back to bidder positions.
+    """
+    bidders = np.arange(len(tasks))
+    if not transposed:
+        return bidders, tasks, bidders
+    order = np.argsort(tasks, kind="stable")
+    return tasks[order], bidders[order], order
@@ -0,0 +1,312 @@
+# src/models/assignment_session.py
+"""
+Stateful Stage 2 assignment for a stream of workers (patients) that arrive,
+leave and get rescored while the set of tasks stays fixed.
+
+A session keeps the optimal assignment together with its Hungarian dual
+potentials u (workers) and v (tasks). Every change touches a single row of
+the cost matrix, and after it all other matched cells are still tight
+(u[i] + v[j] == cost[i, j]) and every cell still has a non-negative reduced
+cost, so one shortest augmenting path (Dijkstra on reduced costs, the step
+the Hungarian algorithm repeats n times from scratch) restores optimality in
+O(n^2) instead of an O(n^3) re-solve.
+
+The problem is kept square: with fewer workers than tasks the spare rows are
+dummy workers, and with more workers than tasks dummy tasks are added, both
+at cost 0. That has the same optimum as the rectangular problem
+linear_sum_assignment solves, and it lets a worker be added or removed by
+growing or shrinking the padded matrix by one row and one column.
+
+Costs come from the registered cost function evaluated on the session's
+current scores, exactly as in TwoStageModel.assign, and only the rows whose
+costs actually changed are repaired. Cost functions whose rows depend only
+on the worker's own score therefore repair just the workers touched. The
+default cost's task weights depend on the number of workers, so with it
+adding or removing a worker changes every row and the repair becomes a full
+re-solve.
+
+    session = AssignmentSession(n_tasks=10, maximize=True)
+    ids = session.apply(add=[0.9, 0.4, 0.7])
+    session.apply(remove=[ids[1]], update={ids[0]: 0.2})
+    session.result()["worker_task_pairs"]
+"""
+
+import numpy as np
+
+from src.models.cost_functions import DEFAULT_COST_FUNCTION, build_cost_matrix
+
+
+class AssignmentSession:
+    """Optimal assignment of a changing set of scored workers to fixed tasks"""
+
+    def __init__(self, n_tasks, maximize=False, cost_function=DEFAULT_COST_FUNCTION):
+        """
+        Args:
+            n_tasks: number of tasks/slots, fixed for the session
+            maximize: If True, maximize the total; if False, minimize
+            cost_function: registered name or callable, as in build_cost_matrix
+        """
+        if n_tasks < 1:
+            raise ValueError("n_tasks must be at least 1")
+        self.n_tasks = int(n_tasks)
+        self.maximize = maximize
+        self.cost_function = cost_function
+        self._scores = {}    # worker id -> score, in insertion order
+        self._slot = {}      # worker id -> row of the padded problem
+        self._next_id = 0
+        self.augmentations = 0
+
+        # Padded square problem of size max(n_workers, n_tasks); every row
+        # starts as a dummy matched to its own task with zero potentials
+        self._size = self.n_tasks
+        self._allocate(max(self.n_tasks, 16))
+        self._col4row[:self._size] = np.arange(self._size)
+        self._row4col[:self._size] = np.arange(self._size)
+
+    def _allocate(self, capacity):
+        costs = np.zeros((capacity, capacity))
+        u, v = np.zeros(capacity), np.zeros(capacity)
+        col4row, row4col = np.full(capacity, -1), np.full(capacity, -1)
+        worker_of_row = np.full(capacity, -1)
+        if hasattr(self, "_costs"):
+            n = self._size
+            costs[:n, :n] = self._costs[:n, :n]
+            u[:n], v[:n] = self._u[:n], self._v[:n]
+            col4row[:n], row4col[:n] = self._col4row[:n], self._row4col[:n]
+            worker_of_row[:n] = self._worker_of_row[:n]
+        self._costs, self._u, self._v = costs, u, v
+        self._col4row, self._row4col = col4row, row4col
+        self._worker_of_row = worker_of_row  # -1 for dummy rows
+
+    def __len__(self):
+        return len(self._scores)
+
+    @property
+    def worker_ids(self):
+        return list(self._scores)
+
+    @property
+    def scores(self):
+        return list(self._scores.values())
+
+    def apply(self, add=(), remove=(), update=None):
+        """
+        Add, remove and rescore workers, then repair the assignment.
+        Args:
+            add: scores of new workers (appended in order)
+            remove: ids of workers to remove
+            update: {worker id: new score}
+        Returns:
+            ids given to the added workers
+        """
+        update = update or {}
+        remove = set(remove)
+        unknown = [i for i in list(remove) + list(update) if i not in self._scores]
+        if unknown:
+            raise ValueError(f"Unknown worker ids: {sorted(set(unknown))}")
+
+        new_ids = list(range(self._next_id, self._next_id + len(add)))
+        ids = [i for i in self._scores if i not in remove] + new_ids
+        scores = [update.get(i, self._scores.get(i)) for i in ids[:len(ids) - len(new_ids)]] + list(add)
+        rows = None
+        if ids:
+            sign = -1.0 if self.maximize else 1.0
+            rows = sign * build_cost_matrix(np.asarray(scores, dtype=np.float64), self.n_tasks,
+                                            self.cost_function)
+            if not np.isfinite(rows).all():
+                raise ValueError("Cost matrix contains non-finite values")
+
+        m = self.n_tasks
+        kept = len(ids) - len(new_ids)
+        kept_rows = np.asarray([self._slot[worker] for worker in ids[:kept]], dtype=np.intp)
+        changed = (self._costs[kept_rows, :m] != rows[:kept]).any(axis=1) if kept else np.zeros(0, dtype=bool)
+        self._next_id += len(add)
+        if 2 * (changed.sum() + len(new_ids)) > len(ids):
+            # Mostly new costs: a fresh solve beats one augmentation per row
+            self._solve(ids, rows)
+            self._scores = dict(zip(ids, scores))
+            return new_ids
+
+        for worker in remove:
+            self._remove_row(self._slot.pop(worker))
+            del self._scores[worker]
+        for k in np.flatnonzero(changed):
+            self._set_row(self._slot[ids[k]], rows[k])
+        for k in range(kept, len(ids)):
+            self._slot[ids[k]] = self._add_row(rows[k], ids[k])
+        self._scores = dict(zip(ids, scores))
+        return new_ids
+
+    def result(self):
+        """
+        Returns:
+            Assignment dictionary like TwoStageModel.hungarian_assignment,
+            with worker ids in place of row indices
+        """
+        m = self.n_tasks
+        pairs = []
+        total = 0.0
+        for worker, row in self._slot.items():
+            task = int(self._col4row[row])
+            if task < m:
+                pairs.append((worker, task))
+                total += self._costs[row, task]
+        return {
+            "worker_task_pairs": sorted(pairs),
+            "total_cost": float(-total if self.maximize else total),
+            "cost_matrix": None,
+            "solver": "incremental",
+            "optimality_gap": 0.0,
+            "optimal": True,
+        }
+
+    def _solve(self, ids, rows):
+        """
+        Solve from scratch with linear_sum_assignment, then recover dual
+        potentials from the optimal assignment: v[j] is the shortest distance
+        to task j in the residual graph (worker i -> task j at cost[i, j],
+        task -> its worker at minus the matched cost), found by Bellman-Ford
+        passes over the whole matrix. The optimum has no negative cycles, so
+        the passes converge, usually after a few dozen.
+        """
+        from scipy.optimize import linear_sum_assignment
+
+        m = self.n_tasks
+        n = max(len(ids), m)
+        if n > len(self._u):
+            self._allocate(n)
+        self._size = n
+        self._costs[:n, :n] = 0.0
+        if ids:
+            self._costs[:len(ids), :m] = rows
+        self._worker_of_row[:n] = -1
+        self._worker_of_row[:len(ids)] = ids
+        self._slot = {worker: row for row, worker in enumerate(ids)}
+
+        costs = self._costs[:n, :n]
+        _, tasks = linear_sum_assignment(costs)
+        self._col4row[:n] = tasks
+        self._row4col[tasks] = np.arange(n)
+        matched = costs[np.arange(n), tasks]
+        distance = np.zeros(n)
+        for _ in range(n):
+            relaxed = np.minimum(distance, ((distance[tasks] - matched)[:, np.newaxis] + costs).min(axis=0))
+            if np.array_equal(relaxed, distance):
+                break
+            distance = relaxed
+        self._v[:n] = distance
+        self._u[:n] = matched - distance[tasks]
+
+    def _set_row(self, row, costs):
+        """Replace one row's costs (a padded row of length n_tasks) and re-augment"""
+        n = self._size
+        self._unmatch(row)
+        self._costs[row, :self.n_tasks] = costs
+        self._costs[row, self.n_tasks:n] = 0.0
+        # Lowest potential keeping the row's reduced costs non-negative
+        self._u[row] = (self._costs[row, :n] - self._v[:n]).min()
+        self._augment(row)
+
+    def _add_row(self, costs, worker):
+        """Place a worker in a dummy row, or grow the problem by one row and one dummy task"""
+        n = self._size
+        dummies = np.flatnonzero(self._worker_of_row[:n] < 0)
+        if len(dummies):
+            row = int(dummies[0])
+        else:
+            if n == len(self._u):
+                self._allocate(2 * n)
+            row = n
+            self._size = n + 1
+            self._costs[:n + 1, n] = 0.0
+            self._v[n] = -self._u[:n].max() if n else 0.0
+            self._col4row[row] = self._row4col[n] = -1
+        self._worker_of_row[row] = worker
+        self._set_row(row, costs)
+        return row
+
+    def _remove_row(self, row):
+        """Drop a worker: back to a dummy row, or shrink the problem if tasks are padded"""
+        n = self._size
+        m = self.n_tasks
+        self._unmatch(row)
+        self._worker_of_row[row] = -1
+        if n <= m:
+            self._set_row(row, np.zeros(m))
+            return
+
+        # Drop the last row and the last (dummy) task: move the last row into
+        # the freed slot and re-augment whichever row lost its task
+        last = n - 1
+        self._unmatch(self._row4col[last])
+        if row != last:
+            self._costs[row, :n] = self._costs[last, :n]
+            self._u[row] = self._u[last]
+            task = self._col4row[last]
+            self._col4row[row] = task
+            if task >= 0:
+                self._row4col[task] = row
+            worker = self._worker_of_row[last]
+            self._worker_of_row[row] = worker
+            self._slot[int(worker)] = row
+        self._col4row[last] = self._row4col[last] = self._worker_of_row[last] = -1
+        self._size = last
+        for free in np.flatnonzero(self._col4row[:last] < 0):
+            self._augment(int(free))
+
+    def _unmatch(self, row):
+        if row < 0:
+            return
+        task = self._col4row[row]
+        if task >= 0:
+            self._row4col[task] = -1
+        self._col4row[row] = -1
+
+    def _augment(self, start):
+        """
+        Shortest augmenting path from an unmatched row to a free task on
+        reduced costs, then the potential update that keeps every reduced
+        cost non-negative (as in scipy's linear_sum_assignment).
+        """
+        n = self._size
+        costs, u, v = self._costs, self._u, self._v[:n]
+        row4col, col4row = self._row4col[:n], self._col4row
+        # Tentative distances of unscanned tasks; NaN marks scanned ones, so
+        # they never compare smaller and fmin skips them
+        remaining = np.full(n, np.inf)
+        shortest = np.zeros(n)
+        path = np.full(n, -1)
+        scanned = np.zeros(n, dtype=bool)
+        visited = []
+        min_value = 0.0
+        row = start
+        while True:
+            visited.append(row)
+            reduced = costs[row, :n] - v
+            reduced += min_value - u[row]
+            better = reduced < remaining
+            remaining[better] = reduced[better]
+            path[better] = row
+            min_value = np.fmin.reduce(remaining)
+            ties = np.flatnonzero(remaining == min_value)
+            free = ties[row4col[ties] < 0]
+            task = int(free[0] if len(free) else ties[0])
+            shortest[task] = min_value
+            remaining[task] = np.nan
+            scanned[task] = True
+            if row4col[task] < 0:
+                break
+            row = int(row4col[task])
+
+        u[start] += min_value
+        others = np.asarray(visited[1:], dtype=np.intp)
+        u[others] += min_value - shortest[col4row[others]]
+        v[scanned] -= min_value - shortest[scanned]
+
+        while True:
+            row = path[task]
+            row4col[task] = row
+            col4row[row], task = task, col4row[row]
+            if row == start:
+                break
+        self.augmentations += 1
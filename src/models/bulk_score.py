@@ -0,0 +1,187 @@
+# src/models/bulk_score.py
+"""
+Offline bulk scoring of a large CSV/Parquet file with the two-stage model
+(Stage 1 only), without going through the API.
+
+The input is read in fixed-size chunks, scaled with the preprocessing config
+and fanned out to a process pool; each worker loads TwoStageModel once and
+writes its chunk as one Parquet part file:
+
+    OUT_DIR/part-000000.parquet, part-000001.parquet, ...
+    OUT_DIR/_run.json  (input, chunk size, model and column order of the run)
+
+A part file only appears once its chunk is complete (written to a temporary
+name, then renamed), so an interrupted run resumes by skipping every chunk
+whose part already exists. At most 2 * workers chunks are in flight, which
+bounds memory regardless of input size.
+
+    python src/models/bulk_score.py --model src/models/model.pkl \
+        --config configs/preprocess_config.json --input big.csv --out scores/
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+# Run as a script: put the repository root on the path so the model modules
+# import under their package name, src.models.*
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from src.models.two_stage_model import TwoStageModel  # noqa: E402
+
+RUN_FILE = "_run.json"
+
+# Model held by each worker process
+_worker_model = None
+
+
+def _init_worker(model_path, engine):
+    global _worker_model
+    _worker_model = TwoStageModel.from_artifact(model_path, engine=engine)
+
+
+def _score_chunk(chunk_index, first_row, X, ids, out_dir):
+    """Score one chunk and write it as a part file; returns (chunk_index, n_rows)"""
+    probs, labels = _worker_model.predict_probabilities_and_labels(X)
+    result = pd.DataFrame({
+        "row": np.arange(first_row, first_row + len(X), dtype=np.int64),
+        "prediction": np.asarray(labels, dtype=np.int64),
+        "probability": probs[:, 1] if probs.shape[1] > 1 else probs[:, 0],
+    })
+    if ids is not None:
+        result.insert(0, ids.name, ids.to_numpy())
+
+    path = part_path(out_dir, chunk_index)
+    tmp_path = path + ".tmp"
+    result.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return chunk_index, len(X)
+
+
+def part_path(out_dir, chunk_index):
+    return os.path.join(out_dir, f"part-{chunk_index:06d}.parquet")
+
+
+def iter_chunks(input_path, columns, chunk_size):
+    """Yield DataFrames of at most chunk_size rows with only the given columns"""
+    if input_path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(input_path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(input_path, usecols=columns, chunksize=chunk_size)
+
+
+def load_preprocessing(config_path):
+    """(numeric_cols, scaler_mean, scaler_scale) from preprocess_config.json"""
+    with open(config_path, "r") as f:
+        config = json.load(f)
+    mean = np.asarray(config.get("scaler_mean", []), dtype=np.float64)
+    scale = np.asarray(config.get("scaler_scale", []), dtype=np.float64)
+    if mean.size == 0:
+        mean = scale = None
+    return config["numeric_cols"], mean, scale
+
+
+def check_run(out_dir, run):
+    """Write the run description, or verify a resumed run matches it"""
+    path = os.path.join(out_dir, RUN_FILE)
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            previous = json.load(f)
+        if previous != run:
+            raise ValueError(
+                f"{out_dir} holds a run with different settings ({previous}); "
+                f"use the same arguments to resume or a new --out directory"
+            )
+        return
+    with open(path, "w") as f:
+        json.dump(run, f, indent=2)
+
+
+def main(model_path, config_path, input_path, out_dir, chunk_size=100000,
+         workers=None, engine="sklearn", id_col=None):
+    os.makedirs(out_dir, exist_ok=True)
+    numeric_cols, mean, scale = load_preprocessing(config_path)
+    check_run(out_dir, {
+        "input": os.path.abspath(input_path),
+        "model": os.path.abspath(model_path),
+        "chunk_size": chunk_size,
+        "numeric_cols": numeric_cols,
+        "id_col": id_col,
+    })
+
+    workers = workers or os.cpu_count() or 1
+    columns = numeric_cols + ([id_col] if id_col else [])
+    started = time.perf_counter()
+    scored_rows = skipped_chunks = 0
+    first_row = 0
+    in_flight = set()
+
+    def collect():
+        # Wait for at least one in-flight chunk and report progress
+        nonlocal scored_rows, in_flight
+        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            chunk_index, n_rows = future.result()
+            scored_rows += n_rows
+            elapsed = time.perf_counter() - started
+            print(f"✓ chunk {chunk_index}: {scored_rows} rows scored, {scored_rows / elapsed:,.0f} rows/s")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model_path, engine)) as pool:
+        for chunk_index, chunk in enumerate(iter_chunks(input_path, columns, chunk_size)):
+            n_rows = len(chunk)
+            if os.path.exists(part_path(out_dir, chunk_index)):
+                # Completed by an earlier run
+                skipped_chunks += 1
+                first_row += n_rows
+                continue
+
+            # Same operation order as StandardScaler.transform
+            X = chunk[numeric_cols].to_numpy(dtype=np.float64)
+            if mean is not None:
+                X -= mean
+                X /= scale
+            ids = chunk[id_col] if id_col else None
+
+            while len(in_flight) >= 2 * workers:
+                collect()
+            in_flight.add(pool.submit(_score_chunk, chunk_index, first_row, X, ids, out_dir))
+            first_row += n_rows
+
+        while in_flight:
+            collect()
+
+    elapsed = time.perf_counter() - started
+    if skipped_chunks:
+        print(f"↻ Resumed: skipped {skipped_chunks} chunks completed by an earlier run")
+    print(f"✓ Scored {scored_rows} rows in {elapsed:.1f}s "
+          f"({scored_rows / elapsed if elapsed > 0 else 0:,.0f} rows/s) -> {out_dir}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--config", required=True, help="preprocess_config.json")
+    parser.add_argument("--input", required=True, help="CSV or .parquet file")
+    parser.add_argument("--out", required=True, help="output directory of Parquet part files")
+    parser.add_argument("--chunk-size", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--engine", default="sklearn", choices=["sklearn", "compiled"])
+    parser.add_argument("--id-col", default=None, help="input column copied to the output")
+    args = parser.parse_args()
+
+    try:
+        main(args.model, args.config, args.input, args.out, args.chunk_size,
+             args.workers, args.engine, args.id_col)
+    except ValueError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
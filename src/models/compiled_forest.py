@@ -0,0 +1,420 @@
+# src/models/compiled_forest.py
+"""
+Compiled tree-ensemble inference engine for Stage 1.
+
+Flattens every tree of a fitted sklearn RandomForestClassifier into a single
+set of contiguous NumPy arrays (feature, threshold, left, right, leaf value)
+and scores a whole batch with a vectorized level-by-level traversal. One pass
+returns both class probabilities and labels, without sklearn's per-estimator
+dispatch and input validation.
+
+A compiled forest can be saved as a directory of raw `.npy` arrays plus a
+JSON manifest. Loading it with `mmap_mode="r"` maps the tree arrays read-only
+from the page cache, so every worker process on a host shares one physical
+copy of the model instead of unpickling a private one.
+
+The "compact" layout (format version 2) shrinks the artifact further:
+- thresholds are stored as float32, rounded down. sklearn compares float32
+  features against them, and for a float32 x, x <= t exactly when
+  x <= round_down_to_float32(t), so split decisions stay bit-exact.
+- feature and child indices use the smallest of int16/int32 that fits.
+- class distributions are stored for leaves only, in float32 by default.
+- the manifest records a sha256 per file, verified on load.
+- the arrays can optionally be written into one compressed .npz, which is
+  smaller but read into memory instead of memory-mapped.
+
+fold_scaler() rewrites the thresholds of a forest trained on standardized
+features so it scores raw features directly. The standardize-then-round map
+x -> float32((x - mean) / scale) is monotone in x, so each split
+float32(z) <= t is exactly x <= r for the largest float64 r that still
+satisfies it. That r is found by bisection over the float64 bit patterns.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+FORMAT_NAME = "compiled_forest"
+FORMAT_VERSION = 2
+MANIFEST_FILE = "manifest.json"
+COMPRESSED_FILE = "arrays.npz"
+ARRAY_NAMES = ("feature", "threshold", "left", "right", "value", "roots", "classes")
+
+
+class CompiledForest:
+    """Array-backed copy of a fitted RandomForestClassifier"""
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes, max_depth,
+                 n_features=None, leaf_index=None):
+        """
+        Args:
+            feature: (n_nodes,) split feature per node (0 for leaves)
+            threshold: (n_nodes,) split threshold per node (+inf for leaves)
+            left: (n_nodes,) global index of the left child (self for leaves)
+            right: (n_nodes,) global index of the right child (self for leaves)
+            value: (n_nodes, n_classes) normalized class distribution per node,
+                   or (n_leaves, n_classes) for leaves only when leaf_index is given
+            roots: (n_trees,) global index of each tree's root node
+            classes: class labels, in the column order of `value`
+            max_depth: deepest tree in the ensemble
+            n_features: number of input features the forest was trained on
+            leaf_index: (n_nodes,) row of `value` for each leaf (compact layout)
+        """
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes = np.asarray(classes)
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features) if n_features is not None else None
+        self.leaf_index = leaf_index
+        # Set by fold_scaler(): thresholds are compared against float64 raw features
+        self.raw_input = False
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @classmethod
+    def from_sklearn(cls, rf_model):
+        """
+        Build a compiled forest from a fitted RandomForestClassifier.
+        Args:
+            rf_model: fitted sklearn RandomForestClassifier (single output)
+        Returns:
+            CompiledForest
+        """
+        if not hasattr(rf_model, "estimators_"):
+            raise ValueError("Random Forest is not fitted; nothing to compile.")
+        if getattr(rf_model, "n_outputs_", 1) != 1:
+            raise ValueError("Compiled engine only supports single-output forests.")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in rf_model.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(offset, offset + n_nodes, dtype=np.intp)
+            is_leaf = tree.children_left == -1
+
+            # Leaves point at themselves so extra traversal steps are no-ops
+            left = np.where(is_leaf, node_ids, tree.children_left + offset)
+            right = np.where(is_leaf, node_ids, tree.children_right + offset)
+            feature = np.where(is_leaf, 0, tree.feature)
+            threshold = np.where(is_leaf, np.inf, tree.threshold)
+
+            # Same normalization sklearn applies in DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            value = value / normalizer
+
+            features.append(feature)
+            thresholds.append(threshold)
+            lefts.append(left)
+            rights.append(right)
+            values.append(value)
+            roots.append(offset)
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            left=np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp),
+            right=np.ascontiguousarray(np.concatenate(rights), dtype=np.intp),
+            value=np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            classes=rf_model.classes_,
+            max_depth=max_depth,
+            n_features=getattr(rf_model, "n_features_in_", None),
+        )
+
+    def save(self, path, feature_names=None, compact=False, compress=False, value_dtype=np.float32):
+        """
+        Write the forest as one raw .npy file per array plus manifest.json.
+        Args:
+            path: output directory (created if missing)
+            feature_names: optional list of input feature names
+            compact: write the compact layout (see the module docstring)
+            compress: compact only; one compressed arrays.npz instead of .npy files
+            value_dtype: compact only; dtype of the leaf class distributions
+        """
+        if compress and not compact:
+            raise ValueError("compress requires the compact layout")
+        if self.raw_input:
+            raise ValueError("A forest folded with a scaler cannot be saved; save the original forest")
+        os.makedirs(path, exist_ok=True)
+        if compact:
+            contents = self._compact_arrays(value_dtype)
+        else:
+            # Fixed width on disk regardless of the platform that wrote it
+            contents = {name: np.ascontiguousarray(getattr(self, name)) for name in ARRAY_NAMES}
+            contents = {name: array.astype(np.int64) if array.dtype == np.intp else array
+                        for name, array in contents.items()}
+
+        arrays, files = {}, {}
+        for name, array in contents.items():
+            arrays[name] = {"dtype": array.dtype.str, "shape": list(array.shape)}
+        if compress:
+            np.savez_compressed(os.path.join(path, COMPRESSED_FILE), **contents)
+            files[COMPRESSED_FILE] = _sha256(os.path.join(path, COMPRESSED_FILE))
+        else:
+            for name, array in contents.items():
+                np.save(os.path.join(path, f"{name}.npy"), array, allow_pickle=False)
+                files[f"{name}.npy"] = _sha256(os.path.join(path, f"{name}.npy"))
+
+        manifest = {
+            "format": FORMAT_NAME,
+            "format_version": FORMAT_VERSION if compact else 1,
+            "layout": "compact" if compact else "full",
+            "compressed": bool(compress),
+            "n_trees": self.n_trees,
+            "n_nodes": self.n_nodes,
+            "max_depth": self.max_depth,
+            "n_features": self.n_features,
+            "feature_names": list(feature_names) if feature_names is not None else None,
+            "arrays": arrays,
+            "sha256": files,
+        }
+        with open(os.path.join(path, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+    def _compact_arrays(self, value_dtype):
+        """Arrays of the compact layout, from a forest in any layout"""
+        is_leaf = self.left == np.arange(self.n_nodes)
+        threshold = np.asarray(self.threshold, dtype=np.float64)
+        rounded = threshold.astype(np.float32)
+        # Round toward -inf, so x <= rounded exactly when x <= threshold for float32 x
+        above = rounded.astype(np.float64) > threshold
+        rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+        value = self.value if self.leaf_index is None else self.value[self.leaf_index]
+        return {
+            "feature": self.feature.astype(_index_dtype(max(self.n_features or 0, int(self.feature.max()) + 1))),
+            "threshold": rounded,
+            "left": self.left.astype(_index_dtype(self.n_nodes)),
+            "right": self.right.astype(_index_dtype(self.n_nodes)),
+            "value": np.ascontiguousarray(np.asarray(value)[is_leaf], dtype=value_dtype),
+            "roots": self.roots.astype(_index_dtype(self.n_nodes)),
+            "classes": np.asarray(self.classes),
+        }
+
+    @classmethod
+    def load(cls, path, mmap_mode="r", verify=True):
+        """
+        Open a forest written by save().
+        Args:
+            path: directory containing manifest.json and the .npy arrays
+            mmap_mode: passed to np.load; "r" shares read-only pages across
+                       processes, None reads private copies into memory
+                       (compressed artifacts are always read into memory)
+            verify: check the files against the manifest's sha256 checksums
+        Returns:
+            (CompiledForest, manifest dict)
+        """
+        manifest = read_manifest(path)
+        if verify:
+            for file_name, expected in manifest.get("sha256", {}).items():
+                if _sha256(os.path.join(path, file_name)) != expected:
+                    raise ValueError(f"Checksum mismatch for {file_name} in {path}; the artifact is corrupt")
+        if manifest.get("compressed"):
+            with np.load(os.path.join(path, COMPRESSED_FILE), allow_pickle=False) as archive:
+                arrays = {name: archive[name] for name in ARRAY_NAMES}
+        else:
+            arrays = {
+                name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode, allow_pickle=False)
+                for name in ARRAY_NAMES
+            }
+        if manifest.get("layout") == "compact":
+            # Leaves point at themselves; number them in node order
+            is_leaf = arrays["left"] == np.arange(len(arrays["left"]))
+            arrays["leaf_index"] = np.where(is_leaf, np.cumsum(is_leaf) - 1, 0).astype(np.int32)
+        forest = cls(
+            max_depth=manifest["max_depth"],
+            n_features=manifest.get("n_features"),
+            **arrays,
+        )
+        return forest, manifest
+
+    def fold_scaler(self, mean, scale):
+        """
+        Forest that takes raw features instead of standardized ones.
+        Args:
+            mean: per-feature mean subtracted before scoring (StandardScaler.mean_)
+            scale: per-feature divisor applied after it (StandardScaler.scale_)
+        Returns:
+            New CompiledForest whose predictions on raw X are bit-identical to
+            this forest's predictions on (X - mean) / scale
+        """
+        mean = np.asarray(mean, dtype=np.float64)
+        scale = np.asarray(scale, dtype=np.float64)
+        if not np.all(scale > 0):
+            raise ValueError("Scaler scales must be positive to fold them into thresholds")
+        internal = self.left != np.arange(self.n_nodes)
+        feature = self.feature[internal]
+        if self.n_features is not None and (mean.shape != (self.n_features,) or scale.shape != (self.n_features,)):
+            raise ValueError(f"Scaler has {mean.shape[0]} features but the forest expects {self.n_features}")
+        node_mean, node_scale = mean[feature], scale[feature]
+        threshold = np.asarray(self.threshold[internal], dtype=np.float64)
+
+        def goes_left(key):
+            with np.errstate(over="ignore", invalid="ignore"):
+                z = ((_key_to_float(key) - node_mean) / node_scale).astype(np.float32)
+            return z <= threshold
+
+        # Bisect for the largest finite x that still goes left: goes_left(lo) holds, goes_left(hi) does not
+        lo = np.full(len(threshold), _float_to_key(np.float64(-np.finfo(np.float64).max)))
+        hi = np.full(len(threshold), _float_to_key(np.float64(np.finfo(np.float64).max)))
+        always_left, never_left = goes_left(hi), ~goes_left(lo)
+        for _ in range(66):
+            mid = (lo >> 1) + (hi >> 1) + (lo & hi & 1)
+            left = goes_left(mid)
+            lo = np.where(left, mid, lo)
+            hi = np.where(left, hi, mid)
+        raw = _key_to_float(lo)
+        raw[always_left] = np.inf
+        raw[never_left] = -np.inf
+
+        folded_threshold = np.full(self.n_nodes, np.inf)
+        folded_threshold[internal] = raw
+        folded = CompiledForest(
+            feature=self.feature, threshold=folded_threshold, left=self.left, right=self.right,
+            value=self.value, roots=self.roots, classes=self.classes, max_depth=self.max_depth,
+            n_features=self.n_features, leaf_index=self.leaf_index,
+        )
+        folded.raw_input = True
+        return folded
+
+    def _as_float_matrix(self, X):
+        if self.raw_input:
+            # Folded thresholds already account for the float32 rounding
+            X = np.asarray(X, dtype=np.float64)
+            return X.reshape(1, -1) if X.ndim == 1 else X
+        # sklearn trees compare float32 features against float64 thresholds;
+        # round-trip through float32 so split decisions match exactly.
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if self.threshold.dtype == np.float32:
+            # Compact thresholds are already rounded for float32 comparison
+            return X
+        return X.astype(np.float64)
+
+    def apply(self, X, trees=None):
+        """
+        Route every sample through every tree.
+        Args:
+            X: Feature matrix (n_samples, n_features)
+            trees: optional slice of trees to evaluate (default: all)
+        Returns:
+            (n_samples, n_trees) array of global leaf indices
+        """
+        X = self._as_float_matrix(X)
+        n_samples, n_features = X.shape
+        flat_X = X.ravel()
+        roots = self.roots if trees is None else self.roots[trees]
+        nodes = np.broadcast_to(roots, (n_samples, len(roots))).copy()
+        # Row offsets into the flattened feature matrix
+        row_offsets = (np.arange(n_samples, dtype=np.intp) * n_features)[:, None]
+
+        for _ in range(self.max_depth):
+            x = flat_X.take(row_offsets + self.feature.take(nodes))
+            go_left = x <= self.threshold.take(nodes)
+            nodes = np.where(go_left, self.left.take(nodes), self.right.take(nodes))
+        return nodes
+
+    def predict_proba(self, X):
+        """
+        Args:
+            X: Feature matrix (n_samples, n_features)
+        Returns:
+            Probability matrix (n_samples, n_classes)
+        """
+        proba = self.accumulate_proba(X, slice(None), np.zeros((len(np.atleast_2d(X)), self.value.shape[1])))
+        proba /= self.n_trees
+        return proba
+
+    def accumulate_proba(self, X, trees, out):
+        """
+        Add the class distributions of a slice of trees to out, tree by tree
+        in estimator order (like sklearn), so summing consecutive slices gives
+        the same floats as one pass over all trees.
+        Args:
+            X: Feature matrix (n_samples, n_features)
+            trees: slice of trees to evaluate
+            out: (n_samples, n_classes) float64 running sums, updated in place
+        Returns:
+            out
+        """
+        leaves = self.apply(X, trees)
+        if self.leaf_index is not None:
+            leaves = self.leaf_index[leaves]
+        for t in range(leaves.shape[1]):
+            out += self.value[leaves[:, t]]
+        return out
+
+    def predict(self, X):
+        """
+        Score a batch in one pass.
+        Args:
+            X: Feature matrix (n_samples, n_features)
+        Returns:
+            Tuple of (probabilities (n_samples, n_classes), labels (n_samples,))
+        """
+        proba = self.predict_proba(X)
+        labels = self.classes.take(np.argmax(proba, axis=1), axis=0)
+        return proba, labels
+
+
+def _float_to_key(x):
+    """Map float64 values to int64 keys with the same ordering"""
+    bits = np.asarray(x, dtype=np.float64).view(np.int64)
+    return np.where(bits < 0, -(bits & np.int64(0x7FFFFFFFFFFFFFFF)) - 1, bits)
+
+
+def _key_to_float(key):
+    """Inverse of _float_to_key"""
+    key = np.asarray(key, dtype=np.int64)
+    bits = np.where(key < 0, (-key - 1) | np.int64(-0x8000000000000000), key)
+    return bits.view(np.float64)
+
+
+def _index_dtype(n):
+    """Smallest signed integer dtype holding 0..n-1"""
+    return np.int16 if n <= np.iinfo(np.int16).max + 1 else np.int32
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_compiled_artifact(path):
+    """True if path is a directory written by CompiledForest.save()"""
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, MANIFEST_FILE))
+
+
+def read_manifest(path):
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT_NAME:
+        raise ValueError(f"{path} is not a compiled forest artifact")
+    if manifest.get("format_version", 0) > FORMAT_VERSION:
+        raise ValueError(
+            f"Compiled forest format version {manifest['format_version']} is newer than "
+            f"supported version {FORMAT_VERSION}"
+        )
+    return manifest
@@ -0,0 +1,115 @@
+# src/models/cost_functions.py
+"""
+Stage 2 cost functions: how Stage 1 scores become an (n_workers, n_tasks)
+cost matrix for the assignment solver.
+
+A cost function takes the per-sample score vector and the number of tasks and
+returns the full matrix, built with broadcast NumPy expressions rather than
+per-cell Python loops. New schemes are added with @register_cost_function and
+selected by name:
+
+    @register_cost_function("flat")
+    def flat_cost(scores, n_tasks):
+        return np.repeat(scores[:, np.newaxis], n_tasks, axis=1)
+
+    model.assign(probs, labels, cost_function="flat")
+
+A cost function that is separable may also declare its structure, a function
+returning a SeparableCost (see assignment.py). Stage 2 then solves it by
+sorting without materializing the matrix:
+
+    @register_cost_function("flat", structure=lambda scores, n_tasks:
+                            SeparableCost(scores, np.ones(n_tasks)))
+"""
+
+import numpy as np
+
+from src.models.assignment import SeparableCost
+
+COST_FUNCTIONS = {}
+COST_STRUCTURES = {}
+DEFAULT_COST_FUNCTION = "default"
+
+
+def register_cost_function(name, structure=None):
+    """
+    Decorator registering fn(scores, n_tasks) -> cost matrix under name.
+    Args:
+        name: cost function name
+        structure: optional fn(scores, n_tasks) -> SeparableCost producing
+                   exactly the same cell values as the cost function
+    """
+    def decorator(fn):
+        COST_FUNCTIONS[name] = fn
+        if structure is not None:
+            COST_STRUCTURES[name] = structure
+        else:
+            COST_STRUCTURES.pop(name, None)
+        return fn
+    return decorator
+
+
+def get_cost_function(name):
+    try:
+        return COST_FUNCTIONS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown cost function '{name}' (available: {', '.join(sorted(COST_FUNCTIONS))})"
+        )
+
+
+def cost_structure(scores, n_tasks, cost_function=DEFAULT_COST_FUNCTION):
+    """
+    Returns:
+        SeparableCost declared for a registered cost function, or None
+    """
+    if callable(cost_function):
+        return None
+    get_cost_function(cost_function)  # raises for unknown names
+    structure = COST_STRUCTURES.get(cost_function)
+    if structure is None:
+        return None
+    return structure(np.asarray(scores, dtype=np.float64), n_tasks)
+
+
+def build_cost_matrix(scores, n_tasks, cost_function=DEFAULT_COST_FUNCTION):
+    """
+    Args:
+        scores: (n_workers,) Stage 1 likelihood scores
+        n_tasks: number of tasks/slots
+        cost_function: registered name or a callable fn(scores, n_tasks)
+    Returns:
+        float64 cost matrix (n_workers, n_tasks)
+    """
+    fn = cost_function if callable(cost_function) else get_cost_function(cost_function)
+    scores = np.asarray(scores, dtype=np.float64)
+    cost_matrix = np.asarray(fn(scores, n_tasks), dtype=np.float64)
+    if cost_matrix.shape != (len(scores), n_tasks):
+        raise ValueError(
+            f"Cost function returned shape {cost_matrix.shape}, expected {(len(scores), n_tasks)}"
+        )
+    return cost_matrix
+
+
+def _default_structure(scores, n_tasks):
+    n_workers = len(scores)
+    if n_workers == n_tasks:
+        return SeparableCost(scores * 0.5, np.ones(n_tasks), diagonal=scores)
+    return SeparableCost(scores, 1 - (np.arange(n_tasks) % n_workers) / n_workers)
+
+
+@register_cost_function(DEFAULT_COST_FUNCTION, structure=_default_structure)
+def default_cost(scores, n_tasks):
+    """
+    The original scheme. Square: scores on the diagonal, half the worker's
+    score everywhere else. Non-square: each score decays linearly with the
+    task index (modulo n_workers).
+    """
+    n_workers = len(scores)
+    if n_workers == n_tasks:
+        # Penalize non-diagonal cells
+        cost_matrix = np.repeat((scores * 0.5)[:, np.newaxis], n_tasks, axis=1)
+        np.fill_diagonal(cost_matrix, scores)
+        return cost_matrix
+    task_weights = 1 - (np.arange(n_tasks) % n_workers) / n_workers
+    return scores[:, np.newaxis] * task_weights[np.newaxis, :]
@@ -0,0 +1,117 @@
+# src/models/export_model.py
+"""
+Export a trained two-stage model (joblib pickle) to the compiled-forest
+artifact layout: one raw .npy file per tree array plus manifest.json.
+
+Serving workers open this layout with mmap_mode="r", so N workers on a host
+share a single physical copy of the tree data. Point MODEL_PATH at the output
+directory to use it.
+
+--compact writes the quantized layout (float32 thresholds, int16/int32
+indices, leaf-only class distributions) and --compress additionally packs it
+into one compressed .npz. Every export is checked against the original
+forest: predicted labels must be identical and probabilities within
+PROBABILITY_TOLERANCE, on rows placed at every split threshold of the forest
+plus the optional --check CSV; otherwise the export exits with status 1.
+
+    python src/models/export_model.py --model src/models/model.pkl --out src/models/model_compiled
+    python src/models/export_model.py --model src/models/model.pkl --out src/models/model_compact --compact
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Run as a script: put the repository root on the path so the model modules
+# import under their package name, src.models.*
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from src.models.two_stage_model import TwoStageModel  # noqa: E402
+
+# float32 leaf distributions differ from float64 by ~1e-8 per tree
+PROBABILITY_TOLERANCE = 1e-6
+
+
+def parity_rows(forest, n_random=2000, seed=0):
+    """
+    Rows that exercise the split decisions of the forest: every split
+    threshold of every feature, the float32 values just below and above it,
+    and random combinations of those values across features.
+    """
+    rng = np.random.default_rng(seed)
+    n_features = forest.n_features or int(forest.feature.max()) + 1
+    internal = forest.left != np.arange(forest.n_nodes)
+    columns = []
+    for f in range(n_features):
+        t = np.asarray(forest.threshold, dtype=np.float64)[internal & (forest.feature == f)].astype(np.float32)
+        if len(t) == 0:
+            t = np.zeros(1, dtype=np.float32)
+        columns.append(np.unique(np.concatenate([t, np.nextafter(t, np.float32(-np.inf)),
+                                                 np.nextafter(t, np.float32(np.inf))])))
+    # One row per candidate value of each feature, other features sampled
+    n_rows = n_random + sum(len(c) for c in columns)
+    X = np.column_stack([rng.choice(c, size=n_rows) for c in columns])
+    row = n_random
+    for f, c in enumerate(columns):
+        X[row:row + len(c), f] = c
+        row += len(c)
+    return X.astype(np.float64)
+
+
+def check_parity(model, out_dir, check_path=None):
+    """Compare the exported artifact with the original forest; returns (ok, message)"""
+    exported = TwoStageModel.load_compiled(out_dir)
+    X = parity_rows(exported.compiled_forest)
+    if check_path is not None:
+        import pandas as pd
+
+        rows = pd.read_csv(check_path).iloc[:, :model.rf_model.n_features_in_].to_numpy(dtype=np.float64)
+        X = np.vstack([X, rows])
+    expected = model.rf_model.predict_proba(X)
+    actual = exported.predict_probabilities(X)
+    max_diff = float(np.abs(expected - actual).max())
+    mismatched = int((model.rf_model.classes_[expected.argmax(axis=1)]
+                      != exported.predict_labels(X)).sum())
+    if mismatched or max_diff > PROBABILITY_TOLERANCE:
+        return False, (f"Exported model differs from the original on {len(X)} rows: "
+                       f"{mismatched} labels, max abs probability diff {max_diff:.3g}")
+    return True, f"Exported model matches the original on {len(X)} rows (max abs probability diff {max_diff:.3g})"
+
+
+def _artifact_bytes(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def main(model_path, out_dir, check_path=None, compact=False, compress=False, value_dtype="float32"):
+    model = TwoStageModel(rf_model=None).load(model_path)
+    model.save_compiled(out_dir, compact=compact, compress=compress, value_dtype=np.dtype(value_dtype))
+
+    started = time.perf_counter()
+    TwoStageModel.load_compiled(out_dir)
+    load_seconds = time.perf_counter() - started
+    print(f"  {_artifact_bytes(out_dir) / 1024:.0f} KiB on disk (pickle {os.path.getsize(model_path) / 1024:.0f} KiB), "
+          f"loads in {load_seconds * 1000:.1f} ms")
+
+    ok, message = check_parity(model, out_dir, check_path)
+    if not ok:
+        hint = " (try --value-dtype float64)" if compact and value_dtype != "float64" else ""
+        print(f"✗ {message}{hint}")
+        sys.exit(1)
+    print(f"✓ {message}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--check", default=None, help="CSV of extra feature rows for the parity check")
+    parser.add_argument("--compact", action="store_true", help="quantized layout with leaf-only values")
+    parser.add_argument("--compress", action="store_true", help="compact only; one compressed .npz")
+    parser.add_argument("--value-dtype", default="float32", choices=("float32", "float64"),
+                        help="compact only; dtype of the leaf class distributions")
+    args = parser.parse_args()
+
+    main(args.model, args.out, args.check, args.compact, args.compress, args.value_dtype)
@@ -1,5 +1,6 @@
 import argparse
 import os
+import sys
 
 import mlflow
 import pandas as pd
@@ -7,7 +8,11 @@ import yaml
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import ParameterGrid, train_test_split
 
-from two_stage_model import TwoStageModel
+# Run as a script: put the repository root on the path so the model modules
+# import under their package name, src.models.*
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from src.models.two_stage_model import TwoStageModel  # noqa: E402
 
 
 def main(train, model, params, test_out=None):
@@ -6,11 +6,46 @@ Two-Stage ML Pipeline:
 """
 
 import os
-import joblib
+import time
+
 import numpy as np
-import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
-from scipy.optimize import linear_sum_assignment
+
+# sklearn, scipy.optimize, joblib and pandas cost over a second to import and
+# serving does not always need them (a compiled artifact never touches
+# sklearn), so they are imported where they are used
+
+from src.models.compiled_forest import CompiledForest, is_compiled_artifact
+from src.models.cost_functions import DEFAULT_COST_FUNCTION, build_cost_matrix, cost_structure
+from src.models.assignment import (anytime_assignment, auction_assignment, capacitated_separable,
+                                   detect_separable, min_cost_flow_assignment, solve_separable,
+                                   sparse_assignment)
+
+# Stage 2 backends; "auto" picks sort (separable costs), then hungarian up to
+# DENSE_SOLVER_MAX_CELLS cells (2,000 x 2,000), then sparse. With task
+# capacities only sort and min_cost_flow apply
+ASSIGNMENT_SOLVERS = ("auto", "sort", "hungarian", "auction", "sparse", "min_cost_flow")
+DENSE_SOLVER_MAX_CELLS = 4_000_000
+SPARSE_SOLVER_CANDIDATES = 16
+# Hungarian cost model for time budgets: seconds per n_workers * n_tasks *
+# min(n_workers, n_tasks). Random matrices run at 0.05-0.15 ns; structured
+# ones can be several times slower, so the estimate leans high
+DENSE_SOLVER_SECONDS_PER_OP = 2e-10
+# Batch sizes warm_up runs through both stages before a model takes traffic
+WARMUP_BATCH_SIZES = (1, 8, 64, 256)
+# Trees evaluated between stopping checks in predict_labels_early_exit
+EARLY_EXIT_CHUNK_TREES = 10
+
+
+def _pairs(worker_indices, task_indices, as_arrays=False):
+    """(worker, task) pairs as a list of int tuples, or a (k, 2) array"""
+    if as_arrays:
+        return np.column_stack((worker_indices, task_indices))
+    return list(zip(worker_indices.tolist(), task_indices.tolist()))
+
+
+def _default_forest():
+    from sklearn.ensemble import RandomForestClassifier
+    return RandomForestClassifier(n_estimators=100, random_state=42)
 
 
 class TwoStageModel:
@@ -24,9 +59,10 @@ class TwoStageModel:
         """
         # If no RF is provided, use the original default hyperparameters
         if rf_model is None:
-            rf_model = RandomForestClassifier(n_estimators=100, random_state=42)
+            rf_model = _default_forest()
         self.rf_model = rf_model
         self.feature_names = None
+        self.compiled_forest = None
     
     def fit(self, X, y):
         """
@@ -37,13 +73,27 @@ class TwoStageModel:
         """
         # If rf_model was somehow left as None, fall back to default RF
         if self.rf_model is None:
-            self.rf_model = RandomForestClassifier(n_estimators=100, random_state=42)
+            self.rf_model = _default_forest()
 
         self.rf_model.fit(X, y)
-        self.feature_names = X.columns.tolist() if isinstance(X, pd.DataFrame) else None
+        # Only a DataFrame has columns
+        self.feature_names = X.columns.tolist() if hasattr(X, "columns") else None
+        self.compiled_forest = None
         print(f"✓ Random Forest trained with {len(X)} samples")
         return self
     
+    def _check_ready(self):
+        # A model loaded from a compiled artifact has no sklearn forest, only arrays
+        if self.rf_model is None and self.compiled_forest is None:
+            raise ValueError("Model not trained. Call fit() first.")
+    
+    @property
+    def n_features(self):
+        """Number of input features Stage 1 expects (None if unknown)"""
+        if self.compiled_forest is not None and self.compiled_forest.n_features is not None:
+            return self.compiled_forest.n_features
+        return getattr(self.rf_model, "n_features_in_", None)
+    
     def predict_probabilities(self, X):
         """
         Stage 1: Get prediction probabilities from Random Forest
@@ -52,8 +102,9 @@ class TwoStageModel:
         Returns:
             Probability matrix (n_samples, n_classes)
         """
-        if self.rf_model is None:
-            raise ValueError("Model not trained. Call fit() first.")
+        self._check_ready()
+        if self.compiled_forest is not None:
+            return self.compiled_forest.predict_proba(X)
         return self.rf_model.predict_proba(X)
     
     def predict_labels(self, X):
@@ -64,11 +115,155 @@ class TwoStageModel:
         Returns:
             Predicted labels
         """
+        self._check_ready()
+        if self.compiled_forest is not None:
+            return self.compiled_forest.predict(X)[1]
+        return self.rf_model.predict(X)
+    
+    def predict_labels_early_exit(self, X, chunk_size=EARLY_EXIT_CHUNK_TREES, confidence=None):
+        """
+        Stage 1 labels with sequential halting: trees are evaluated in chunks,
+        and a row stops once its label is settled.
+
+        After k of T trees, the remaining T - k trees can add at most T - k to
+        any class's summed probability. A row whose leading class is ahead of
+        the runner-up by more than that cannot change label, so by default the
+        labels are exactly those of predict_labels.
+
+        With a confidence level, a row also stops once the mean per-tree margin
+        of the leading class is larger than the Hoeffding-Serfling bound
+        sqrt(2 ln(1 / (1 - confidence)) (1 - (k - 1) / T) / k). That bound
+        treats the evaluated trees as a random sample of the ensemble, so
+        labels agree with predict_labels with high probability, not always.
+        Args:
+            X: Feature matrix (n_samples, n_features)
+            chunk_size: trees evaluated between stopping checks
+            confidence: optional confidence level in (0, 1) for earlier, approximate stopping
+        Returns:
+            Tuple of (predicted labels (n_samples,), trees used per row (n_samples,))
+        """
+        self._check_ready()
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        if confidence is not None and not 0 < confidence < 1:
+            raise ValueError("confidence must be between 0 and 1")
+        if self.compiled_forest is not None:
+            n_trees, classes = self.compiled_forest.n_trees, self.compiled_forest.classes
+            X = np.asarray(X)
+            accumulate = self.compiled_forest.accumulate_proba
+        else:
+            n_trees, classes = len(self.rf_model.estimators_), self.rf_model.classes_
+            # sklearn trees score float32; convert once for all chunks
+            X = np.ascontiguousarray(X, dtype=np.float32)
+            accumulate = self._accumulate_sklearn_proba
+        X = X.reshape(1, -1) if X.ndim == 1 else X
+
+        n_samples = X.shape[0]
+        sums = np.zeros((n_samples, len(classes)))
+        trees_used = np.zeros(n_samples, dtype=np.int64)
+        active = np.arange(n_samples)
+        z = np.sqrt(2.0 * np.log(1.0 / (1.0 - confidence))) if confidence is not None else None
+        # Without a confidence level no row can settle before a majority of
+        # the trees is in (margin <= stop <= n_trees - stop), so skip those checks
+        first = chunk_size if z is not None else max(chunk_size, n_trees // 2 + 1)
+        stops = list(range(min(first, n_trees), n_trees, chunk_size)) + [n_trees]
+        for start, stop in zip([0] + stops[:-1], stops):
+            sums[active] = accumulate(X[active], slice(start, stop), sums[active])
+            trees_used[active] = stop
+            if stop == n_trees or len(classes) < 2:
+                continue
+            top_two = np.sort(sums[active], axis=1)[:, -2:]
+            margin = top_two[:, 1] - top_two[:, 0]
+            # Small slack so accumulated rounding error can never flip a settled row
+            settled = margin > (n_trees - stop) + 1e-9 * n_trees
+            if z is not None:
+                settled |= margin / stop > z * np.sqrt((1.0 - (stop - 1) / n_trees) / stop)
+            active = active[~settled]
+            if len(active) == 0:
+                break
+        # Divide like predict_proba, so ties resolve the same way
+        labels = classes.take(np.argmax(sums / n_trees, axis=1), axis=0)
+        return labels, trees_used
+    
+    def _accumulate_sklearn_proba(self, X, trees, out):
+        # Same per-tree call and summation order as RandomForestClassifier.predict_proba
+        for tree in self.rf_model.estimators_[trees]:
+            out += tree.predict_proba(X, check_input=False)
+        return out
+    
+    def predict_probabilities_and_labels(self, X):
+        """
+        Stage 1: Get probabilities and labels with a single ensemble pass
+        Args:
+            X: Feature matrix (n_samples, n_features)
+        Returns:
+            Tuple of (probability matrix (n_samples, n_classes), predicted labels)
+        """
+        self._check_ready()
+        if self.compiled_forest is not None:
+            return self.compiled_forest.predict(X)
+        # RandomForestClassifier.predict is argmax over predict_proba
+        probs = self.rf_model.predict_proba(X)
+        labels = self.rf_model.classes_.take(np.argmax(probs, axis=1), axis=0)
+        return probs, labels
+    
+    def warm_up(self, batch_sizes=WARMUP_BATCH_SIZES, n_features=None):
+        """
+        Run synthetic batches through Stage 1 and Stage 2 so the first real
+        requests do not pay one-time costs (lazy imports in sklearn and
+        scipy, validation paths, allocator growth).
+        Args:
+            batch_sizes: rows per synthetic batch
+            n_features: columns of the synthetic batches (default: n_features)
+        Returns:
+            Seconds spent
+        """
+        self._check_ready()
+        n_features = n_features or self.n_features
+        if n_features is None:
+            raise ValueError("n_features is unknown; pass it explicitly")
+        started = time.perf_counter()
+        rng = np.random.default_rng(0)
+        for n_rows in batch_sizes:
+            X = rng.normal(size=(n_rows, n_features))
+            self.predict_probabilities(X)
+            self.predict_labels(X)
+            probs, labels = self.predict_probabilities_and_labels(X)
+            scores = probs[:, -1]
+            self.hungarian_assignment(np.subtract.outer(scores, np.linspace(0.0, 1.0, n_rows)) ** 2)
+            self.assign(probs, labels, maximize=True)
+        return time.perf_counter() - started
+    
+    def compile(self):
+        """
+        Switch Stage 1 to the array-backed CompiledForest inference engine.
+        Predictions match the sklearn path; only the evaluation strategy changes.
+        """
         if self.rf_model is None:
             raise ValueError("Model not trained. Call fit() first.")
-        return self.rf_model.predict(X)
+        self.compiled_forest = CompiledForest.from_sklearn(self.rf_model)
+        print(f"✓ Compiled {self.compiled_forest.n_trees} trees "
+              f"({self.compiled_forest.n_nodes} nodes) for array-backed inference")
+        return self
+    
+    def fold_scaler(self, mean, scale):
+        """
+        Fold a StandardScaler into the Stage 1 thresholds, so the model takes
+        raw features and callers skip the per-request scaling. Compiles the
+        forest first if needed; predictions on raw X are bit-identical to the
+        unfolded model's predictions on (X - mean) / scale.
+        Args:
+            mean: StandardScaler mean_ per feature
+            scale: StandardScaler scale_ per feature
+        """
+        if self.compiled_forest is None:
+            self.compile()
+        self.compiled_forest = self.compiled_forest.fold_scaler(mean, scale)
+        print(f"✓ Folded feature scaling into {self.compiled_forest.n_trees} trees")
+        return self
     
-    def hungarian_assignment(self, cost_matrix, maximize=False):
+    def hungarian_assignment(self, cost_matrix, maximize=False, include_cost_matrix=False,
+                             pairs_as_arrays=False):
         """
         Stage 2: Hungarian Algorithm for optimal assignment
         Solves the assignment problem - matches workers to tasks optimally.
@@ -78,77 +273,316 @@ class TwoStageModel:
                          - Rows represent workers/resources
                          - Cols represent tasks/slots
             maximize: If True, maximize assignments; if False, minimize
+            include_cost_matrix: return the cost matrix (as the ndarray, not a list)
+            pairs_as_arrays: return worker_task_pairs as an (n_pairs, 2) int array
         
         Returns:
             Dictionary with assignment details:
             - 'worker_task_pairs': list of (worker_idx, task_idx) assignments
             - 'total_cost': sum of assignment costs
-            - 'cost_matrix': original cost matrix used
+            - 'cost_matrix': the cost matrix used if include_cost_matrix, else None
+            - 'solver': "hungarian"
+            - 'optimality_gap': 0.0 (exact)
         """
-        cost_matrix = np.array(cost_matrix, dtype=float)
+        from scipy.optimize import linear_sum_assignment
         
-        # Convert maximization to minimization (negate costs)
-        if maximize:
-            cost_matrix = -cost_matrix
+        cost_matrix = np.asarray(cost_matrix, dtype=float)
         
         # Run Hungarian Algorithm (linear sum assignment)
-        worker_indices, task_indices = linear_sum_assignment(cost_matrix)
+        worker_indices, task_indices = linear_sum_assignment(cost_matrix, maximize=maximize)
         
         # Calculate total cost
         total_cost = cost_matrix[worker_indices, task_indices].sum()
         
-        # Convert back if it was maximization
-        if maximize:
-            total_cost = -total_cost
-        
         return {
-            "worker_task_pairs": list(zip(worker_indices.tolist(), task_indices.tolist())),
+            "worker_task_pairs": _pairs(worker_indices, task_indices, pairs_as_arrays),
             "total_cost": float(total_cost),
-            "cost_matrix": cost_matrix.tolist(),
+            # A list would be n_workers * n_tasks Python floats; callers that
+            # need the matrix serialize the array themselves
+            "cost_matrix": cost_matrix if include_cost_matrix else None,
+            "solver": "hungarian",
+            "optimality_gap": 0.0,
         }
     
-    def predict_and_assign(self, X, n_tasks=None, maximize=False):
+    def sorted_assignment(self, cost, maximize=False, cost_matrix=None, include_cost_matrix=False,
+                          pairs_as_arrays=False, capacities=None):
+        """
+        Stage 2 for separable costs: exact assignment by sorting, O(n log n)
+        
+        Args:
+            cost: SeparableCost describing the cost matrix
+            maximize: If True, maximize assignments; if False, minimize
+            cost_matrix: the dense matrix, if one was built (totals are then read from it)
+            include_cost_matrix, pairs_as_arrays: as in hungarian_assignment
+            capacities: workers each task can take (None: one each)
+        
+        Returns:
+            Same dictionary as hungarian_assignment (with 'solver': "sort"),
+            or None if the structure cannot be solved by sorting
+        """
+        if capacities is not None:
+            solved = capacitated_separable(cost, capacities, maximize=maximize)
+        else:
+            solved = solve_separable(cost, maximize=maximize)
+        if solved is None:
+            return None
+        worker_indices, task_indices = solved
+        if cost_matrix is not None:
+            values = cost_matrix[worker_indices, task_indices]
+        else:
+            values = cost.values(worker_indices, task_indices)
+        
+        return {
+            "worker_task_pairs": _pairs(worker_indices, task_indices, pairs_as_arrays),
+            "total_cost": float(values.sum()),
+            # Large separable problems are never materialized
+            "cost_matrix": cost_matrix if include_cost_matrix else None,
+            "solver": "sort",
+            "optimality_gap": 0.0,
+        }
+    
+    def auction_assignment(self, cost_matrix, maximize=False, include_cost_matrix=False,
+                           pairs_as_arrays=False):
+        """
+        Stage 2 with the epsilon-scaling auction solver (approximate)
+        
+        Returns:
+            Same dictionary as hungarian_assignment, with 'solver': "auction"
+            and 'optimality_gap' bounding the distance to the optimum
+        """
+        worker_indices, task_indices, gap = auction_assignment(cost_matrix, maximize=maximize)
+        return {
+            "worker_task_pairs": _pairs(worker_indices, task_indices, pairs_as_arrays),
+            "total_cost": float(cost_matrix[worker_indices, task_indices].sum()),
+            "cost_matrix": cost_matrix if include_cost_matrix else None,
+            "solver": "auction",
+            "optimality_gap": gap,
+        }
+    
+    def min_cost_flow_assignment(self, cost_matrix, capacities, maximize=False, include_cost_matrix=False,
+                                 pairs_as_arrays=False):
+        """
+        Stage 2 with task capacities: task j takes up to capacities[j]
+        workers, solved exactly as a min-cost flow without replicating columns
+        
+        Returns:
+            Same dictionary as hungarian_assignment, with 'solver': "min_cost_flow"
+        """
+        worker_indices, task_indices = min_cost_flow_assignment(cost_matrix, capacities, maximize=maximize)
+        return {
+            "worker_task_pairs": _pairs(worker_indices, task_indices, pairs_as_arrays),
+            "total_cost": float(cost_matrix[worker_indices, task_indices].sum()),
+            "cost_matrix": cost_matrix if include_cost_matrix else None,
+            "solver": "min_cost_flow",
+            "optimality_gap": 0.0,
+        }
+    
+    def anytime_assignment(self, cost_matrix, deadline, maximize=False, include_cost_matrix=False,
+                           pairs_as_arrays=False):
+        """
+        Stage 2 under a deadline: greedy assignment improved by swaps until
+        time.perf_counter() reaches deadline (approximate)
+        
+        Returns:
+            Same dictionary as hungarian_assignment, with 'solver': "anytime",
+            'optimality_gap' bounding the distance to the optimum (None if
+            the deadline passed before a bound was computed) and 'optimal'
+            True only if the bound proves the result optimal
+        """
+        worker_indices, task_indices, gap, optimal = anytime_assignment(cost_matrix, deadline, maximize=maximize)
+        return {
+            "worker_task_pairs": _pairs(worker_indices, task_indices, pairs_as_arrays),
+            "total_cost": float(cost_matrix[worker_indices, task_indices].sum()),
+            "cost_matrix": cost_matrix if include_cost_matrix else None,
+            "solver": "anytime",
+            "optimality_gap": gap,
+            "optimal": optimal,
+        }
+    
+    def sparse_assignment(self, cost, maximize=False, k=SPARSE_SOLVER_CANDIDATES, pairs_as_arrays=False):
+        """
+        Stage 2 restricted to the k best candidate tasks per worker (approximate)
+        
+        Args:
+            cost: SeparableCost or dense cost matrix
+            maximize: If True, maximize assignments; if False, minimize
+            k: candidate tasks kept per worker
+            pairs_as_arrays: as in hungarian_assignment
+        
+        Returns:
+            Same dictionary as hungarian_assignment, with 'solver': "sparse",
+            'cost_matrix': None and 'optimality_gap' bounding the distance to the optimum
+        """
+        worker_indices, task_indices, values, gap = sparse_assignment(cost, maximize=maximize, k=k)
+        return {
+            "worker_task_pairs": _pairs(worker_indices, task_indices, pairs_as_arrays),
+            "total_cost": float(values.sum()),
+            "cost_matrix": None,
+            "solver": "sparse",
+            "optimality_gap": gap,
+        }
+    
+    def solve_assignment(self, maximize=False, solver="auto", structure=None, cost_matrix=None,
+                         include_cost_matrix=False, pairs_as_arrays=False, capacities=None, deadline=None):
+        """
+        Stage 2 solver selection
+        
+        Args:
+            maximize: If True, maximize assignments; if False, minimize
+            solver: one of ASSIGNMENT_SOLVERS; "auto" chooses by structure and size
+            structure: SeparableCost describing the costs, if known
+            cost_matrix: dense cost matrix, if already built
+            include_cost_matrix: return the dense matrix (ndarray) when one was built
+            pairs_as_arrays: return worker_task_pairs as an (n_pairs, 2) int array
+            capacities: workers each task can take, one non-negative integer
+                        per task (None: one each)
+            deadline: time.perf_counter() value Stage 2 should finish by. When
+                      the estimated Hungarian time (auto or hungarian, no
+                      capacities) would pass it, the anytime solver runs instead
+        
+        Returns:
+            Assignment dictionary from the chosen backend; 'optimal' says
+            whether the result is proven optimal
+        """
+        result = self._solve_assignment(maximize, solver, structure, cost_matrix, include_cost_matrix,
+                                        pairs_as_arrays, capacities, deadline)
+        result.setdefault("optimal", result["optimality_gap"] == 0.0)
+        return result
+    
+    def _solve_assignment(self, maximize, solver, structure, cost_matrix, include_cost_matrix,
+                          pairs_as_arrays, capacities, deadline):
+        if solver not in ASSIGNMENT_SOLVERS:
+            raise ValueError(f"Unknown solver '{solver}' (expected one of {', '.join(ASSIGNMENT_SOLVERS)})")
+        result_format = {"pairs_as_arrays": pairs_as_arrays}
+        n_workers, n_tasks = cost_matrix.shape if cost_matrix is not None else structure.shape
+        if capacities is not None:
+            capacities = np.asarray(capacities)
+            if capacities.shape != (n_tasks,):
+                raise ValueError(f"capacities must have one entry per task ({n_tasks}), got {capacities.size}")
+            if not np.issubdtype(capacities.dtype, np.integer) or (capacities < 0).any():
+                raise ValueError("capacities must be non-negative integers")
+            if solver not in ("auto", "sort", "min_cost_flow"):
+                raise ValueError(f"Solver '{solver}' does not support capacities; use auto, sort or min_cost_flow")
+        
+        if solver in ("auto", "sort") and structure is not None:
+            result = self.sorted_assignment(structure, maximize=maximize, cost_matrix=cost_matrix,
+                                            include_cost_matrix=include_cost_matrix, capacities=capacities,
+                                            **result_format)
+            if result is not None:
+                return result
+        if solver == "sort":
+            raise ValueError("The cost matrix is not separable; choose another solver")
+        
+        if capacities is not None or solver == "min_cost_flow":
+            if cost_matrix is None:
+                cost_matrix = structure.to_matrix()
+            return self.min_cost_flow_assignment(
+                cost_matrix, capacities if capacities is not None else np.ones(n_tasks, dtype=np.int64),
+                maximize=maximize, include_cost_matrix=include_cost_matrix, **result_format)
+        if deadline is not None and capacities is None and solver in ("auto", "hungarian"):
+            estimate = DENSE_SOLVER_SECONDS_PER_OP * n_workers * n_tasks * min(n_workers, n_tasks)
+            if time.perf_counter() + estimate > deadline:
+                if cost_matrix is None:
+                    cost_matrix = structure.to_matrix()
+                return self.anytime_assignment(cost_matrix, deadline, maximize=maximize,
+                                               include_cost_matrix=include_cost_matrix, **result_format)
+        if solver == "auto":
+            solver = "hungarian" if n_workers * n_tasks <= DENSE_SOLVER_MAX_CELLS else "sparse"
+        if solver == "sparse":
+            return self.sparse_assignment(cost_matrix if cost_matrix is not None else structure,
+                                          maximize=maximize, **result_format)
+        
+        if cost_matrix is None:
+            cost_matrix = structure.to_matrix()
+        result_format["include_cost_matrix"] = include_cost_matrix
+        if solver == "auction":
+            return self.auction_assignment(cost_matrix, maximize=maximize, **result_format)
+        return self.hungarian_assignment(cost_matrix, maximize=maximize, **result_format)
+    
+    def predict_and_assign(self, X, n_tasks=None, maximize=False, cost_function=DEFAULT_COST_FUNCTION,
+                           solver="auto", include_cost_matrix=False, pairs_as_arrays=False, capacities=None,
+                           time_budget_ms=None):
         """
         Combined two-stage prediction and assignment
         
         Args:
             X: Feature matrix (n_samples, n_features)
-            n_tasks: Number of tasks/slots. If None, uses n_samples
+            n_tasks: Number of tasks/slots. If None, uses len(capacities) or n_samples
             maximize: If True, maximize scores; if False, minimize
+            cost_function: name registered in cost_functions.py (or a callable)
+            solver: Stage 2 backend (see solve_assignment)
+            include_cost_matrix, pairs_as_arrays: result format (see solve_assignment)
+            capacities: workers each task can take (see solve_assignment)
+            time_budget_ms: Stage 2 time budget (see assign)
         
         Returns:
             Dictionary with predictions and assignments
         """
         # Stage 1: Get probabilities from Random Forest
-        probs = self.predict_probabilities(X)
-        labels = self.predict_labels(X)
+        probs, labels = self.predict_probabilities_and_labels(X)
+        
+        return self.assign(probs, labels, n_tasks=n_tasks, maximize=maximize,
+                           cost_function=cost_function, solver=solver,
+                           include_cost_matrix=include_cost_matrix, pairs_as_arrays=pairs_as_arrays,
+                           capacities=capacities, time_budget_ms=time_budget_ms)
+    
+    def assign(self, probs, labels, n_tasks=None, maximize=False, cost_function=DEFAULT_COST_FUNCTION,
+               solver="auto", include_cost_matrix=False, pairs_as_arrays=False, capacities=None,
+               time_budget_ms=None):
+        """
+        Stage 2 only: assignment from already computed Stage 1 outputs
+        
+        Args:
+            probs: Probability matrix (n_samples, n_classes)
+            labels: Predicted labels (n_samples,)
+            n_tasks: Number of tasks/slots. If None, uses len(capacities) or n_samples
+            maximize: If True, maximize scores; if False, minimize
+            cost_function: name registered in cost_functions.py (or a callable)
+            solver: Stage 2 backend (see solve_assignment)
+            include_cost_matrix, pairs_as_arrays: result format (see solve_assignment)
+            capacities: workers each task can take (see solve_assignment)
+            time_budget_ms: milliseconds for Stage 2, cost matrix included; over
+                            budget, the best assignment found in time is returned
+                            (see solve_assignment)
+        
+        Returns:
+            Dictionary with predictions and assignments, plus "timings"
+            (seconds spent building the cost matrix and solving it)
+        """
+        started = time.perf_counter()
+        deadline = started + time_budget_ms / 1000.0 if time_budget_ms is not None else None
+        probs = np.asarray(probs)
+        labels = np.asarray(labels)
         
         # Use positive class probability as likelihood score
         scores = probs[:, 1] if probs.shape[1] > 1 else probs[:, 0]
         
         # Stage 2: Create cost matrix and run Hungarian Algorithm
-        n_workers = len(X)
+        n_workers = len(probs)
+        if capacities is not None:
+            n_tasks = n_tasks or len(capacities)
         n_tasks = n_tasks or n_workers
         
-        # Create cost matrix based on predicted probabilities
-        # Replicate scores to fill cost matrix (n_workers x n_tasks)
-        if n_workers == n_tasks:
-            # Square matrix: use scores as costs
-            cost_matrix = np.diag(scores)
-            # Fill off-diagonal with average scores for complete assignment
-            for i in range(n_workers):
-                for j in range(n_tasks):
-                    if i != j:
-                        cost_matrix[i, j] = scores[i] * 0.5  # penalize non-diagonal
-        else:
-            # Non-square: expand or contract to n_tasks
-            cost_matrix = np.zeros((n_workers, n_tasks))
-            for i in range(n_workers):
-                for j in range(n_tasks):
-                    # Assign based on scores and task index
-                    cost_matrix[i, j] = scores[i] * (1 - (j % len(scores)) / len(scores))
+        # Separable costs (declared by the cost function, or detected in the
+        # dense matrix) are solved exactly by sorting; see solve_assignment
+        cost_matrix = None
+        structure = cost_structure(scores, n_tasks, cost_function)
+        if structure is None:
+            cost_matrix = build_cost_matrix(scores, n_tasks, cost_function)
+            # Detection is another full pass; not worth it once the budget is spent
+            if deadline is None or time.perf_counter() < deadline:
+                structure = detect_separable(cost_matrix)
         
-        assignment_result = self.hungarian_assignment(cost_matrix, maximize=maximize)
+        built = time.perf_counter()
+        assignment_result = self.solve_assignment(
+            maximize=maximize, solver=solver, structure=structure, cost_matrix=cost_matrix,
+            include_cost_matrix=include_cost_matrix, pairs_as_arrays=pairs_as_arrays,
+            capacities=capacities,
+            deadline=deadline,
+        )
+        solved = time.perf_counter()
+        solve_stage = ("linear_sum_assignment" if assignment_result["solver"] == "hungarian"
+                       else f"{assignment_result['solver']}_assignment")
         
         return {
             "predictions": labels.tolist(),
@@ -158,10 +592,12 @@ class TwoStageModel:
             "assignment": assignment_result,
             "optimal_assignments": assignment_result["worker_task_pairs"],
             "total_assignment_score": assignment_result["total_cost"],
+            "timings": {"cost_matrix": built - started, solve_stage: solved - built},
         }
     
     def save(self, model_path):
         """Save two-stage model"""
+        import joblib
         os.makedirs(os.path.dirname(model_path), exist_ok=True)
         joblib.dump(
             {
@@ -174,8 +610,64 @@ class TwoStageModel:
     
     def load(self, model_path):
         """Load two-stage model"""
+        import joblib
         data = joblib.load(model_path)
         self.rf_model = data["rf_model"]
         self.feature_names = data["feature_names"]
+        self.compiled_forest = None
         print(f"✓ Two-stage model loaded from {model_path}")
         return self
+    
+    def save_compiled(self, artifact_dir, compact=False, compress=False, value_dtype=np.float32):
+        """
+        Export Stage 1 as a compiled-forest artifact directory (raw .npy arrays
+        + manifest.json) that load_compiled() can memory-map.
+        Args:
+            artifact_dir: output directory
+            compact: quantized layout (float32 thresholds, narrow indices, leaf-only values)
+            compress: compact only; write one compressed .npz (read into memory, not mapped)
+            value_dtype: compact only; dtype of the stored leaf class distributions
+        """
+        compiled = self.compiled_forest
+        if compiled is None:
+            if self.rf_model is None:
+                raise ValueError("Model not trained. Call fit() first.")
+            compiled = CompiledForest.from_sklearn(self.rf_model)
+        compiled.save(artifact_dir, feature_names=self.feature_names, compact=compact,
+                      compress=compress, value_dtype=value_dtype)
+        print(f"✓ Compiled model saved to {artifact_dir}")
+    
+    @classmethod
+    def load_compiled(cls, artifact_dir, mmap_mode="r"):
+        """
+        Load a compiled-forest artifact. With mmap_mode="r" the tree arrays are
+        mapped read-only, so worker processes share one physical copy.
+        The returned model has no sklearn forest; Stage 1 runs on the arrays.
+        """
+        compiled, manifest = CompiledForest.load(artifact_dir, mmap_mode=mmap_mode)
+        model = cls.__new__(cls)
+        model.rf_model = None
+        model.feature_names = manifest.get("feature_names")
+        model.compiled_forest = compiled
+        print(f"✓ Compiled model loaded from {artifact_dir} (mmap_mode={mmap_mode})")
+        return model
+    
+    @classmethod
+    def from_artifact(cls, model_path, engine="sklearn", mmap_mode="r"):
+        """
+        Load either artifact layout: a joblib pickle (rf_model + feature_names)
+        or a compiled-forest directory.
+        Args:
+            model_path: path to model.pkl or to a compiled artifact directory
+            engine: "compiled" compiles a pickled forest after loading
+            mmap_mode: how compiled artifacts are opened
+        """
+        if is_compiled_artifact(model_path):
+            return cls.load_compiled(model_path, mmap_mode=mmap_mode)
+        import joblib
+        model_data = joblib.load(model_path)
+        model = cls(rf_model=model_data['rf_model'])
+        model.feature_names = model_data.get('feature_names')
+        if engine == "compiled":
+            model.compile()
+        return model
@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the project as src.app.* / src.models.*, from the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Read by src.app.main at import: load the model before serving, one warm-up
+# batch, and no prediction cache (tests that need one install their own)
+os.environ.setdefault("LOAD_MODEL_IN_BACKGROUND", "0")
+os.environ.setdefault("WARMUP_BATCH_SIZES", "1")
+os.environ.setdefault("PREDICTION_CACHE_SIZE", "0")
+
+
+@pytest.fixture(scope="session")
+def client():
+    """The API with the bundled model, served in-process"""
+    from fastapi.testclient import TestClient
+
+    from src.app import main
+
+    with TestClient(main.app) as client:
+        yield client
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: runs subprocesses for seconds (deselect with -m 'not slow')")
@@ -0,0 +1,230 @@
+"""Stage 2 solvers checked against scipy.optimize.linear_sum_assignment"""
+
+import time
+import warnings
+
+import numpy as np
+import pytest
+from scipy.optimize import linear_sum_assignment
+
+from src.models.assignment import (
+    SeparableCost,
+    anytime_assignment,
+    auction_assignment,
+    min_cost_flow_assignment,
+    solve_separable,
+    sparse_assignment,
+)
+from src.models.assignment_session import AssignmentSession
+from src.models.cost_functions import build_cost_matrix
+from src.models.two_stage_model import TwoStageModel
+
+
+def _optimum(cost, maximize=False):
+    rows, cols = linear_sum_assignment(cost, maximize=maximize)
+    return cost[rows, cols].sum()
+
+
+def _assert_valid(workers, tasks, shape):
+    assert len(workers) == min(shape)
+    assert len(set(workers.tolist())) == len(workers)
+    assert len(set(tasks.tolist())) == len(tasks)
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("maximize", [False, True])
+def test_solve_separable_is_optimal(seed, maximize):
+    rng = np.random.default_rng(seed)
+    shapes = [(20, 20), (12, 20), (20, 12), (20, 20)]
+    n, m = shapes[seed]
+    # Tied factors in half of the cases; mixed signs only where n == m,
+    # since the rectangular case needs single-signed factors
+    row = rng.integers(0, 3, n).astype(float) if seed % 2 else rng.random(n)
+    cost = SeparableCost(row, rng.random(m) - (0.5 if n == m else 1.0))
+    solved = solve_separable(cost, maximize=maximize)
+    assert solved is not None
+    workers, tasks = solved
+    _assert_valid(workers, tasks, cost.shape)
+    dense = cost.to_matrix()
+    assert dense[workers, tasks].sum() == pytest.approx(_optimum(dense, maximize), abs=1e-9)
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("maximize", [False, True])
+def test_solve_separable_row_diagonal_is_optimal(seed, maximize):
+    rng = np.random.default_rng(seed)
+    n = 15
+    # Ties between off-diagonal and diagonal costs in half of the cases
+    row = rng.integers(0, 3, n).astype(float) if seed % 2 else rng.random(n)
+    diagonal = rng.integers(0, 3, n).astype(float) if seed % 2 else rng.random(n)
+    cost = SeparableCost(row, np.full(n, 0.7), diagonal=diagonal)
+    workers, tasks = solve_separable(cost, maximize=maximize)
+    _assert_valid(workers, tasks, cost.shape)
+    dense = cost.to_matrix()
+    assert dense[workers, tasks].sum() == pytest.approx(_optimum(dense, maximize), abs=1e-9)
+
+
+def test_solve_separable_defers_mixed_signs_on_rectangular_costs():
+    assert solve_separable(SeparableCost([0.2, 0.5, 0.9], [-1.0, 1.0])) is None
+
+
+def _random_and_tied(seed, shape):
+    rng = np.random.default_rng(seed)
+    if seed % 2:
+        return rng.integers(0, 3, shape).astype(float)
+    return rng.random(shape)
+
+
+@pytest.mark.parametrize("seed", range(6))
+@pytest.mark.parametrize("shape", [(25, 25), (15, 30), (30, 15)])
+@pytest.mark.parametrize("maximize", [False, True])
+def test_auction_within_reported_gap(seed, shape, maximize):
+    cost = _random_and_tied(seed, shape)
+    workers, tasks, gap = auction_assignment(cost, maximize=maximize)
+    _assert_valid(workers, tasks, shape)
+    shortfall = (cost[workers, tasks].sum() - _optimum(cost, maximize)) * (-1 if maximize else 1)
+    assert -1e-9 <= shortfall <= gap + 1e-9
+
+
+@pytest.mark.parametrize("seed", range(6))
+@pytest.mark.parametrize("shape", [(40, 40), (30, 45), (45, 30)])
+@pytest.mark.parametrize("k", [2, 16])
+def test_sparse_within_reported_gap(seed, shape, k):
+    cost = _random_and_tied(seed, shape)
+    workers, tasks, values, gap = sparse_assignment(cost, k=k)
+    _assert_valid(workers, tasks, shape)
+    np.testing.assert_array_equal(values, cost[workers, tasks])
+    shortfall = cost[workers, tasks].sum() - _optimum(cost)
+    assert -1e-9 <= shortfall <= gap + 1e-9
+
+
+@pytest.mark.parametrize("maximize", [False, True])
+def test_sparse_on_separable_cost_matches_dense(maximize):
+    rng = np.random.default_rng(3)
+    cost = SeparableCost(rng.random(60), rng.random(60), diagonal=rng.random(60))
+    dense = cost.to_matrix()
+    workers, tasks, values, gap = sparse_assignment(cost, maximize=maximize, k=8)
+    _assert_valid(workers, tasks, dense.shape)
+    np.testing.assert_array_equal(values, dense[workers, tasks])
+    shortfall = (values.sum() - _optimum(dense, maximize)) * (-1 if maximize else 1)
+    assert -1e-9 <= shortfall <= gap + 1e-9
+
+
+def _assert_session_optimal(session):
+    result = session.result()
+    cost = build_cost_matrix(np.asarray(session.scores), session.n_tasks, session.cost_function)
+    ids = session.worker_ids
+    rows = [ids.index(worker) for worker, _ in result["worker_task_pairs"]]
+    tasks = [task for _, task in result["worker_task_pairs"]]
+    assert len(rows) == min(len(ids), session.n_tasks)
+    assert len(set(tasks)) == len(tasks)
+    assert cost[rows, tasks].sum() == pytest.approx(result["total_cost"], abs=1e-9)
+    assert result["total_cost"] == pytest.approx(_optimum(cost, session.maximize), abs=1e-9)
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("maximize", [False, True])
+def test_session_changes_match_a_fresh_solve(seed, maximize):
+    rng = np.random.default_rng(seed)
+    session = AssignmentSession(n_tasks=12, maximize=maximize)
+    session.apply(add=rng.random(10))
+    _assert_session_optimal(session)
+    for _ in range(25):
+        ids = session.worker_ids
+        change = rng.integers(3)
+        if change == 0 or len(ids) < 3:
+            # Tied scores as well as fresh ones
+            session.apply(add=[rng.choice([0.5, rng.random()])])
+        elif change == 1:
+            session.apply(remove=[ids[rng.integers(len(ids))]])
+        else:
+            session.apply(update={ids[rng.integers(len(ids))]: rng.random()})
+        _assert_session_optimal(session)
+
+
+def _replicated_optimum(cost, capacities, maximize=False):
+    slot_task = np.repeat(np.arange(cost.shape[1]), capacities)
+    return _optimum(cost[:, slot_task], maximize)
+
+
+@pytest.mark.parametrize("seed", range(12))
+@pytest.mark.parametrize("maximize", [False, True])
+def test_min_cost_flow_matches_replicated_columns(seed, maximize):
+    rng = np.random.default_rng(seed)
+    n, m = int(rng.integers(5, 60)), int(rng.integers(1, 8))
+    capacities = rng.integers(1, 6, m)
+    # Alternate random and heavily tied costs
+    cost = rng.random((n, m)) if seed % 2 else rng.integers(0, 4, (n, m)).astype(float)
+    workers, tasks = min_cost_flow_assignment(cost, capacities, maximize=maximize)
+    assert len(workers) == min(n, capacities.sum())
+    assert len(set(workers.tolist())) == len(workers)
+    assert np.all(np.bincount(tasks, minlength=m) <= capacities)
+    assert cost[workers, tasks].sum() == pytest.approx(_replicated_optimum(cost, capacities, maximize))
+
+
+def test_min_cost_flow_capacity_shortfall():
+    # Far fewer slots than workers: most workers collect on the overflow task
+    rng = np.random.default_rng(7)
+    cost = rng.random((400, 6))
+    capacities = np.array([5, 0, 3, 8, 1, 4])
+    workers, tasks = min_cost_flow_assignment(cost, capacities)
+    assert len(workers) == capacities.sum()
+    assert np.array_equal(np.bincount(tasks, minlength=6), capacities)
+    assert cost[workers, tasks].sum() == pytest.approx(_replicated_optimum(cost, capacities))
+
+
+def test_min_cost_flow_capacities_beyond_workers():
+    cost = np.random.default_rng(3).random((20, 3))
+    workers, tasks = min_cost_flow_assignment(cost, [10**9, 10**9, 10**9])
+    assert workers.tolist() == list(range(20))
+    assert np.array_equal(tasks, cost.argmin(axis=1))
+
+
+@pytest.mark.parametrize("shape", [(30, 30), (20, 35), (35, 20)])
+@pytest.mark.parametrize("maximize", [False, True])
+def test_anytime_gap_bounds_the_true_gap(shape, maximize):
+    cost = np.random.default_rng(sum(shape)).random(shape)
+    workers, tasks, gap, optimal = anytime_assignment(cost, time.perf_counter() + 1.0, maximize=maximize)
+    _assert_valid(workers, tasks, shape)
+    total = cost[workers, tasks].sum()
+    shortfall = (total - _optimum(cost, maximize)) * (-1 if maximize else 1)
+    assert shortfall >= -1e-9
+    assert gap is not None and shortfall <= gap + 1e-9
+    assert isinstance(optimal, bool)
+
+
+@pytest.mark.parametrize("seed", [11, 14, 28, 38, 46])
+def test_anytime_tied_costs_keep_finite_prices(seed):
+    # Small integer costs: the bound's price choices often form a perfect
+    # matching, where the subgradient is zero
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(3, 12))
+    cost = rng.integers(0, 4, (n, n)).astype(float)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        workers, tasks, gap, optimal = anytime_assignment(cost, time.perf_counter() + 1.0)
+    _assert_valid(workers, tasks, cost.shape)
+    shortfall = cost[workers, tasks].sum() - _optimum(cost)
+    assert np.isfinite(gap) and shortfall <= gap + 1e-9
+
+
+def test_anytime_past_deadline_returns_a_full_assignment_without_a_bound():
+    cost = np.random.default_rng(0).random((50, 50))
+    workers, tasks, gap, optimal = anytime_assignment(cost, time.perf_counter() - 1.0)
+    _assert_valid(workers, tasks, cost.shape)
+    assert gap is None and optimal is False
+
+
+@pytest.mark.parametrize("maximize", [False, True])
+def test_assign_returns_the_cost_matrix_only_on_request(maximize):
+    probs = np.array([[0.2, 0.8], [0.6, 0.4], [0.5, 0.5]])
+    labels = np.array([1, 0, 0])
+    model = TwoStageModel()
+    plain = model.assign(probs, labels, maximize=maximize, solver="hungarian")
+    assert plain["assignment"]["cost_matrix"] is None
+    full = model.assign(probs, labels, maximize=maximize, solver="hungarian",
+                        include_cost_matrix=True, pairs_as_arrays=True)
+    # The matrix that was solved, not its negation
+    np.testing.assert_array_equal(full["assignment"]["cost_matrix"], build_cost_matrix(probs[:, 1], 3))
+    assert full["optimal_assignments"].shape == (3, 2)
+    assert [tuple(pair) for pair in full["optimal_assignments"].tolist()] == plain["optimal_assignments"]
@@ -0,0 +1,71 @@
+"""MicroBatcher: coalescing, per-caller results and errors"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from src.app.batching import MicroBatcher
+
+
+def _score(X):
+    probs = np.column_stack([1 - X[:, 0], X[:, 0]])
+    return probs, (X[:, 0] > 0.5).astype(int)
+
+
+def test_queued_rows_are_coalesced_up_to_the_batch_size():
+    batches = []
+
+    def score(X):
+        batches.append(len(X))
+        return _score(X)
+
+    batcher = MicroBatcher(score, max_batch_size=4, max_delay_ms=50)
+    rows = np.random.default_rng(1).random((10, 3))
+    # Queued before the dispatcher starts, so it finds them all waiting
+    futures = [batcher.submit(row) for row in rows]
+    batcher.start()
+    try:
+        results = [future.result(timeout=5) for future in futures]
+    finally:
+        batcher.stop()
+    assert batches == [4, 4, 2]
+    expected_probs, expected_labels = _score(rows)
+    for (probs, label), row_probs, row_label in zip(results, expected_probs, expected_labels):
+        assert np.array_equal(probs, row_probs) and label == row_label
+    stats = batcher.stats()
+    assert stats["batches"] == 3 and stats["rows"] == 10 and stats["max_batch_size_seen"] == 4
+    with pytest.raises(RuntimeError, match="stopped"):
+        batcher.submit(rows[0])
+
+
+def test_batches_scored_on_a_pool_resolve_every_caller():
+    pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+    batcher = MicroBatcher(lambda X: pool.submit(_score, X), max_batch_size=8, max_delay_ms=5).start()
+    try:
+        rows = np.random.default_rng(0).random((20, 3))
+        futures = [batcher.submit(row) for row in rows]
+        results = [future.result(timeout=5) for future in futures]
+    finally:
+        batcher.stop()
+        pool.shutdown()
+    expected_probs, expected_labels = _score(rows)
+    for (probs, label), row_probs, row_label in zip(results, expected_probs, expected_labels):
+        assert np.array_equal(probs, row_probs) and label == row_label
+
+
+def test_pool_errors_reach_every_caller_in_the_batch():
+    pool = ThreadPoolExecutor(max_workers=1)
+
+    def fail(X):
+        raise RuntimeError("model failed")
+
+    batcher = MicroBatcher(lambda X: pool.submit(fail, X), max_batch_size=4, max_delay_ms=5).start()
+    try:
+        futures = [batcher.submit(np.zeros(3)) for _ in range(3)]
+        for future in futures:
+            with pytest.raises(RuntimeError, match="model failed"):
+                future.result(timeout=5)
+    finally:
+        batcher.stop()
+        pool.shutdown()
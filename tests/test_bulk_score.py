@@ -0,0 +1,84 @@
+"""Offline bulk scoring: part files, row order and resuming"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from src.models import bulk_score
+from src.models.two_stage_model import TwoStageModel
+
+COLUMNS = ["age", "chol", "oldpeak"]
+MEAN = np.array([50.0, 240.0, 1.0])
+SCALE = np.array([10.0, 40.0, 1.5])
+
+
+@pytest.fixture
+def run(tmp_path):
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame(rng.normal(MEAN, SCALE, size=(25, 3)), columns=COLUMNS)
+    frame.insert(0, "patient", [f"p{i}" for i in range(len(frame))])
+    y = (frame["age"] + rng.normal(scale=5, size=len(frame)) > 50).astype(int)
+
+    model = TwoStageModel(RandomForestClassifier(n_estimators=10, random_state=0))
+    model.fit((frame[COLUMNS].to_numpy() - MEAN) / SCALE, y)
+    model_path = str(tmp_path / "model" / "model.pkl")
+    model.save(model_path)
+
+    config_path = str(tmp_path / "config.json")
+    with open(config_path, "w") as f:
+        json.dump({"numeric_cols": COLUMNS, "scaler_mean": MEAN.tolist(), "scaler_scale": SCALE.tolist()}, f)
+    input_path = str(tmp_path / "input.csv")
+    frame.to_csv(input_path, index=False)
+
+    out_dir = str(tmp_path / "scores")
+
+    def score(chunk_size=10):
+        bulk_score.main(model_path, config_path, input_path, out_dir, chunk_size=chunk_size,
+                        workers=1, id_col="patient")
+
+    expected_probs, expected_labels = model.predict_probabilities_and_labels(
+        (frame[COLUMNS].to_numpy() - MEAN) / SCALE)
+    return score, out_dir, frame, expected_probs[:, 1], expected_labels
+
+
+def _read_parts(out_dir):
+    parts = sorted(name for name in os.listdir(out_dir) if name.endswith(".parquet"))
+    return parts, pd.concat([pd.read_parquet(os.path.join(out_dir, name)) for name in parts], ignore_index=True)
+
+
+def test_scores_every_row_in_order(run):
+    score, out_dir, frame, probabilities, labels = run
+    score()
+    parts, result = _read_parts(out_dir)
+    assert parts == ["part-000000.parquet", "part-000001.parquet", "part-000002.parquet"]
+    assert result["row"].tolist() == list(range(len(frame)))
+    assert result["patient"].tolist() == frame["patient"].tolist()
+    np.testing.assert_array_equal(result["prediction"], labels)
+    np.testing.assert_allclose(result["probability"], probabilities)
+    assert not [name for name in os.listdir(out_dir) if name.endswith(".tmp")]
+
+
+def test_resume_scores_only_missing_parts(run):
+    score, out_dir, frame, probabilities, labels = run
+    score()
+    first = bulk_score.part_path(out_dir, 0)
+    os.utime(first, (0, 0))
+    os.remove(bulk_score.part_path(out_dir, 1))
+
+    score()
+    # The completed part was left alone; the missing one was rewritten in place
+    assert os.stat(first).st_mtime == 0
+    _, result = _read_parts(out_dir)
+    assert result["row"].tolist() == list(range(len(frame)))
+    np.testing.assert_array_equal(result["prediction"], labels)
+
+
+def test_resume_with_different_settings_is_refused(run):
+    score, out_dir, *_ = run
+    score(chunk_size=10)
+    with pytest.raises(ValueError, match="different settings"):
+        score(chunk_size=5)
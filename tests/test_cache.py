@@ -0,0 +1,86 @@
+"""PredictionCache: LRU eviction, TTL expiry and model-version keys"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.app import cache as cache_module
+from src.app.cache import PredictionCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def _rows(n):
+    return np.arange(n * 3, dtype=np.float64).reshape(n, 3)
+
+
+def _probs(n):
+    return np.column_stack([np.linspace(0, 1, n), np.linspace(1, 0, n)])
+
+
+def test_hits_return_what_was_stored():
+    cache = PredictionCache(max_entries=10, ttl_seconds=0, model_version="v1")
+    keys = cache.keys_for(_rows(3))
+    assert cache.get_many(keys) == [None, None, None]
+    cache.put_many(keys, _probs(3), [0, 1, 1])
+    results = cache.get_many(keys)
+    for (probs, label), expected_probs, expected_label in zip(results, _probs(3), [0, 1, 1]):
+        np.testing.assert_array_equal(probs, expected_probs)
+        assert label == expected_label
+    stats = cache.stats()
+    assert stats["hits"] == 3 and stats["misses"] == 3 and stats["hit_rate"] == 0.5
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_entries=2, ttl_seconds=0)
+    a, b, c = cache.keys_for(_rows(3))
+    cache.put_many([a, b], _probs(2), [0, 1])
+    # Reading a makes b the least recently used
+    cache.get_many([a])
+    cache.put_many([c], _probs(1), [1])
+    hit_a, hit_b, hit_c = cache.get_many([a, b, c])
+    assert hit_a is not None and hit_b is None and hit_c is not None
+    assert len(cache) == 2 and cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = PredictionCache(max_entries=10, ttl_seconds=5)
+    keys = cache.keys_for(_rows(1))
+    cache.put_many(keys, _probs(1), [1])
+    clock[0] += 5
+    assert cache.get_many(keys)[0] is not None
+    clock[0] += 0.1
+    assert cache.get_many(keys) == [None]
+    assert len(cache) == 0 and cache.stats()["expirations"] == 1
+
+
+def test_zero_capacity_stores_nothing():
+    cache = PredictionCache(max_entries=0)
+    keys = cache.keys_for(_rows(2))
+    cache.put_many(keys, _probs(2), [0, 1])
+    assert len(cache) == 0 and cache.get_many(keys) == [None, None]
+
+
+def test_keys_fold_negative_zero_and_depend_on_values():
+    cache = PredictionCache()
+    positive, negative, other = cache.keys_for([[0.0, 1.0], [-0.0, 1.0], [0.0, 1.5]])
+    assert positive == negative
+    assert positive != other
+
+
+def test_new_model_version_never_sees_old_entries():
+    cache = PredictionCache(max_entries=10, ttl_seconds=0, model_version="v1")
+    rows = _rows(2)
+    cache.put_many(cache.keys_for(rows), _probs(2), [0, 1])
+    # Keys for the next model differ even before the swap invalidates the cache
+    assert cache.get_many(cache.keys_for(rows, model_version="v2")) == [None, None]
+    cache.invalidate("v2")
+    assert len(cache) == 0 and cache.model_version == "v2"
+    assert cache.keys_for(rows) == cache.keys_for(rows, model_version="v2")
+    assert cache.stats()["invalidations"] == 1
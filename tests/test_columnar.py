@@ -0,0 +1,86 @@
+"""Columnar bodies: .npy and Arrow IPC decoding and encoding"""
+
+import io
+
+import numpy as np
+import pytest
+
+from src.app import columnar
+
+COLUMNS = ["age", "chol", "oldpeak"]
+
+
+def _npy(X):
+    buffer = io.BytesIO()
+    np.save(buffer, X, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def test_negotiate_ignores_parameters_and_case():
+    assert columnar.negotiate("application/X-NPY; charset=binary") == columnar.NPY_MEDIA_TYPE
+    assert columnar.negotiate(columnar.ARROW_MEDIA_TYPE) == columnar.ARROW_MEDIA_TYPE
+    assert columnar.negotiate("application/json") is None
+    assert columnar.negotiate(None) is None
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_npy_round_trip(dtype):
+    X = np.random.default_rng(0).random((5, len(COLUMNS))).astype(dtype)
+    decoded = columnar.decode_features(_npy(X), columnar.NPY_MEDIA_TYPE, COLUMNS)
+    assert decoded.dtype == np.float64
+    np.testing.assert_array_equal(decoded, X.astype(np.float64))
+
+
+@pytest.mark.parametrize("X, match", [
+    (np.zeros((4, 2)), "3 columns"),
+    (np.zeros(3), "2-D"),
+    (np.zeros((4, 3), dtype=np.int64), "float32 or float64"),
+])
+def test_npy_shape_and_dtype_are_checked(X, match):
+    with pytest.raises(ValueError, match=match):
+        columnar.decode_features(_npy(X), columnar.NPY_MEDIA_TYPE, COLUMNS)
+
+
+def test_npy_rejects_pickled_objects():
+    buffer = io.BytesIO()
+    np.save(buffer, np.array([[1, "a", None]], dtype=object), allow_pickle=True)
+    with pytest.raises(ValueError):
+        columnar.decode_features(buffer.getvalue(), columnar.NPY_MEDIA_TYPE, COLUMNS)
+
+
+def test_npy_predictions():
+    probs = np.array([[0.9, 0.1], [0.3, 0.7]])
+    body = columnar.encode_predictions(probs, np.array([0, 1]), columnar.NPY_MEDIA_TYPE)
+    result = np.load(io.BytesIO(body), allow_pickle=False)
+    assert result.dtype == columnar.RESULT_DTYPE
+    assert result["prediction"].tolist() == [0, 1]
+    assert result["probability"].tolist() == [0.1, 0.7]
+
+
+def test_arrow_columns_are_matched_by_name():
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+
+    # Columns out of model order, plus one the model does not use
+    batch = pa.record_batch([pa.array([2.5, 0.0]), pa.array([1, 2]), pa.array([230.0, 180.0]),
+                             pa.array([61.0, 45.0])], names=["oldpeak", "id", "chol", "age"])
+    sink = pa.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    X = columnar.decode_features(sink.getvalue().to_pybytes(), columnar.ARROW_MEDIA_TYPE, COLUMNS)
+    np.testing.assert_array_equal(X, [[61.0, 230.0, 2.5], [45.0, 180.0, 0.0]])
+
+    with pytest.raises(ValueError, match="missing columns"):
+        columnar.decode_features(sink.getvalue().to_pybytes(), columnar.ARROW_MEDIA_TYPE, COLUMNS + ["thal"])
+
+
+def test_arrow_predictions():
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+
+    body = columnar.encode_predictions(np.array([[0.2, 0.8]]), np.array([1]), columnar.ARROW_MEDIA_TYPE)
+    table = pyarrow.ipc.open_stream(body).read_all()
+    assert table.column_names == ["prediction", "probability"]
+    assert table.column("prediction").to_pylist() == [1]
+    assert table.column("probability").to_pylist() == [0.8]
+    assert table.schema.field("prediction").type == pa.int64()
@@ -0,0 +1,47 @@
+"""InferenceExecutor: grouped Stage 2 and process-pool warm-up"""
+
+import numpy as np
+import pytest
+
+from src.app.executor import InferenceExecutor, _assign_many, balance
+from src.models.two_stage_model import TwoStageModel
+
+MODEL_PATH = "src/models/model.pkl"
+
+
+def test_balance_spreads_cost_over_chunks():
+    costs = [9, 1, 1, 1, 4, 4]
+    chunks = balance(costs, 3)
+    assert sorted(i for chunk in chunks for i in chunk) == list(range(6))
+    assert sorted(sum(costs[i] for i in chunk) for chunk in chunks) == [5, 6, 9]
+    # Never more chunks than items
+    assert balance([1.0], 8) == [[0]]
+
+
+def test_assign_many_reports_any_failure_per_problem():
+    def broken_cost(scores, n_tasks):
+        raise TypeError("bad cost function")
+
+    probs = np.array([[0.2, 0.8], [0.6, 0.4]])
+    labels = np.array([1, 0])
+    results = _assign_many(TwoStageModel(), [
+        {"probs": probs, "labels": labels, "cost_function": broken_cost},
+        {"probs": probs, "labels": labels, "n_tasks": 2},
+    ])
+    assert results[0] == {"error": "bad cost function"}
+    assert len(results[1]["optimal_assignments"]) == 2
+
+
+def test_process_warm_up_reaches_every_worker():
+    executor = InferenceExecutor(kind="process", max_workers=3, model_path=MODEL_PATH)
+    try:
+        seconds = executor.warm_up(None, (1, 4), n_features=13)
+        assert seconds > 0
+        assert len(executor._pool._processes) == 3
+    finally:
+        executor.shutdown()
+
+
+def test_process_pool_needs_a_model_path():
+    with pytest.raises(ValueError, match="model_path"):
+        InferenceExecutor(kind="process", max_workers=1)
@@ -0,0 +1,56 @@
+"""Featurizer output checked against the DataFrame + StandardScaler path it replaces"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from src.app.featurizer import Featurizer
+
+COLUMNS = ["age", "chol", "thalach", "oldpeak"]
+
+
+def _samples(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [SimpleNamespace(age=float(rng.integers(30, 80)), chol=float(rng.normal(240, 40)),
+                            thalach=float(rng.normal(150, 20)), oldpeak=float(rng.random() * 4))
+            for _ in range(n)]
+
+
+def test_transform_matches_dataframe_and_scaler():
+    samples = _samples(50)
+    frame = pd.DataFrame([vars(sample) for sample in samples])
+    # The request's column order differs from the model's
+    frame = frame[["oldpeak", "age", "thalach", "chol"]]
+    scaler = StandardScaler().fit(frame[COLUMNS].to_numpy())
+    featurizer = Featurizer(COLUMNS, scaler_mean=scaler.mean_, scaler_scale=scaler.scale_)
+    np.testing.assert_array_equal(featurizer.transform(samples), scaler.transform(frame[COLUMNS].to_numpy()))
+
+
+def test_transform_without_scaler_orders_columns():
+    samples = _samples(3)
+    featurizer = Featurizer(["chol", "age"])
+    expected = np.array([[sample.chol, sample.age] for sample in samples])
+    np.testing.assert_array_equal(featurizer.transform(samples), expected)
+    np.testing.assert_array_equal(featurizer.transform_one(samples[1]), expected[1:2])
+
+
+def test_single_column():
+    featurizer = Featurizer(["age"], scaler_mean=[50.0], scaler_scale=[10.0])
+    sample = _samples(1)[0]
+    np.testing.assert_array_equal(featurizer.transform([sample]), [[(sample.age - 50.0) / 10.0]])
+
+
+def test_transform_writes_into_out():
+    featurizer = Featurizer(COLUMNS)
+    out = np.empty((4, len(COLUMNS)))
+    assert featurizer.transform(_samples(4), out=out) is out
+    with pytest.raises(ValueError, match="out has shape"):
+        featurizer.transform(_samples(3), out=out)
+
+
+def test_scaler_length_must_match_columns():
+    with pytest.raises(ValueError, match="numeric columns"):
+        Featurizer(COLUMNS, scaler_mean=[0.0, 0.0], scaler_scale=[1.0, 1.0])
@@ -0,0 +1,19 @@
+"""The API's cold-start import budget, checked by scripts/import_time.py"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+@pytest.mark.slow
+def test_api_import_stays_within_budget():
+    result = subprocess.run(
+        [sys.executable, os.path.join(ROOT, "scripts", "import_time.py"), "--repeats", "3"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "Imported eagerly" not in result.stdout
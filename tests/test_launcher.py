@@ -0,0 +1,91 @@
+"""Launcher bookkeeping: CPU sets, load retries and the model file watch"""
+
+import gc
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from src.app import main
+from src.app.serving import file_signature
+
+
+@pytest.fixture
+def launcher_module(client):
+    # Imported after the app: the launcher sets serving defaults in the
+    # environment that the test app must not pick up
+    from src.app import launcher
+
+    yield launcher
+    gc.unfreeze()
+
+
+def _launcher(launcher_module):
+    return launcher_module.Launcher("127.0.0.1", 0, n_workers=2, threads_per_worker=1, pin_cpus=False,
+                                    graceful_timeout=1)
+
+
+def test_cpu_sets_wrap_around(launcher_module):
+    assert launcher_module.cpu_sets(3, 2, [0, 1, 2, 3]) == [{0, 1}, {2, 3}, {0, 1}]
+    assert launcher_module.cpu_sets(2, 8, [4, 5]) == [{4, 5}, {4, 5}]
+
+
+def test_failed_loads_back_off_then_recover(launcher_module, monkeypatch):
+    def failing():
+        raise FileNotFoundError("no model yet")
+
+    monkeypatch.setattr(launcher_module, "preload", failing)
+    launcher = _launcher(launcher_module)
+    assert launcher._load() is False
+    assert launcher.state is None and launcher.load_error == "no model yet"
+    assert launcher._next_retry is not None and launcher._retry_delay == 2.0
+    assert launcher._load() is False
+    assert launcher._retry_delay == 4.0
+
+    state = SimpleNamespace(model_version="v1")
+    monkeypatch.setattr(launcher_module, "preload", lambda: state)
+    assert launcher._load() is True
+    assert launcher.state is state and launcher.load_error is None and launcher._retry_delay == 1.0
+
+    # A failed reload keeps the serving model and schedules no retry
+    monkeypatch.setattr(launcher_module, "preload", failing)
+    launcher._next_retry = None
+    assert launcher._load() is False
+    assert launcher.state is state and launcher._next_retry is None
+
+
+def test_changed_files_are_reported_once_stable(launcher_module, monkeypatch, tmp_path):
+    model_path, config_path = tmp_path / "model.pkl", tmp_path / "config.json"
+    model_path.write_bytes(b"v1")
+    config_path.write_text("{}")
+    monkeypatch.setattr(main, "MODEL_PATH", str(model_path))
+    monkeypatch.setattr(main, "CONFIG_PATH", str(config_path))
+    monkeypatch.setattr(main, "MODEL_WATCH_INTERVAL_SECONDS", 60)
+    launcher = _launcher(launcher_module)
+
+    def poll():
+        launcher._next_watch = 0.0
+        return launcher._files_changed()
+
+    launcher.state = SimpleNamespace(signatures=(file_signature(str(model_path)), file_signature(str(config_path))))
+    assert not poll() and not poll()
+    # Polls within the interval do not look at the files
+    assert not launcher._files_changed()
+
+    model_path.write_bytes(b"v2 is longer")
+    # Changed, but not yet unchanged for a whole interval
+    assert not poll()
+    assert poll()
+    # A reload of these files failed: wait for them to change again
+    launcher._failed_signatures = launcher._watched
+    assert not poll()
+
+    os.remove(model_path)
+    assert not poll() and not poll()
+
+
+def test_watch_is_off_without_an_interval(launcher_module, monkeypatch):
+    monkeypatch.setattr(main, "MODEL_WATCH_INTERVAL_SECONDS", 0)
+    launcher = _launcher(launcher_module)
+    launcher.state = SimpleNamespace(signatures=(None, None))
+    assert not launcher._files_changed()
@@ -0,0 +1,52 @@
+"""Latency histograms and their Prometheus rendering"""
+
+import re
+
+import pytest
+
+from src.app.metrics import BUCKETS, Histogram, MetricsRegistry
+
+
+def test_quantiles_interpolate_within_buckets():
+    histogram = Histogram()
+    for _ in range(100):
+        histogram.observe(0.001)
+    assert histogram.count == 100
+    assert histogram.sum == pytest.approx(0.1)
+    # Every observation lands in the bucket whose upper bound is >= 1 ms
+    upper = next(bound for bound in BUCKETS if bound >= 0.001)
+    lower = BUCKETS[BUCKETS.index(upper) - 1]
+    for q in (0.5, 0.95, 0.99):
+        assert lower <= histogram.quantile(q) <= upper
+
+
+def test_quantile_of_an_empty_histogram_is_zero():
+    assert Histogram().quantile(0.99) == 0.0
+
+
+def test_observations_beyond_the_last_bucket_go_to_inf():
+    histogram = Histogram()
+    histogram.observe(BUCKETS[-1] * 10)
+    assert histogram.counts[-1] == 1
+    assert histogram.quantile(0.5) == BUCKETS[-1]
+
+
+def test_render_is_cumulative_prometheus_text():
+    registry = MetricsRegistry()
+    registry.observe_request("/predict", 200, 0.002)
+    registry.observe_request("/predict", 200, 0.004)
+    registry.observe_request("/predict", 422, 0.0005)
+    registry.observe_stage("/predict", "featurize", 0.0001)
+    text = registry.render()
+    assert text.endswith("\n")
+    assert "# TYPE api_request_duration_seconds histogram" in text
+    assert 'api_request_duration_seconds_bucket{endpoint="/predict",le="+Inf"} 3' in text
+    assert 'api_request_duration_seconds_count{endpoint="/predict"} 3' in text
+    assert 'api_stage_duration_seconds_count{endpoint="/predict",stage="featurize"} 1' in text
+    assert 'api_requests_total{endpoint="/predict",status="200"} 2' in text
+    assert 'api_requests_total{endpoint="/predict",status="422"} 1' in text
+    assert 'api_request_duration_quantile_seconds{endpoint="/predict",quantile="0.99"}' in text
+
+    buckets = re.findall(r'api_request_duration_seconds_bucket\{endpoint="/predict",le="[^"]+"\} (\d+)', text)
+    counts = [int(n) for n in buckets]
+    assert counts == sorted(counts) and counts[-1] == 3
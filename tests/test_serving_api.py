@@ -0,0 +1,307 @@
+"""API tests against the bundled model, served in-process with TestClient"""
+
+import asyncio
+import functools
+import io
+import json
+import sys
+
+import numpy as np
+import pytest
+from starlette.requests import ClientDisconnect
+
+from src.app import main
+from src.app.cache import PredictionCache
+
+SAMPLE = {"age": 63, "sex": 1, "cp": 3, "trestbps": 145, "chol": 233, "fbs": 1, "restecg": 0,
+          "thalach": 150, "exang": 0, "oldpeak": 2.3, "slope": 0, "ca": 0, "thal": 1}
+
+
+def _samples(n):
+    return [dict(SAMPLE, age=40 + i, chol=200 + 7 * i) for i in range(n)]
+
+
+@pytest.fixture
+def cache(client, monkeypatch):
+    cache = PredictionCache(max_entries=100, ttl_seconds=0, model_version=main.serving.model_version)
+    monkeypatch.setattr(main, "prediction_cache", cache)
+    return cache
+
+
+def test_repeated_predictions_are_served_from_the_cache(client, cache):
+    first = client.post("/predict", json=SAMPLE)
+    second = client.post("/predict", json=SAMPLE)
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    assert client.get("/cache/stats").json()["hits"] == 1
+
+
+def test_large_batches_skip_the_cache(client, cache, monkeypatch):
+    monkeypatch.setattr(main, "PREDICTION_CACHE_MAX_ROWS", 4)
+    assert client.post("/batch_predict", json={"samples": _samples(4)}).status_code == 200
+    assert cache.stats()["misses"] == 4
+    response = client.post("/batch_predict", json={"samples": _samples(5)})
+    assert response.status_code == 200
+    assert response.json()["n_predictions"] == 5
+    assert cache.stats()["misses"] == 4 and cache.stats()["hits"] == 0
+
+
+def test_reload_swaps_in_a_new_state(client, cache):
+    before = main.serving
+    expected = client.post("/predict", json=SAMPLE).json()
+    response = client.post("/admin/reload")
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "reloaded"
+    assert main.serving is not before
+    assert response.json()["model_version"] == before.model_version
+    assert cache.stats()["invalidations"] == 1 and len(cache) == 0
+    assert client.post("/predict", json=SAMPLE).json() == expected
+
+
+def test_failed_reload_keeps_the_old_model(client, monkeypatch):
+    before = main.serving
+    monkeypatch.setattr(main, "MODEL_PATH", "does/not/exist.pkl")
+    response = client.post("/admin/reload")
+    assert response.status_code == 500
+    assert "previous model still serving" in response.json()["detail"]
+    assert main.serving is before
+    assert client.post("/predict", json=SAMPLE).status_code == 200
+
+
+def test_reload_while_reloading_is_rejected(client):
+    with main.reload_lock:
+        assert client.post("/admin/reload").status_code == 409
+
+
+def _ndjson(rows):
+    return "".join(row if isinstance(row, str) else json.dumps(row) + "\n" for row in rows)
+
+
+def test_stream_reports_invalid_rows_in_place(client, monkeypatch):
+    monkeypatch.setattr(main, "STREAM_CHUNK_SIZE", 2)
+    body = _ndjson([_samples(1)[0], {"age": "old"}, "\n", _samples(2)[1]])
+    response = client.post("/batch_predict/stream", content=body,
+                           headers={"content-type": "application/x-ndjson"})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["index"] for line in lines] == [0, 1, 2]
+    assert lines[1]["error"].startswith("Invalid row")
+    expected = client.post("/batch_predict", json={"samples": _samples(2)}).json()
+    assert [lines[0]["prediction"], lines[2]["prediction"]] == expected["predictions"]
+    assert [lines[0]["probability"], lines[2]["probability"]] == expected["probabilities"]
+
+
+def test_stream_aborts_on_an_oversized_line(client, monkeypatch):
+    monkeypatch.setattr(main, "STREAM_MAX_LINE_BYTES", 64)
+    response = client.post("/batch_predict/stream", content="x" * 100)
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == [{"index": 0, "error": "Stream aborted: NDJSON line longer than 64 bytes"}]
+
+
+def test_stream_skips_the_cache(client, cache):
+    response = client.post("/batch_predict/stream", content=_ndjson(_samples(3)))
+    assert len(response.text.splitlines()) == 3
+    assert cache.stats()["hits"] == cache.stats()["misses"] == 0
+
+
+def test_stream_stops_quietly_when_the_client_disconnects(client):
+    async def disconnecting():
+        yield (json.dumps(SAMPLE) + "\n").encode()
+        raise ClientDisconnect()
+
+    async def collect():
+        return [chunk async for chunk in main.stream_predictions(main.serving, disconnecting())]
+
+    assert asyncio.run(collect()) == []
+
+
+def _npy(X):
+    buffer = io.BytesIO()
+    np.save(buffer, X, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def _raw_matrix(samples):
+    return np.array([[sample[col] for col in main.serving.featurizer.numeric_cols] for sample in samples],
+                    dtype=np.float64)
+
+
+def test_npy_body_matches_json(client):
+    samples = _samples(4)
+    expected = client.post("/batch_predict", json={"samples": samples}).json()
+    response = client.post("/batch_predict", content=_npy(_raw_matrix(samples)),
+                           headers={"content-type": "application/x-npy"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-npy"
+    result = np.load(io.BytesIO(response.content), allow_pickle=False)
+    assert result["prediction"].tolist() == expected["predictions"]
+    assert result["probability"].tolist() == expected["probabilities"]
+
+
+def test_arrow_body_matches_json(client):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+
+    samples = _samples(3)
+    expected = client.post("/batch_predict", json={"samples": samples}).json()
+    table = pa.table({col: [float(sample[col]) for sample in samples] for col in SAMPLE})
+    sink = pa.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    response = client.post("/batch_predict", content=sink.getvalue().to_pybytes(),
+                           headers={"content-type": "application/vnd.apache.arrow.stream"})
+    assert response.status_code == 200
+    result = pyarrow.ipc.open_stream(response.content).read_all()
+    assert result.column("prediction").to_pylist() == expected["predictions"]
+    assert result.column("probability").to_pylist() == expected["probabilities"]
+
+
+def test_npy_body_with_integer_dtype_is_rejected(client):
+    X = _raw_matrix(_samples(2)).astype(np.int64)
+    response = client.post("/batch_predict", content=_npy(X), headers={"content-type": "application/x-npy"})
+    assert response.status_code == 400
+    assert "float32 or float64" in response.json()["detail"]
+
+
+def test_metrics_cover_requests_and_stages(client):
+    assert client.post("/predict", json=SAMPLE).status_code == 200
+    assert client.post("/predict", json={"age": 1}).status_code == 422
+    text = client.get("/metrics").text
+    assert 'api_requests_total{endpoint="/predict",status="200"}' in text
+    assert 'api_requests_total{endpoint="/predict",status="422"}' in text
+    for stage in ("parse", "featurize", "stage_1_predict", "serialize"):
+        assert f'api_stage_duration_seconds_count{{endpoint="/predict",stage="{stage}"}}' in text
+
+
+def test_registered_cost_function_is_solved_through_the_model(client):
+    from src.models.assignment import SeparableCost
+    from src.models.cost_functions import COST_FUNCTIONS, COST_STRUCTURES, register_cost_function
+
+    @register_cost_function("test_weighted", structure=lambda scores, n_tasks:
+                            SeparableCost(scores, np.arange(1, n_tasks + 1)))
+    def weighted_cost(scores, n_tasks):
+        return scores[:, np.newaxis] * np.arange(1, n_tasks + 1)[np.newaxis, :]
+
+    try:
+        state = main.serving
+        probs = np.array([[0.9, 0.1], [0.2, 0.8], [0.5, 0.5], [0.6, 0.4]])
+        labels = np.array([0, 1, 0, 0])
+        result = asyncio.run(state.executor.run(functools.partial(
+            state.model.assign, probs, labels, maximize=True, cost_function="test_weighted")))
+        # The declared structure was found in the registry the model reads
+        assert result["assignment"]["solver"] == "sort"
+        # Highest scores take the heaviest tasks
+        assert sorted(result["optimal_assignments"]) == [(0, 0), (1, 3), (2, 2), (3, 1)]
+    finally:
+        COST_FUNCTIONS.pop("test_weighted", None)
+        COST_STRUCTURES.pop("test_weighted", None)
+    # One copy of each module: nothing was imported under a bare module name
+    assert not {"cost_functions", "assignment", "two_stage_model"} & set(sys.modules)
+
+
+def test_session_repairs_run_on_the_inference_pool(client, monkeypatch):
+    repairs = []
+    run = main.shared_executor.run
+
+    async def recording_run(fn, *args):
+        repairs.append(fn.__name__)
+        return await run(fn, *args)
+
+    monkeypatch.setattr(main.shared_executor, "run", recording_run)
+    created = client.post("/assignment_sessions", json={"samples": _samples(3), "n_tasks": 4})
+    assert created.status_code == 200, created.text
+    session_id, worker_ids = created.json()["session_id"], created.json()["worker_ids"]
+    changed = client.post(f"/assignment_sessions/{session_id}/changes",
+                          json={"add": _samples(2), "remove": [worker_ids[0]]})
+    assert changed.status_code == 200, changed.text
+    assert len(changed.json()["stage_2_optimal_assignments"]) == 4
+    assert repairs == ["repair", "repair"]
+    assert client.delete(f"/assignment_sessions/{session_id}").status_code == 200
+
+
+def test_grouped_predict_and_assign_matches_separate_calls(client):
+    groups = [{"group_id": "a", "samples": _samples(4)},
+              {"group_id": "b", "samples": _samples(3), "n_tasks": 5},
+              {"group_id": "empty", "samples": []}]
+    response = client.post("/predict_and_assign/groups", json={"groups": groups})
+    assert response.status_code == 200, response.text
+    results = response.json()["groups"]
+    assert list(results) == ["a", "b", "empty"]
+    for group in groups[:2]:
+        expected = client.post("/predict_and_assign", json={
+            "samples": group["samples"], "n_tasks": group.get("n_tasks")}).json()
+        assert results[group["group_id"]]["stage_2_optimal_assignments"] == expected["stage_2_optimal_assignments"]
+    assert results["empty"] == {"error": "Group has no samples"}
+
+
+def test_grouped_predict_and_assign_rejects_duplicate_ids(client):
+    response = client.post("/predict_and_assign/groups", json={"groups": [
+        {"group_id": "a", "samples": _samples(2)}, {"group_id": "a", "samples": _samples(2)}]})
+    assert response.status_code == 400
+
+
+def test_predict_and_assign_fills_task_capacities(client):
+    response = client.post("/predict_and_assign", json={"samples": _samples(5), "capacities": [2, 0, 1]})
+    assert response.status_code == 200, response.text
+    tasks = [task for _, task in response.json()["stage_2_optimal_assignments"]]
+    assert sorted(tasks) == [0, 0, 2]
+
+
+def test_predict_and_assign_over_time_budget_uses_anytime_solver(client):
+    # A budget that has passed before Stage 2 starts forces the anytime fallback
+    response = client.post("/predict_and_assign", json={
+        "samples": _samples(6), "solver": "hungarian", "time_budget_ms": 0.001,
+    })
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["stage_2_solver"] == "anytime"
+    assert isinstance(body["stage_2_optimal"], bool)
+    assert sorted(task for _, task in body["stage_2_optimal_assignments"]) == list(range(6))
+
+
+def test_grouped_predict_and_assign_over_time_budget(client):
+    response = client.post("/predict_and_assign/groups", json={"groups": [
+        {"group_id": "a", "samples": _samples(5), "solver": "hungarian", "time_budget_ms": 0.001},
+        {"group_id": "b", "samples": _samples(3), "solver": "hungarian"},
+    ]})
+    assert response.status_code == 200, response.text
+    groups = response.json()["groups"]
+    assert groups["a"]["stage_2_solver"] == "anytime"
+    assert isinstance(groups["a"]["stage_2_optimal"], bool)
+    assert groups["b"]["stage_2_optimal"] is True
+
+
+def test_ready_once_a_model_is_serving(client, monkeypatch):
+    assert client.get("/live").json() == {"status": "alive"}
+    ready = client.get("/ready")
+    assert ready.status_code == 200
+    assert ready.json()["model_version"] == main.serving.model_version
+    assert ready.json()["model_warmup_seconds"] is not None
+
+    monkeypatch.setattr(main, "serving", None)
+    assert client.get("/ready").json() == {"status": "starting", "detail": None}
+    monkeypatch.setattr(main, "startup_error", "bad artifact")
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json() == {"status": "failed", "detail": "bad artifact"}
+    assert client.get("/live").status_code == 200
+
+
+def test_managed_worker_asks_the_launcher_to_reload(client, monkeypatch):
+    signals = []
+    monkeypatch.setattr(main, "model_managed_externally", True)
+    monkeypatch.setattr(main.os, "kill", lambda pid, sig: signals.append((pid, sig)))
+    before = main.serving
+    response = client.post("/admin/reload")
+    assert response.status_code == 202
+    assert signals == [(main.os.getppid(), main.signal.SIGHUP)]
+    assert main.serving is before
+
+
+def test_managed_worker_does_not_watch_model_files(client, monkeypatch):
+    monkeypatch.setattr(main, "model_managed_externally", True)
+    monkeypatch.setattr(main, "MODEL_WATCH_INTERVAL_SECONDS", 0.01)
+    main.load_model_and_config()
+    assert main.model_watcher is None
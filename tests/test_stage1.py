@@ -0,0 +1,130 @@
+"""Stage 1 fast paths checked against sklearn's own predictions"""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from src.models.compiled_forest import CompiledForest
+from src.models.two_stage_model import TwoStageModel
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(loc=[50, 1, 200, 0], scale=[10, 0.5, 40, 3], size=(400, 4))
+    # Rounded columns give tied feature values, as in the real data
+    X[:, 1] = np.round(X[:, 1])
+    y = (X[:, 0] / 10 + X[:, 1] + rng.normal(size=len(X)) > 6).astype(int)
+    return X, y
+
+
+@pytest.fixture(scope="module")
+def scaled_model(data):
+    X, y = data
+    scaler = StandardScaler().fit(X)
+    model = TwoStageModel(RandomForestClassifier(n_estimators=40, max_depth=8, random_state=0))
+    model.fit(scaler.transform(X), y)
+    return model, scaler
+
+
+def test_compiled_forest_matches_sklearn(scaled_model, data):
+    model, scaler = scaled_model
+    X = scaler.transform(data[0])
+    forest = CompiledForest.from_sklearn(model.rf_model)
+    np.testing.assert_array_equal(forest.predict_proba(X), model.rf_model.predict_proba(X))
+
+
+def test_mmap_artifact_round_trip(scaled_model, data, tmp_path):
+    model, scaler = scaled_model
+    X = scaler.transform(data[0])
+    model.save_compiled(str(tmp_path / "artifact"))
+    loaded = TwoStageModel.load_compiled(str(tmp_path / "artifact"), mmap_mode="r")
+    assert loaded.rf_model is None
+    assert isinstance(loaded.compiled_forest.feature, np.memmap)
+    np.testing.assert_array_equal(loaded.predict_probabilities(X), model.rf_model.predict_proba(X))
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_compact_artifact_round_trip(scaled_model, data, tmp_path, compress):
+    model, scaler = scaled_model
+    X = scaler.transform(data[0])
+    forest = CompiledForest.from_sklearn(model.rf_model)
+    forest.save(tmp_path / "forest", compact=True, compress=compress, value_dtype=np.float64)
+    loaded, _ = CompiledForest.load(tmp_path / "forest")
+    np.testing.assert_array_equal(loaded.predict_proba(X), model.rf_model.predict_proba(X))
+
+
+def _threshold_rows(forest, n_features, rng):
+    """Raw rows sitting exactly on, and one float step either side of, folded thresholds"""
+    internal = np.flatnonzero(forest.left != np.arange(forest.n_nodes))
+    nodes = internal[np.isfinite(forest.threshold[internal])]
+    nodes = rng.choice(nodes, size=min(len(nodes), 200), replace=False)
+    rows = []
+    for node in nodes:
+        value = forest.threshold[node]
+        for x in (np.nextafter(value, -np.inf), value, np.nextafter(value, np.inf)):
+            row = rng.normal(size=n_features)
+            row[forest.feature[node]] = x
+            rows.append(row)
+    return np.array(rows)
+
+
+def test_folded_scaler_is_bit_identical(scaled_model, data):
+    model, scaler = scaled_model
+    forest = CompiledForest.from_sklearn(model.rf_model)
+    folded = forest.fold_scaler(scaler.mean_, scaler.scale_)
+    rng = np.random.default_rng(1)
+    raw = np.vstack([data[0], _threshold_rows(folded, data[0].shape[1], rng)])
+    expected = model.rf_model.predict_proba(scaler.transform(raw))
+    np.testing.assert_array_equal(folded.predict_proba(raw), expected)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_folded_random_scaler_is_bit_identical(scaled_model, data, seed):
+    model, _ = scaled_model
+    rng = np.random.default_rng(seed)
+    n_features = data[0].shape[1]
+    mean = rng.normal(scale=100, size=n_features)
+    scale = rng.uniform(1e-3, 1e3, size=n_features)
+    folded = CompiledForest.from_sklearn(model.rf_model).fold_scaler(mean, scale)
+    raw = np.vstack([rng.normal(mean, scale * 2, size=(300, n_features)),
+                     _threshold_rows(folded, n_features, rng)])
+    expected = model.rf_model.predict_proba((raw - mean) / scale)
+    np.testing.assert_array_equal(folded.predict_proba(raw), expected)
+
+
+def test_two_stage_fold_scaler_takes_raw_features(data):
+    X, y = data
+    scaler = StandardScaler().fit(X)
+    model = TwoStageModel(RandomForestClassifier(n_estimators=20, random_state=0))
+    model.fit(scaler.transform(X), y)
+    expected = model.rf_model.predict_proba(scaler.transform(X))
+    model.fold_scaler(scaler.mean_, scaler.scale_)
+    np.testing.assert_array_equal(model.predict_probabilities(X), expected)
+
+
+@pytest.mark.parametrize("compiled", [False, True])
+@pytest.mark.parametrize("chunk_size", [1, 8, 64])
+def test_early_exit_labels_match_sklearn_predict(scaled_model, data, compiled, chunk_size):
+    model, scaler = scaled_model
+    X = scaler.transform(data[0])
+    if compiled:
+        model = TwoStageModel(model.rf_model).compile()
+    labels, trees_used = model.predict_labels_early_exit(X, chunk_size=chunk_size)
+    np.testing.assert_array_equal(labels, model.rf_model.predict(X))
+    n_trees = len(model.rf_model.estimators_)
+    assert trees_used.max() <= n_trees
+    assert trees_used.min() >= 1
+
+
+def test_early_exit_tied_votes_resolve_like_sklearn():
+    # Two shallow trees on binary features and random labels: many rows end in a 1-1 vote
+    rng = np.random.default_rng(2)
+    X = rng.integers(0, 2, size=(200, 3)).astype(float)
+    y = rng.integers(0, 2, size=200)
+    model = TwoStageModel(RandomForestClassifier(n_estimators=2, max_depth=2, random_state=0))
+    model.fit(X, y)
+    for engine in (model, TwoStageModel(model.rf_model).compile()):
+        labels, _ = engine.predict_labels_early_exit(X, chunk_size=1)
+        np.testing.assert_array_equal(labels, model.rf_model.predict(X))